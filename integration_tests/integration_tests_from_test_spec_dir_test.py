@@ -14,8 +14,10 @@ from typing import Text
 from six import itervalues
 
 from swagger_spec_compatibility.cli.common import uri
+from swagger_spec_compatibility.interning import SpecsInterner
 from swagger_spec_compatibility.rules import compatibility_status
 from swagger_spec_compatibility.spec_utils import load_spec_from_uri
+from swagger_spec_compatibility.spec_utils import load_uncached_spec_from_uri
 
 
 Specification = NamedTuple(
@@ -54,7 +56,7 @@ def get_test_specifications():  # pragma: no cover # this is used internally by
 
 def pytest_generate_tests(metafunc):  # pragma: no cover # this is used internally by pytest and it won't appear on coverage
     # type: (Any) -> None
-    if metafunc.definition.name == 'test_spec_from_test_specs_directory' and ['test_specification'] == metafunc.fixturenames:
+    if metafunc.definition.name.startswith('test_spec_from_test_specs_directory') and ['test_specification'] == metafunc.fixturenames:
         test_specifications = list(get_test_specifications())
         if test_specifications:
             metafunc.parametrize('test_specification', test_specifications, ids=_test_specification_id)
@@ -62,11 +64,20 @@ def pytest_generate_tests(metafunc):  # pragma: no cover # this is used internal
             metafunc.parametrize('test_specification', [])
 
 
-def test_spec_from_test_specs_directory(test_specification):
-    # type: (Specification) -> None
+def _check_test_specification(test_specification, lazy_dereferencing, intern_specs=False):
+    # type: (Specification, bool, bool) -> None
+    if intern_specs:
+        # The cached specs might not be interned
+        interner = SpecsInterner()
+        old_spec = load_uncached_spec_from_uri(test_specification.old_spec_uri, interner=interner)
+        new_spec = load_uncached_spec_from_uri(test_specification.new_spec_uri, interner=interner)
+    else:
+        old_spec = load_spec_from_uri(test_specification.old_spec_uri)
+        new_spec = load_spec_from_uri(test_specification.new_spec_uri)
     result = compatibility_status(
-        old_spec=load_spec_from_uri(test_specification.old_spec_uri),
-        new_spec=load_spec_from_uri(test_specification.new_spec_uri),
+        old_spec=old_spec,
+        new_spec=new_spec,
+        lazy_dereferencing=lazy_dereferencing,
     )
     reports = [
         report
@@ -79,3 +90,18 @@ def test_spec_from_test_specs_directory(test_specification):
         '\n'.join(report.string_representation() for report in reports),
     )
     assert len(reports) == test_specification.number_of_reports, error_message
+
+
+def test_spec_from_test_specs_directory(test_specification):
+    # type: (Specification) -> None
+    _check_test_specification(test_specification, lazy_dereferencing=False)
+
+
+def test_spec_from_test_specs_directory_with_lazy_dereferencing(test_specification):
+    # type: (Specification) -> None
+    _check_test_specification(test_specification, lazy_dereferencing=True)
+
+
+def test_spec_from_test_specs_directory_with_interned_specs(test_specification):
+    # type: (Specification) -> None
+    _check_test_specification(test_specification, lazy_dereferencing=True, intern_specs=True)
@@ -24,7 +24,8 @@ setup(
     ],
     extras_require={
         ':python_version<"3.5"': ['typing'],
-        ':python_version<"3.2"': ['functools32'],
+        ':python_version<"3.2"': ['functools32', 'futures'],
+        'streaming': ['ijson>=3.1'],
     },
     license='Copyright Yelp, Inc. 2018',
     packages=find_packages(exclude=('tests*', 'testing*')),
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# Asyncio counterparts of the library APIs.
+# NOTE: the module requires python3, so it is not imported by the package and has to be explicitly imported.
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import asyncio
+import functools
+import threading
+import typing
+from concurrent.futures import Executor
+
+from bravado_core.spec import Spec
+
+from swagger_spec_compatibility import rules as sync_rules
+from swagger_spec_compatibility import spec_utils
+from swagger_spec_compatibility.executors import available_cpus
+from swagger_spec_compatibility.executors import ExecutorType
+from swagger_spec_compatibility.executors import get_executor
+from swagger_spec_compatibility.rules import _ALL_RULES
+from swagger_spec_compatibility.rules import error_description
+from swagger_spec_compatibility.rules import SpecsPairStatus
+from swagger_spec_compatibility.rules.common import RuleProtocol
+from swagger_spec_compatibility.rules.common import RuleRegistry
+from swagger_spec_compatibility.rules.common import ValidationMessage
+
+
+async def load_spec_from_uri(
+    uri,  # type: typing.Text
+    executor=None,  # type: typing.Optional[Executor]
+):
+    # type: (...) -> Spec
+    """
+    Load the spec without blocking the event loop.
+
+    Fetching, parsing, validation and dereferencing of the spec run in `executor` (default: the event
+    loop default executor). The specs are cached as done by `spec_utils.load_spec_from_uri`.
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(executor, spec_utils.load_spec_from_uri, uri)
+
+
+async def compatibility_status(
+    old_spec,  # type: Spec
+    new_spec,  # type: Spec
+    rules=_ALL_RULES(),  # type: typing.Union[_ALL_RULES, typing.Iterable[typing.Type[RuleProtocol]]]
+    executor=ExecutorType.PROCESS,  # type: typing.Union[ExecutorType, Executor]
+    jobs=None,  # type: typing.Optional[int]
+    fail_fast=False,  # type: bool
+    timeout=None,  # type: typing.Optional[float]
+    max_visited_nodes=None,  # type: typing.Optional[int]
+):
+    # type: (...) -> typing.Mapping[typing.Type[RuleProtocol], typing.Iterable[ValidationMessage]]
+    """
+    Evaluate the rules on the old and new specs without blocking the event loop.
+
+    The evaluation is coordinated by a thread of the event loop default executor, while the rules
+    run in `executor`. Check `rules.iter_compatibility_status` for details about the parameters.
+
+    Cancelling the awaiting task stops the evaluation: the rules not started yet are not evaluated
+    and the rules running in the current process are interrupted. Rules already running in worker
+    processes complete in background, but their results are discarded.
+    """
+    loop = asyncio.get_event_loop()
+    cancel_event = threading.Event()
+    try:
+        return await loop.run_in_executor(
+            None,
+            functools.partial(
+                sync_rules.compatibility_status,
+                old_spec, new_spec, rules,
+                executor=executor, jobs=jobs, fail_fast=fail_fast, timeout=timeout,
+                max_visited_nodes=max_visited_nodes, cancel_event=cancel_event,
+            ),
+        )
+    except asyncio.CancelledError:
+        cancel_event.set()
+        raise
+
+
+async def _compatibility_status_of_uris(
+    semaphore,  # type: asyncio.Semaphore
+    old_spec_uri,  # type: typing.Text
+    new_spec_uri,  # type: typing.Text
+    rules,  # type: typing.Sequence[typing.Type[RuleProtocol]]
+    executor,  # type: Executor
+    timeout,  # type: typing.Optional[float]
+    max_visited_nodes,  # type: typing.Optional[int]
+):
+    # type: (...) -> SpecsPairStatus
+    async with semaphore:
+        try:
+            old_spec, new_spec = await asyncio.gather(load_spec_from_uri(old_spec_uri), load_spec_from_uri(new_spec_uri))
+            rules_messages = await compatibility_status(
+                old_spec, new_spec, rules, executor=executor, timeout=timeout, max_visited_nodes=max_visited_nodes,
+            )
+        except asyncio.CancelledError:  # It is an Exception up to python3.7
+            raise
+        except Exception as e:
+            return SpecsPairStatus(
+                old_spec_uri=old_spec_uri,
+                new_spec_uri=new_spec_uri,
+                status=None,
+                error=error_description(e),
+            )
+    return SpecsPairStatus(
+        old_spec_uri=old_spec_uri,
+        new_spec_uri=new_spec_uri,
+        status={rule: list(messages) for rule, messages in rules_messages.items()},
+        error=None,
+    )
+
+
+async def compatibility_status_many(
+    specs_uris,  # type: typing.Iterable[typing.Tuple[typing.Text, typing.Text]]
+    rules=_ALL_RULES(),  # type: typing.Union[_ALL_RULES, typing.Iterable[typing.Type[RuleProtocol]]]
+    executor=ExecutorType.PROCESS,  # type: typing.Union[ExecutorType, Executor]
+    jobs=None,  # type: typing.Optional[int]
+    timeout=None,  # type: typing.Optional[float]
+    max_visited_nodes=None,  # type: typing.Optional[int]
+    concurrency=None,  # type: typing.Optional[int]
+):
+    # type: (...) -> typing.List[SpecsPairStatus]
+    """
+    Concurrently evaluate the rules on many (old spec URI, new spec URI) pairs, returning the statuses
+    in the same order of the pairs.
+
+    At most `concurrency` (default: number of available CPUs) pairs are loaded and evaluated at the
+    same time, while the rules of all the pairs share the same `executor`. Pairs that could not be
+    loaded or evaluated report the error instead of failing the whole call.
+    Cancelling the awaiting task cancels the evaluation of all the pairs.
+
+    Check `rules.iter_compatibility_status` for details about the other parameters.
+    """
+    if isinstance(rules, _ALL_RULES):
+        rules = RuleRegistry.rules()
+    rules = list(rules)
+
+    loop = asyncio.get_event_loop()
+    semaphore = asyncio.Semaphore(concurrency or available_cpus())
+    executor_context = get_executor(executor, jobs=jobs)
+    pairs_executor = executor_context.__enter__()
+    try:
+        return await asyncio.gather(*(
+            _compatibility_status_of_uris(semaphore, old_spec_uri, new_spec_uri, rules, pairs_executor, timeout, max_visited_nodes)
+            for old_spec_uri, new_spec_uri in specs_uris
+        ))
+    finally:
+        # Shutting down the executor waits for the running tasks, so it happens outside of the event loop
+        await loop.run_in_executor(None, executor_context.__exit__, None, None, None)
@@ -3,7 +3,14 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import functools
+import hashlib
+import mmap
+import threading
 import typing
+from collections import OrderedDict
+
+from six import text_type
 
 try:
     from functools import lru_cache as _lru_cache  # type: ignore # py>=3.2
@@ -36,3 +43,124 @@ class typed_lru_cache(object):
             assert self.uncached_function == fn  # pragma: no cover  # defensive approach, this should not happen
 
         return typing.cast(T, self.cached_function)
+
+
+def content_hash(*parts):
+    # type: (typing.Union[typing.Text, bytes, mmap.mmap]) -> typing.Text
+    """
+    Hash of the given parts, ie. of the URI and of the raw content of a spec.
+    Bytes-like parts (ie. memory mapped files) are hashed without copying them.
+    """
+    hasher = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, text_type):
+            part = part.encode('utf-8')
+        # Length prefixes prevent different parts from producing the same hashed bytes
+        hasher.update('{}:'.format(len(part)).encode('utf-8'))
+        hasher.update(part)
+    return hasher.hexdigest()
+
+
+class ContentHashCache(typing.Generic[T]):
+    """
+    Thread-safe LRU cache of values keyed by the hash of the content they are built from.
+
+    The cache is bounded by the total size of the contents of the cached values (`max_size`,
+    as proxy of the memory used by them) and, optionally, by the number of cached values
+    (`max_entries`). The most recently used value is always kept, even if it exceeds the bounds.
+    """
+
+    def __init__(self, max_size=None, max_entries=None):
+        # type: (typing.Optional[int], typing.Optional[int]) -> None
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()  # type: typing.MutableMapping[typing.Text, typing.Tuple[T, int]]
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _evict(self):
+        # type: () -> None
+        while len(self._values) > 1 and (
+            (self.max_size is not None and self._size > self.max_size) or
+            (self.max_entries is not None and len(self._values) > self.max_entries)
+        ):
+            _, (_, size) = self._values.popitem(last=False)  # type: ignore  # MutableMapping.popitem does not accept last
+            self._size -= size
+
+    def get_or_load(self, key, loader, size=0):
+        # type: (typing.Text, typing.Callable[[], T], int) -> T
+        """
+        Get the value cached with `key`, or load it via `loader` and cache it.
+
+        :param size: size of the content the value is built from
+        """
+        with self._lock:
+            cached = self._values.pop(key, None)
+            if cached is not None:
+                self.hits += 1
+                self._values[key] = cached
+                return cached[0]
+            self.misses += 1
+
+        # Loading happens outside of the lock, so slow loads do not block the other threads
+        value = loader()
+        with self._lock:
+            previous = self._values.pop(key, None)
+            if previous is not None:  # Concurrently loaded by another thread
+                self._size -= previous[1]
+            self._values[key] = (value, size)
+            self._size += size
+            self._evict()
+        return value
+
+    def invalidate(self, key=None):
+        # type: (typing.Optional[typing.Text]) -> None
+        """
+        Drop the value cached with `key`, or all the cached values if `key` is not provided.
+        """
+        with self._lock:
+            if key is None:
+                self._values.clear()
+                self._size = 0
+            elif key in self._values:
+                _, size = self._values.pop(key)
+                self._size -= size
+
+    def resize(self, max_size=None, max_entries=None):
+        # type: (typing.Optional[int], typing.Optional[int]) -> None
+        with self._lock:
+            self.max_size = max_size
+            self.max_entries = max_entries
+            self._evict()
+
+    def stats(self):
+        # type: () -> typing.Dict[typing.Text, int]
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._values), 'content_size': self._size}
+
+
+def typed_lifetime_cache(fn):
+    # type: (T) -> T
+    """
+    Cache the results of a single argument function for the lifetime of the argument.
+
+    The result is stored within the argument, so it is dropped together with it instead of being
+    kept alive (or evicted too early) by a module level cache. As a result, the results derived
+    from a spec follow the spec also when it is pickled (ie. sent to worker processes).
+    """
+    function = typing.cast(typing.Callable[[typing.Any], typing.Any], fn)
+    attribute_name = '_cached_{}_{}'.format(function.__module__, function.__name__).replace('.', '_')
+
+    @functools.wraps(function)
+    def cached_function(argument):
+        # type: (typing.Any) -> typing.Any
+        # __dict__ is accessed directly to not rely on the attributes resolution of the argument
+        try:
+            return argument.__dict__[attribute_name]
+        except KeyError:
+            result = argument.__dict__[attribute_name] = function(argument)
+            return result
+
+    return typing.cast(T, cached_function)
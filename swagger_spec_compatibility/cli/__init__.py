@@ -11,6 +11,10 @@ from six import iteritems
 from swagger_spec_compatibility.cli import explain
 from swagger_spec_compatibility.cli import info
 from swagger_spec_compatibility.cli import run
+from swagger_spec_compatibility.cli import run_batch
+from swagger_spec_compatibility.cli import run_chain
+from swagger_spec_compatibility.cli import run_matrix
+from swagger_spec_compatibility.cli import serve
 from swagger_spec_compatibility.util import wrap
 
 
@@ -18,6 +22,10 @@ _SUB_COMMAND_ASSOCIATED_FUNCTION_MAPPING = {
     explain.add_sub_parser: explain.execute,
     info.add_sub_parser: info.execute,
     run.add_sub_parser: run.execute,
+    run_batch.add_sub_parser: run_batch.execute,
+    run_chain.add_sub_parser: run_chain.execute,
+    run_matrix.add_sub_parser: run_matrix.execute,
+    serve.add_sub_parser: serve.execute,
 }
 
 
@@ -32,6 +40,9 @@ def parser():
             The tool provides the following level of results:
             - WARNING: the Swagger specs are technically compatible but the are likely to break known Swagger implementations
             - ERROR: new Swagger spec does introduce a breaking change respect the old implementation
+            - INCOMPLETE: the rule could not be fully evaluated as it exceeded the configured time or visited nodes budget
+
+            The exit code is 1 if ERROR or INCOMPLETE results are reported (any result with --strict), 0 otherwise.
         """),
         ),
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -15,13 +15,19 @@ from os.path import expanduser
 from os.path import expandvars
 
 import typing_extensions
+from six import iteritems
 from six.moves.urllib.parse import urljoin
 from six.moves.urllib.request import pathname2url
 from six.moves.urllib.request import url2pathname
 from venusian import Scanner
 
+from swagger_spec_compatibility.git import is_git_uri
+from swagger_spec_compatibility.rules import SpecsPairStatus
 from swagger_spec_compatibility.rules.common import BaseRule
+from swagger_spec_compatibility.rules.common import Level
+from swagger_spec_compatibility.rules.common import RuleProtocol
 from swagger_spec_compatibility.rules.common import RuleRegistry
+from swagger_spec_compatibility.rules.common import ValidationMessage
 
 
 _ENV_VARIABLE = str('CUSTOM_RULE_PACKAGES')
@@ -39,7 +45,7 @@ class CLIRulesProtocol(typing_extensions.Protocol):
 
 def uri(param):
     # type: (typing.Text) -> typing.Text
-    if len(param.split('://')) > 1:
+    if len(param.split('://')) > 1 or is_git_uri(param):
         return param
 
     path = expanduser(expandvars(url2pathname(param)))
@@ -49,6 +55,89 @@ def uri(param):
     raise ArgumentTypeError('`{param}` is not an existing file and either a valid URI'.format(param=param))
 
 
+def positive_integer(param):
+    # type: (typing.Text) -> int
+    try:
+        value = int(param)
+    except ValueError:
+        value = 0
+    if value <= 0:
+        raise ArgumentTypeError('`{param}` is not a positive integer'.format(param=param))
+    return value
+
+
+def positive_float(param):
+    # type: (typing.Text) -> float
+    try:
+        value = float(param)
+    except ValueError:
+        value = 0
+    if value <= 0:
+        raise ArgumentTypeError('`{param}` is not a positive number'.format(param=param))
+    return value
+
+
+def exit_code(reported_levels, strict):
+    # type: (typing.AbstractSet[Level], bool) -> int
+    if strict:
+        return 1 if reported_levels else 0
+    else:
+        # Incomplete rules could hide errors, so they fail as errors do
+        return 1 if Level.ERROR in reported_levels or Level.INCOMPLETE in reported_levels else 0
+
+
+def specs_pair_status_exit_code(specs_pair_status, strict):
+    # type: (SpecsPairStatus, bool) -> int
+    if specs_pair_status.status is None:
+        return 1
+    return exit_code(
+        reported_levels={
+            message.level
+            for _, messages in iteritems(specs_pair_status.status)
+            for message in messages
+        },
+        strict=strict,
+    )
+
+
+def messages_json(rules_to_messages_mapping):
+    # type: (typing.Mapping[typing.Type[RuleProtocol], typing.Iterable[ValidationMessage]]) -> typing.Dict[typing.Text, typing.Any]
+    """
+    JSON representation of the messages grouped by level, as reported by `run --json-output`.
+    """
+    messages_output = {}  # type: typing.Dict[typing.Text, typing.List[typing.Mapping[typing.Text, typing.Any]]]
+    for _, messages in iteritems(rules_to_messages_mapping):
+        for message in messages:
+            messages_output.setdefault(message.level.name, []).append(message.json_representation())
+    return messages_output
+
+
+def specs_pair_status_json(specs_pair_status):
+    # type: (SpecsPairStatus) -> typing.Dict[typing.Text, typing.Any]
+    json_output = {
+        'old_spec': specs_pair_status.old_spec_uri,
+        'new_spec': specs_pair_status.new_spec_uri,
+    }  # type: typing.Dict[typing.Text, typing.Any]
+    if specs_pair_status.status is None:
+        json_output['error'] = specs_pair_status.error
+    else:
+        json_output['messages'] = messages_json(specs_pair_status.status)
+    return json_output
+
+
+def print_specs_pair_status(specs_pair_status):
+    # type: (SpecsPairStatus) -> None
+    print('{} -> {}'.format(specs_pair_status.old_spec_uri, specs_pair_status.new_spec_uri))
+    if specs_pair_status.status is None:
+        print('\tFAILED: {}'.format(specs_pair_status.error))
+        return
+    for message in sorted(
+        (message for _, messages in iteritems(specs_pair_status.status) for message in messages),
+        key=lambda message: (-message.level, message.rule.error_code, message.reference),
+    ):
+        print('\t{}: {}'.format(message.level.name, message.string_representation()))
+
+
 def cli_rules():
     # type: () -> typing.List[typing.Text]
     return list(RuleRegistry.rule_names())
@@ -8,17 +8,29 @@ import json
 import sys
 import typing
 
+from bravado_core.spec import Spec
 from six import iteritems
 
+from swagger_spec_compatibility import http_cache
+from swagger_spec_compatibility import validation
 from swagger_spec_compatibility.cli.common import add_rules_arguments
 from swagger_spec_compatibility.cli.common import CLIProtocol
+from swagger_spec_compatibility.cli.common import exit_code
+from swagger_spec_compatibility.cli.common import positive_float
+from swagger_spec_compatibility.cli.common import positive_integer
 from swagger_spec_compatibility.cli.common import rules
 from swagger_spec_compatibility.cli.common import uri
+from swagger_spec_compatibility.disk_cache import SpecsDiskCache
+from swagger_spec_compatibility.executors import ExecutorType
+from swagger_spec_compatibility.interning import SpecsInterner
+from swagger_spec_compatibility.profiling import TIMINGS
 from swagger_spec_compatibility.rules import compatibility_status
+from swagger_spec_compatibility.rules import iter_compatibility_status
 from swagger_spec_compatibility.rules import ValidationMessage
 from swagger_spec_compatibility.rules.common import Level
 from swagger_spec_compatibility.rules.common import RuleProtocol
 from swagger_spec_compatibility.spec_utils import load_spec_from_uri
+from swagger_spec_compatibility.spec_utils import load_specs_concurrently
 
 
 class _Namespace(CLIProtocol):
@@ -28,6 +40,17 @@ class _Namespace(CLIProtocol):
     json_output = None  # type: bool
     old_spec = None  # type: typing.Text
     new_spec = None  # type: typing.Text
+    jobs = None  # type: typing.Optional[int]
+    stream = None  # type: bool
+    fail_fast = None  # type: bool
+    timeout = None  # type: typing.Optional[float]
+    max_visited_nodes = None  # type: typing.Optional[int]
+    cache_dir = None  # type: typing.Optional[typing.Text]
+    trusted_specs = None  # type: bool
+    load_executor = None  # type: typing.Text
+    lazy_dereferencing = None  # type: bool
+    intern_specs = None  # type: bool
+    profile = None  # type: bool
 
 
 def _extract_rules_with_given_message_level(
@@ -72,13 +95,76 @@ def _print_json_messages(messages_by_level):
     json.dump(json_output, sys.stdout)
 
 
+def _print_streamed_message(message, json_output):
+    # type: (ValidationMessage, bool) -> None
+    if json_output:
+        print(json.dumps(dict(message.json_representation(), level=message.level.name)))
+    else:
+        print('{}: {}'.format(message.level.name, message.string_representation()))
+    sys.stdout.flush()
+
+
+def _execute_streaming(cli_args, compatibility_status_kwargs):
+    # type: (_Namespace, typing.Mapping[typing.Text, typing.Any]) -> int
+    reported_levels = set()  # type: typing.Set[Level]
+    for _, message in iter_compatibility_status(**compatibility_status_kwargs):
+        reported_levels.add(message.level)
+        _print_streamed_message(message, cli_args.json_output)
+    return exit_code(reported_levels, cli_args.strict)
+
+
 def execute(cli_args):
     # type: (_Namespace) -> int
-    rules_to_messages_mapping = compatibility_status(
-        old_spec=load_spec_from_uri(cli_args.old_spec),
-        new_spec=load_spec_from_uri(cli_args.new_spec),
+    if not cli_args.cache_dir:
+        return _load_specs_and_execute(cli_args, load_spec_from_uri)
+
+    # The global caches persist their entries in the cache directory only while executing the command
+    previous_directories = validation.VALIDATION_CACHE.directory, http_cache.HTTP_CACHE.directory
+    validation.VALIDATION_CACHE.directory = http_cache.HTTP_CACHE.directory = cli_args.cache_dir
+    try:
+        return _load_specs_and_execute(cli_args, SpecsDiskCache(cli_args.cache_dir).load_spec)
+    finally:
+        validation.VALIDATION_CACHE.directory, http_cache.HTTP_CACHE.directory = previous_directories
+
+
+def _load_specs_and_execute(cli_args, load_spec):
+    # type: (_Namespace, typing.Callable[..., Spec]) -> int
+    TIMINGS.reset()
+    try:
+        with TIMINGS.measure('specs loading'):
+            old_spec, new_spec = load_specs_concurrently(
+                [cli_args.old_spec, cli_args.new_spec],
+                load_spec=load_spec,
+                executor=ExecutorType(cli_args.load_executor),
+                validate=not cli_args.trusted_specs,
+                interner=SpecsInterner() if cli_args.intern_specs else None,
+                lazy_dereferencing=cli_args.lazy_dereferencing,
+            )
+        with TIMINGS.measure('rules'):
+            return _execute(cli_args, old_spec, new_spec)
+    finally:
+        if cli_args.profile:
+            print(TIMINGS.report(), file=sys.stderr)
+
+
+def _execute(cli_args, old_spec, new_spec):
+    # type: (_Namespace, Spec, Spec) -> int
+    compatibility_status_kwargs = dict(
+        old_spec=old_spec,
+        new_spec=new_spec,
         rules=rules(cli_args),
-    )
+        executor=ExecutorType.SERIAL if cli_args.jobs == 1 else ExecutorType.PROCESS,
+        jobs=cli_args.jobs,
+        fail_fast=cli_args.fail_fast,
+        timeout=cli_args.timeout,
+        max_visited_nodes=cli_args.max_visited_nodes,
+        lazy_dereferencing=cli_args.lazy_dereferencing,
+    )  # type: typing.Dict[typing.Text, typing.Any]
+
+    if cli_args.stream:
+        return _execute_streaming(cli_args, compatibility_status_kwargs)
+
+    rules_to_messages_mapping = compatibility_status(**compatibility_status_kwargs)
 
     messages_by_level = {
         level: _extract_rules_with_given_message_level(rules_to_messages_mapping, level)
@@ -90,10 +176,10 @@ def execute(cli_args):
     else:
         _print_raw_messages(messages_by_level)
 
-    if cli_args.strict:
-        return 1 if any(messages_by_level.values()) else 0
-    else:
-        return 1 if any(messages_by_level[Level.ERROR]) else 0
+    return exit_code(
+        reported_levels={level for level, messages in iteritems(messages_by_level) if messages},
+        strict=cli_args.strict,
+    )
 
 
 def add_sub_parser(subparsers):
@@ -112,6 +198,77 @@ def add_sub_parser(subparsers):
         action='store_true',
         help='Return machine readable json output',
     )
+    run_detection_parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Report the messages as soon as they are detected, one per line. '
+             'With --json-output each line is a JSON object.',
+    )
+    run_detection_parser.add_argument(
+        '--fail-fast',
+        action='store_true',
+        help='Stop the detection as soon as an error is detected. '
+             'Only the messages detected until then are reported.',
+    )
+    run_detection_parser.add_argument(
+        '--timeout',
+        type=positive_float,
+        default=None,
+        help='Maximum time, in seconds, spent evaluating each rule. '
+             'Rules exceeding it are reported as INCOMPLETE.',
+    )
+    run_detection_parser.add_argument(
+        '--max-visited-nodes',
+        type=positive_integer,
+        default=None,
+        help='Maximum number of spec nodes visited by each walker. '
+             'Rules relying on walkers exceeding it are reported as INCOMPLETE.',
+    )
+    run_detection_parser.add_argument(
+        '-j', '--jobs',
+        type=positive_integer,
+        default=None,
+        help='Number of parallel workers used to run the rules. 1 runs the rules serially. '
+             '(default: number of CPUs available to the process)',
+    )
+    run_detection_parser.add_argument(
+        '--cache-dir',
+        default=None,
+        help='Directory where the loaded specs are cached across runs, keyed by their content. '
+             'Unmodified specs are restored from the cache instead of being parsed, validated and dereferenced again. '
+             'The documents fetched via HTTP(S) are revalidated via conditional requests, so unmodified ones are not downloaded again.',
+    )
+    run_detection_parser.add_argument(
+        '--trusted-specs',
+        action='store_true',
+        help='Skip the validation of the specs, for specs already validated (ie. released specs).',
+    )
+    run_detection_parser.add_argument(
+        '--load-executor',
+        choices=[executor_type.value for executor_type in ExecutorType],
+        default=ExecutorType.THREAD.value,
+        help='How the old and new specs are loaded concurrently: threads overlap fetching the specs, '
+             'processes overlap parsing and validating them as well. (default: %(default)s)',
+    )
+    run_detection_parser.add_argument(
+        '--lazy-dereferencing',
+        action='store_true',
+        help='Resolve the $refs of the specs while they are traversed, instead of dereferencing the whole specs up front. '
+             'Useful for specs with large sections not inspected by the rules (ie. unused definitions).',
+    )
+    run_detection_parser.add_argument(
+        '--intern-specs',
+        action='store_true',
+        help='Share the identical parts of the old and new specs, reducing the memory used by similar specs. '
+             'Combined with --lazy-dereferencing the rules skip the parts of the specs that did not change. '
+             'The parts of the specs are not shared if the specs are loaded by processes.',
+    )
+    run_detection_parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Report, on the standard error, the time spent loading the specs (and parsing and validating them) and running the rules. '
+             'The time is wall-clock time, the specs loaded concurrently are not accounted once per spec.',
+    )
     run_detection_parser.add_argument(
         'old_spec',
         type=uri,
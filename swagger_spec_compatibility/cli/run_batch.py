@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import json
+import sys
+import typing
+from argparse import ArgumentTypeError
+from itertools import chain
+
+from swagger_spec_compatibility.cli.common import add_rules_arguments
+from swagger_spec_compatibility.cli.common import CLIProtocol
+from swagger_spec_compatibility.cli.common import positive_float
+from swagger_spec_compatibility.cli.common import positive_integer
+from swagger_spec_compatibility.cli.common import rules
+from swagger_spec_compatibility.cli.common import specs_pair_status_exit_code
+from swagger_spec_compatibility.cli.common import specs_pair_status_json
+from swagger_spec_compatibility.cli.common import uri
+from swagger_spec_compatibility.executors import ExecutorType
+from swagger_spec_compatibility.rules import compatibility_status_many
+from swagger_spec_compatibility.rules import SpecsPairStatus
+
+
+class _Namespace(CLIProtocol):
+    blacklist_rules = None  # type: typing.Iterable[typing.Text]
+    rules = None  # type: typing.Iterable[typing.Text]
+    strict = None  # type: bool
+    manifest = None  # type: typing.TextIO
+    jobs = None  # type: typing.Optional[int]
+    timeout = None  # type: typing.Optional[float]
+    max_visited_nodes = None  # type: typing.Optional[int]
+
+
+def _read_manifest(manifest):
+    # type: (typing.Iterable[typing.Text]) -> typing.List[typing.Tuple[typing.Text, typing.Text]]
+    """
+    Extract the (old spec path/URI, new spec path/URI) pairs from the manifest.
+
+    Each line of the manifest contains the old and the new spec paths/URIs separated by whitespaces.
+    Empty lines and lines starting with # are ignored.
+    """
+    specs_uris = []
+    for line_number, line in enumerate(manifest, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        items = line.split()
+        if len(items) != 2:
+            raise ValueError('Line {}: expected "<old spec> <new spec>", found "{}"'.format(line_number, line))
+        specs_uris.append((items[0], items[1]))
+    return specs_uris
+
+
+def execute(cli_args):
+    # type: (_Namespace) -> int
+    try:
+        specs_uris = _read_manifest(cli_args.manifest)
+    except ValueError as e:
+        print('Invalid manifest. {}'.format(e), file=sys.stderr)
+        return 2
+
+    valid_specs_uris = []
+    invalid_specs_pairs_status = []
+    for old_spec, new_spec in specs_uris:
+        try:
+            valid_specs_uris.append((uri(old_spec), uri(new_spec)))
+        except ArgumentTypeError as e:
+            # Pairs referencing not existing files are reported without affecting the other pairs
+            invalid_specs_pairs_status.append(
+                SpecsPairStatus(old_spec_uri=old_spec, new_spec_uri=new_spec, status=None, error=str(e)),
+            )
+
+    result = 0
+    for specs_pair_status in chain(
+        invalid_specs_pairs_status,
+        compatibility_status_many(
+            specs_uris=valid_specs_uris,
+            rules=rules(cli_args),
+            executor=ExecutorType.SERIAL if cli_args.jobs == 1 else ExecutorType.PROCESS,
+            jobs=cli_args.jobs,
+            timeout=cli_args.timeout,
+            max_visited_nodes=cli_args.max_visited_nodes,
+        ),
+    ):
+        print(json.dumps(specs_pair_status_json(specs_pair_status), sort_keys=True))
+        sys.stdout.flush()
+        result = max(result, specs_pair_status_exit_code(specs_pair_status, cli_args.strict))
+    return result
+
+
+def add_sub_parser(subparsers):
+    # type: (argparse._SubParsersAction) -> argparse.ArgumentParser
+    run_batch_parser = subparsers.add_parser(
+        'run-batch',
+        help='run backward compatibility detection on many pairs of specs. '
+             'The results of each pair are reported as a JSON object per line',
+    )
+
+    add_rules_arguments(run_batch_parser)
+
+    run_batch_parser.add_argument(
+        '--strict',
+        action='store_true',
+        help='Convert warnings to errors',
+    )
+    run_batch_parser.add_argument(
+        '--timeout',
+        type=positive_float,
+        default=None,
+        help='Maximum time, in seconds, spent evaluating each rule. '
+             'Rules exceeding it are reported as INCOMPLETE.',
+    )
+    run_batch_parser.add_argument(
+        '--max-visited-nodes',
+        type=positive_integer,
+        default=None,
+        help='Maximum number of spec nodes visited by each walker. '
+             'Rules relying on walkers exceeding it are reported as INCOMPLETE.',
+    )
+    run_batch_parser.add_argument(
+        '-j', '--jobs',
+        type=positive_integer,
+        default=None,
+        help='Number of pairs of specs evaluated in parallel. 1 evaluates them serially. '
+             '(default: number of CPUs available to the process)',
+    )
+    run_batch_parser.add_argument(
+        'manifest',
+        type=argparse.FileType('r'),
+        help='Path of the manifest (- for standard input). Each line contains the paths/URIs of '
+             'the "old" and "new" versions of a Swagger spec separated by whitespaces. '
+             'Empty lines and lines starting with # are ignored.',
+    )
+    return run_batch_parser
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import json
+import sys
+import typing
+
+from swagger_spec_compatibility.cli.common import add_rules_arguments
+from swagger_spec_compatibility.cli.common import CLIProtocol
+from swagger_spec_compatibility.cli.common import positive_float
+from swagger_spec_compatibility.cli.common import positive_integer
+from swagger_spec_compatibility.cli.common import print_specs_pair_status
+from swagger_spec_compatibility.cli.common import rules
+from swagger_spec_compatibility.cli.common import specs_pair_status_exit_code
+from swagger_spec_compatibility.cli.common import specs_pair_status_json
+from swagger_spec_compatibility.cli.common import uri
+from swagger_spec_compatibility.executors import ExecutorType
+from swagger_spec_compatibility.rules import compatibility_status_chain
+
+
+class _Namespace(CLIProtocol):
+    blacklist_rules = None  # type: typing.Iterable[typing.Text]
+    rules = None  # type: typing.Iterable[typing.Text]
+    strict = None  # type: bool
+    json_output = None  # type: bool
+    specs = None  # type: typing.List[typing.Text]
+    jobs = None  # type: typing.Optional[int]
+    timeout = None  # type: typing.Optional[float]
+    max_visited_nodes = None  # type: typing.Optional[int]
+
+
+def execute(cli_args):
+    # type: (_Namespace) -> int
+    if len(cli_args.specs) < 2:
+        print('At least two specs are required', file=sys.stderr)
+        return 2
+
+    result = 0
+    for specs_pair_status in compatibility_status_chain(
+        specs_uris=cli_args.specs,
+        rules=rules(cli_args),
+        executor=ExecutorType.SERIAL if cli_args.jobs == 1 else ExecutorType.PROCESS,
+        jobs=cli_args.jobs,
+        timeout=cli_args.timeout,
+        max_visited_nodes=cli_args.max_visited_nodes,
+    ):
+        if cli_args.json_output:
+            print(json.dumps(specs_pair_status_json(specs_pair_status), sort_keys=True))
+        else:
+            print_specs_pair_status(specs_pair_status)
+        sys.stdout.flush()
+        result = max(result, specs_pair_status_exit_code(specs_pair_status, cli_args.strict))
+    return result
+
+
+def add_sub_parser(subparsers):
+    # type: (argparse._SubParsersAction) -> argparse.ArgumentParser
+    run_chain_parser = subparsers.add_parser(
+        'run-chain',
+        help='run backward compatibility detection on each transition of an ordered history of specs',
+    )
+
+    add_rules_arguments(run_chain_parser)
+
+    run_chain_parser.add_argument(
+        '--strict',
+        action='store_true',
+        help='Convert warnings to errors',
+    )
+    run_chain_parser.add_argument(
+        '--json-output',
+        action='store_true',
+        help='Return machine readable output, a JSON object per transition',
+    )
+    run_chain_parser.add_argument(
+        '--timeout',
+        type=positive_float,
+        default=None,
+        help='Maximum time, in seconds, spent evaluating each rule. '
+             'Rules exceeding it are reported as INCOMPLETE.',
+    )
+    run_chain_parser.add_argument(
+        '--max-visited-nodes',
+        type=positive_integer,
+        default=None,
+        help='Maximum number of spec nodes visited by each walker. '
+             'Rules relying on walkers exceeding it are reported as INCOMPLETE.',
+    )
+    run_chain_parser.add_argument(
+        '-j', '--jobs',
+        type=positive_integer,
+        default=None,
+        help='Number of parallel workers used to run the rules. 1 runs the rules serially. '
+             '(default: number of CPUs available to the process)',
+    )
+    run_chain_parser.add_argument(
+        'specs',
+        type=uri,
+        nargs='+',
+        help='Paths/URIs of the versions of the Swagger spec, from the oldest to the newest',
+    )
+    return run_chain_parser
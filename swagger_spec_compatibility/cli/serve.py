@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import json
+import os
+import socket
+import sys
+import typing
+from concurrent.futures import Executor
+
+from bravado_core.spec import Spec
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler
+from six.moves.BaseHTTPServer import HTTPServer
+from six.moves.socketserver import ThreadingMixIn
+
+from swagger_spec_compatibility.cache import content_hash
+from swagger_spec_compatibility.cache import ContentHashCache
+from swagger_spec_compatibility.cli.common import add_rules_arguments
+from swagger_spec_compatibility.cli.common import CLIProtocol
+from swagger_spec_compatibility.cli.common import messages_json
+from swagger_spec_compatibility.cli.common import positive_float
+from swagger_spec_compatibility.cli.common import positive_integer
+from swagger_spec_compatibility.cli.common import rules
+from swagger_spec_compatibility.executors import ExecutorType
+from swagger_spec_compatibility.executors import get_executor
+from swagger_spec_compatibility.rules import compatibility_status
+from swagger_spec_compatibility.rules import error_description
+from swagger_spec_compatibility.rules.common import BaseRule
+from swagger_spec_compatibility.rules.common import RuleRegistry
+from swagger_spec_compatibility.spec_utils import get_or_load_spec
+from swagger_spec_compatibility.spec_utils import load_spec_from_spec_dict
+from swagger_spec_compatibility.spec_utils import load_spec_from_uri
+
+
+class _Namespace(CLIProtocol):
+    blacklist_rules = None  # type: typing.Iterable[typing.Text]
+    rules = None  # type: typing.Iterable[typing.Text]
+    host = None  # type: typing.Text
+    allow_remote_clients = None  # type: bool
+    port = None  # type: int
+    unix_socket = None  # type: typing.Optional[typing.Text]
+    max_cached_specs = None  # type: int
+    jobs = None  # type: typing.Optional[int]
+    timeout = None  # type: typing.Optional[float]
+    max_visited_nodes = None  # type: typing.Optional[int]
+
+
+class _InvalidRequest(Exception):
+    pass
+
+
+class _SpecsCache(object):
+    """
+    Bounded LRU cache of the loaded specs keyed by the hash of their origin and content.
+
+    As specs are keyed by content, modified specs (or referenced documents) are loaded again even if
+    their URI is unchanged (check `get_or_load_spec`). The cached specs are identified by content
+    (check `spec_content_key`), so the warm workers receive them once across the requests.
+    """
+
+    def __init__(self, max_size):
+        # type: (int) -> None
+        self._specs = ContentHashCache(max_entries=max_size)  # type: ContentHashCache[Spec]
+
+    def spec_from_uri(self, uri):
+        # type: (typing.Text) -> Spec
+        return load_spec_from_uri(uri, specs_cache=self._specs)
+
+    def spec_from_spec_dict(self, spec_dict):
+        # type: (typing.Mapping[typing.Text, typing.Any]) -> Spec
+        content = json.dumps(spec_dict, sort_keys=True).encode('utf-8')
+        return get_or_load_spec(self._specs, content_hash('', content), lambda: load_spec_from_spec_dict(spec_dict), size=len(content))
+
+    def stats(self):
+        # type: () -> typing.Dict[typing.Text, int]
+        return self._specs.stats()
+
+
+class _CompatibilityServerMixin(ThreadingMixIn):
+    """
+    State shared by the requests: the rules, the warm executor and the specs cache.
+    """
+
+    daemon_threads = True
+    rules = None  # type: typing.Set[typing.Type[BaseRule]]
+    executor = None  # type: Executor
+    specs_cache = None  # type: _SpecsCache
+    timeout_per_rule = None  # type: typing.Optional[float]
+    max_visited_nodes = None  # type: typing.Optional[int]
+
+
+class _CompatibilityHTTPServer(_CompatibilityServerMixin, HTTPServer):
+    pass
+
+
+class _CompatibilityUnixHTTPServer(_CompatibilityServerMixin, HTTPServer):
+    address_family = getattr(socket, 'AF_UNIX', None)
+
+    def server_bind(self):
+        # type: () -> None
+        # HTTPServer.server_bind assumes a (host, port) address
+        self.socket.bind(self.server_address)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+
+class _CompatibilityRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handle the requests of the compatibility server.
+
+    ``POST /compatibility`` expects a JSON object with the old and the new spec, either as URI
+    (``old_spec_uri``, ``new_spec_uri``) or as inline JSON object (``old_spec``, ``new_spec``),
+    and optionally the list of ``rules`` names to apply. The response is the same JSON reported
+    by ``run --json-output``.
+
+    ``GET /health`` reports the specs cache statistics.
+
+    NOTE: the specs (and the documents they reference) are loaded from any URI supported by
+    `load_spec_from_uri`, local files and git revisions included. So the clients could read the
+    local files readable by the server, which listens only on loopback addresses by default.
+    """
+
+    server = None  # type: _CompatibilityServerMixin
+
+    def address_string(self):
+        # type: () -> str
+        # Unix socket clients have no address
+        return str(self.client_address[0] if self.client_address else 'unix-socket')
+
+    def log_message(self, format, *args):
+        # type: (str, typing.Any) -> None
+        pass  # Keep the standard error clean, as it would be too verbose for a pre-commit or IDE integration
+
+    def _send_json(self, status_code, body):
+        # type: (int, typing.Any) -> None
+        payload = json.dumps(body, sort_keys=True).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_request(self):
+        # type: () -> typing.Dict[typing.Text, typing.Any]
+        try:
+            content_length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(content_length).decode('utf-8'))
+        except ValueError as e:
+            raise _InvalidRequest('Invalid JSON body. {}'.format(e))
+        if not isinstance(request, dict):
+            raise _InvalidRequest('The body should be a JSON object')
+        return request
+
+    def _spec(self, request, name):
+        # type: (typing.Mapping[typing.Text, typing.Any], typing.Text) -> Spec
+        if '{}_uri'.format(name) in request:
+            return self.server.specs_cache.spec_from_uri(request['{}_uri'.format(name)])
+        elif isinstance(request.get(name), dict):
+            return self.server.specs_cache.spec_from_spec_dict(request[name])
+        else:
+            raise _InvalidRequest('Either {0}_uri or {0} (JSON object) should be provided'.format(name))
+
+    def _rules(self, request):
+        # type: (typing.Mapping[typing.Text, typing.Any]) -> typing.Set[typing.Type[BaseRule]]
+        if 'rules' not in request:
+            return self.server.rules
+        try:
+            request_rules = {RuleRegistry.rule(rule_name) for rule_name in request['rules']}
+        except (KeyError, TypeError):
+            request_rules = None
+        if request_rules is None or not request_rules.issubset(self.server.rules):
+            raise _InvalidRequest('rules should be a list of the served rules names')
+        return request_rules
+
+    def do_GET(self):
+        # type: () -> None
+        if self.path != '/health':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        self._send_json(200, {'status': 'ok', 'specs_cache': self.server.specs_cache.stats()})
+
+    def do_POST(self):
+        # type: () -> None
+        if self.path != '/compatibility':
+            self._send_json(404, {'error': 'Not found'})
+            return
+
+        try:
+            request = self._read_request()
+            request_rules = self._rules(request)
+            old_spec = self._spec(request, 'old_spec')
+            new_spec = self._spec(request, 'new_spec')
+        except _InvalidRequest as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            self._send_json(400, {'error': error_description(e)})
+            return
+
+        try:
+            rules_to_messages_mapping = compatibility_status(
+                old_spec=old_spec,
+                new_spec=new_spec,
+                rules=request_rules,
+                executor=self.server.executor,
+                timeout=self.server.timeout_per_rule,
+                max_visited_nodes=self.server.max_visited_nodes,
+            )
+        except Exception as e:
+            # The server keeps serving the other requests
+            self._send_json(500, {'error': error_description(e)})
+            return
+        self._send_json(200, messages_json(rules_to_messages_mapping))
+
+
+def _build_server(cli_args, executor):
+    # type: (_Namespace, Executor) -> _CompatibilityServerMixin
+    if cli_args.unix_socket:
+        if os.path.exists(cli_args.unix_socket):
+            os.unlink(cli_args.unix_socket)  # Left over by a previous, not gracefully terminated, server
+        server = _CompatibilityUnixHTTPServer(
+            cli_args.unix_socket, _CompatibilityRequestHandler,
+        )  # type: _CompatibilityServerMixin
+    else:
+        server = _CompatibilityHTTPServer((cli_args.host, cli_args.port), _CompatibilityRequestHandler)
+
+    server.rules = rules(cli_args)
+    server.executor = executor
+    server.specs_cache = _SpecsCache(max_size=cli_args.max_cached_specs)
+    server.timeout_per_rule = cli_args.timeout
+    server.max_visited_nodes = cli_args.max_visited_nodes
+    return server
+
+
+def _is_loopback_host(host):
+    # type: (typing.Text) -> bool
+    try:
+        addresses = {address_info[4][0] for address_info in socket.getaddrinfo(host, None)}
+    except socket.error:
+        return False
+    return bool(addresses) and all(address.startswith('127.') or address == '::1' for address in addresses)
+
+
+def execute(cli_args):
+    # type: (_Namespace) -> int
+    if not cli_args.unix_socket and not cli_args.allow_remote_clients and not _is_loopback_host(cli_args.host):
+        print(
+            'Listening on {} would allow remote clients to read the local files via the spec URIs. '
+            'Use --allow-remote-clients to listen on it anyway'.format(cli_args.host),
+            file=sys.stderr,
+        )
+        return 2
+    with get_executor(
+        ExecutorType.SERIAL if cli_args.jobs == 1 else ExecutorType.PROCESS,
+        jobs=cli_args.jobs,
+    ) as executor:
+        server = _build_server(cli_args, executor)
+        if cli_args.unix_socket:
+            print('Serving on unix socket {}'.format(cli_args.unix_socket))
+        else:
+            print('Serving on http://{}:{}'.format(*server.server_address[:2]))  # type: ignore
+        sys.stdout.flush()
+
+        try:
+            server.serve_forever()  # type: ignore
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()  # type: ignore
+            if cli_args.unix_socket and os.path.exists(cli_args.unix_socket):
+                os.unlink(cli_args.unix_socket)
+    return 0
+
+
+def add_sub_parser(subparsers):
+    # type: (argparse._SubParsersAction) -> argparse.ArgumentParser
+    serve_parser = subparsers.add_parser(
+        'serve',
+        help='run a local server keeping rules, workers and specs warm across compatibility requests',
+    )
+
+    add_rules_arguments(serve_parser)
+
+    address_group = serve_parser.add_mutually_exclusive_group()
+    address_group.add_argument(
+        '--port',
+        type=int,
+        default=8023,
+        help='Port to listen on, 0 picks a free port. (default: %(default)s)',
+    )
+    address_group.add_argument(
+        '--unix-socket',
+        default=None,
+        help='Path of the Unix socket to listen on, instead of a TCP port',
+    )
+    serve_parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help='Address to listen on. (default: %(default)s)',
+    )
+    serve_parser.add_argument(
+        '--allow-remote-clients',
+        action='store_true',
+        default=False,
+        help='Allow to listen on non loopback addresses. NOTE: the clients could read any local file readable '
+             'by the server, as the specs (and the documents they reference) could be loaded from file: and git: URIs.',
+    )
+    serve_parser.add_argument(
+        '--max-cached-specs',
+        type=positive_integer,
+        default=16,
+        help='Maximum number of loaded specs kept in memory. (default: %(default)s)',
+    )
+    serve_parser.add_argument(
+        '--timeout',
+        type=positive_float,
+        default=None,
+        help='Maximum time, in seconds, spent evaluating each rule. '
+             'Rules exceeding it are reported as INCOMPLETE.',
+    )
+    serve_parser.add_argument(
+        '--max-visited-nodes',
+        type=positive_integer,
+        default=None,
+        help='Maximum number of spec nodes visited by each walker. '
+             'Rules relying on walkers exceeding it are reported as INCOMPLETE.',
+    )
+    serve_parser.add_argument(
+        '-j', '--jobs',
+        type=positive_integer,
+        default=None,
+        help='Number of parallel workers used to run the rules. 1 runs the rules serially. '
+             '(default: number of CPUs available to the process)',
+    )
+    return serve_parser
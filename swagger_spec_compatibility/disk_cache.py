@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import logging
+import os
+import pickle
+import tempfile
+import typing
+
+import pkg_resources
+from bravado_core import version as bravado_core_version
+from bravado_core.spec import Spec
+
+from swagger_spec_compatibility import validation
+from swagger_spec_compatibility.cache import content_hash
+from swagger_spec_compatibility.interning import SpecsInterner
+from swagger_spec_compatibility.spec_utils import load_spec_from_content
+from swagger_spec_compatibility.spec_utils import read_spec_content
+from swagger_spec_compatibility.validation import referenced_uris
+
+
+log = logging.getLogger(__name__)
+
+_PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+
+def _versions():
+    # type: () -> typing.Text
+    """
+    Versions of the libraries defining the format of the cached specs.
+    """
+    return 'swagger-spec-compatibility={};bravado-core={};pickle-protocol={}'.format(
+        pkg_resources.get_distribution('swagger-spec-compatibility').version,
+        bravado_core_version,
+        _PICKLE_PROTOCOL,
+    )
+
+
+class SpecsDiskCache(object):
+    """
+    Persistent cache of the loaded specs, ie. parsed, validated and dereferenced.
+
+    The specs are keyed by the hash of their URI, their content, their loading mode, the content of the
+    documents they reference and the versions of the libraries involved in loading them. Modified specs (or
+    referenced documents) are then loaded again, while unmodified specs are restored from the
+    cached state, skipping parsing, validation and dereferencing.
+
+    Each spec is stored as two files in the cache directory:
+
+    * ``<spec key>.references.json``: the URIs of the documents referenced by the spec
+    * ``<entry key>.spec.pickle``: the pickled spec state, where the entry key depends on the
+      spec key and on the content of the referenced documents
+
+    NOTE: the cache directory is trusted, as restoring the specs unpickles its content.
+    """
+
+    def __init__(self, directory):
+        # type: (typing.Text) -> None
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key, suffix):
+        # type: (typing.Text, typing.Text) -> typing.Text
+        return os.path.join(self.directory, '{}.{}'.format(key, suffix))
+
+    def _write(self, path, content):
+        # type: (typing.Text, bytes) -> None
+        # Files are renamed in place once written, so concurrent processes never read partial files
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.rename(tmp_path, path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+
+    def _entry_key(self, spec_key, references):
+        # type: (typing.Text, typing.Iterable[typing.Text]) -> typing.Text
+        return content_hash(
+            spec_key,
+            *(
+                part
+                for reference in references
+                for part in (reference, read_spec_content(reference))
+            )
+        )
+
+    def _restore(self, spec_key):
+        # type: (typing.Text) -> typing.Optional[Spec]
+        try:
+            with open(self._path(spec_key, 'references.json'), 'rb') as f:
+                references = json.loads(f.read().decode('utf-8'))
+            with open(self._path(self._entry_key(spec_key, references), 'spec.pickle'), 'rb') as f:
+                return typing.cast(Spec, pickle.load(f))
+        except Exception:
+            # Not cached, referenced documents not available anymore or corrupted entry
+            return None
+
+    def _store(self, spec_key, spec, references):
+        # type: (typing.Text, Spec, typing.List[typing.Text]) -> None
+        try:
+            # Pickling the spec before writing anything avoids entries without the spec state
+            spec_state = pickle.dumps(spec, protocol=_PICKLE_PROTOCOL)
+            self._write(self._path(self._entry_key(spec_key, references), 'spec.pickle'), spec_state)
+            self._write(self._path(spec_key, 'references.json'), json.dumps(references).encode('utf-8'))
+        except Exception as e:  # Caching is best effort, the spec is loaded anyway
+            log.warning('Failed to cache %s: %s', spec.origin_url, e)
+
+    def load_spec(self, uri, validate=True, interner=None, lazy_dereferencing=False):
+        # type: (typing.Text, bool, typing.Optional[SpecsInterner], bool) -> Spec
+        """
+        Load the spec from the cache, if its cached state is still valid, or from its URI.
+
+        :param validate: False skips the validation of the spec, meant for trusted (ie. already validated) specs
+        :param interner: interner sharing the identical subtrees of the specs loaded with it (check `SpecsInterner`).
+            NOTE: the specs restored from the cache do not share their subtrees with the other specs.
+        :param lazy_dereferencing: build the operations from the lazily dereferenced spec (check `lazily_dereferenced_spec`).
+            The lazily dereferenced specs are stored without dereferencing them, so they are stored only if validated:
+            the documents they reference are known from the validation, while trusted specs would need the dereferencing.
+        """
+        content = read_spec_content(uri)
+        spec_key = content_hash(
+            _versions(), uri, content, 'validated' if validate else 'trusted', 'lazy' if lazy_dereferencing else 'eager',
+        )
+
+        spec = self._restore(spec_key)
+        if spec is not None:
+            self.hits += 1
+            return spec
+
+        self.misses += 1
+        spec = load_spec_from_content(
+            content, origin_url=uri, validate=validate, interner=interner, lazy_dereferencing=lazy_dereferencing,
+        )
+        if not lazy_dereferencing:
+            # Dereferencing is lazy, it is forced here to store it with the spec
+            spec.deref_flattened_spec
+            self._store(spec_key, spec, referenced_uris(spec))
+        elif validate:
+            # The documents not resolved yet are known from the validation (or from the validation cache, if not validated)
+            validation_key = getattr(spec, 'validation_key', None)
+            validated_references = None if validation_key is None else validation.VALIDATION_CACHE.references(validation_key)
+            self._store(spec_key, spec, sorted(set(referenced_uris(spec)).union(validated_references or ())))
+        return spec
+
+    def clear(self):
+        # type: () -> None
+        if not os.path.isdir(self.directory):
+            return
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(('.references.json', '.spec.pickle', '.tmp')):
+                os.unlink(os.path.join(self.directory, file_name))
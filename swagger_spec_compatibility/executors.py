@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import math
+import multiprocessing
+import os
+import typing
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from enum import Enum
+
+
+T = typing.TypeVar('T')
+
+_CGROUP_V2_CPU_MAX = '/sys/fs/cgroup/cpu.max'
+_CGROUP_V1_CPU_QUOTA = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+_CGROUP_V1_CPU_PERIOD = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+
+
+class ExecutorType(Enum):
+    SERIAL = 'serial'
+    THREAD = 'thread'
+    PROCESS = 'process'
+
+
+class SerialExecutor(Executor):
+    """
+    Executor that runs the submitted callables synchronously in the calling thread.
+    """
+
+    def submit(self, fn, *args, **kwargs):  # type: ignore  # signature differs between python versions
+        # type: (typing.Callable[..., T], typing.Any, typing.Any) -> Future[T]
+        future = Future()  # type: Future[T]
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def is_in_process_executor(executor):
+    # type: (Executor) -> bool
+    """
+    Determine if the executor runs the submitted callables in the current process.
+
+    Arguments of callables submitted to other executors have to be serialized.
+    """
+    return isinstance(executor, (SerialExecutor, ThreadPoolExecutor))
+
+
+def _read_file(path):
+    # type: (typing.Text) -> typing.Optional[typing.Text]
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except (IOError, OSError):
+        return None
+
+
+def _cgroup_cpu_quota():
+    # type: () -> typing.Optional[float]
+    """
+    Extract the CPU quota (in number of CPUs) enforced by cgroups, if any.
+    """
+    cpu_max = _read_file(_CGROUP_V2_CPU_MAX)
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(' ')
+    else:
+        quota, period = _read_file(_CGROUP_V1_CPU_QUOTA) or '-1', _read_file(_CGROUP_V1_CPU_PERIOD) or '0'
+
+    try:
+        quota_us, period_us = int(quota), int(period)
+    except ValueError:  # cgroup v2 reports `max` if no quota is defined
+        return None
+
+    if quota_us <= 0 or period_us <= 0:
+        return None
+    return float(quota_us) / period_us
+
+
+def available_cpus():
+    # type: () -> int
+    """
+    Number of CPUs actually available to the current process.
+
+    The CPU affinity of the process and the cgroups CPU quota (ie. in containers) are taken into account.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))  # type: ignore  # not available on all the platforms
+    except AttributeError:
+        cpus = multiprocessing.cpu_count()
+
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, int(math.ceil(quota)))
+    return max(1, cpus)
+
+
+def shutdown_now(executor):
+    # type: (Executor) -> None
+    """
+    Shut down an executor created by `get_executor` without waiting for the callables still running.
+
+    The callables running in worker processes could not be interrupted, so the workers of process pools
+    are terminated. The callables running in threads are expected to be stopped by the caller.
+    """
+    processes = getattr(executor, '_processes', None) or ()
+    # Processes are tracked by pid on python3 and as a set on python2
+    workers = list(processes.values() if isinstance(processes, dict) else processes)
+    executor.shutdown(wait=False)
+    for worker in workers:
+        worker.terminate()
+
+
+@contextmanager
+def get_executor(
+    executor,  # type: typing.Union[ExecutorType, Executor]
+    jobs=None,  # type: typing.Optional[int]
+    initializer=None,  # type: typing.Optional[typing.Callable[..., None]]
+    initargs=(),  # type: typing.Tuple[typing.Any, ...]
+):
+    # type: (...) -> typing.Generator[Executor, None, None]
+    """
+    Provide the executor to use for running the rules.
+
+    Caller supplied executors are provided as they are and are not shut down, this allows the
+    caller to keep workers warm across multiple calls. Otherwise a new executor, with `jobs`
+    workers (default: number of available CPUs), is created and shut down at the end of the context.
+
+    `initializer(*initargs)` is called once by each worker process of newly created process pools.
+    Newly created executors could be stopped earlier via `shutdown_now`.
+    """
+    if isinstance(executor, Executor):
+        yield executor
+        return
+
+    max_workers = jobs or available_cpus()
+    if executor is ExecutorType.SERIAL:
+        new_executor = SerialExecutor()  # type: Executor
+    elif executor is ExecutorType.THREAD:
+        new_executor = ThreadPoolExecutor(max_workers=max_workers)
+    elif executor is ExecutorType.PROCESS:
+        new_executor = ProcessPoolExecutor(max_workers=max_workers, initializer=initializer, initargs=initargs)
+    else:
+        raise ValueError('Unsupported executor: {}'.format(executor))
+
+    try:
+        yield new_executor
+    finally:
+        new_executor.shutdown(wait=True)
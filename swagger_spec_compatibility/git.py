@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import atexit
+import os
+import posixpath
+import subprocess
+import threading
+import typing
+
+from bravado_core.spec import Spec
+from bravado_core.spec_flattening import flattened_spec
+from bravado_core.spec_flattening import MARSHAL_REPLACEMENT_PATTERNS
+from bravado_core.util import cached_property
+from bravado_core.util import strip_xscope
+from six import iteritems
+from six import string_types
+from six.moves.urllib.parse import ParseResult
+from six.moves.urllib.parse import urldefrag
+from six.moves.urllib.parse import urlparse
+from six.moves.urllib.parse import urlunparse
+
+from swagger_spec_compatibility.cache import content_hash
+from swagger_spec_compatibility.lightweight_spec import LightweightSpec
+from swagger_spec_compatibility.reference_documents import parse_reference_document
+from swagger_spec_compatibility.reference_documents import REFERENCE_DOCUMENTS_CACHE
+
+
+GIT_SCHEME = 'git'
+
+
+class GitError(Exception):
+    pass
+
+
+class GitCatFile(object):
+    """
+    Read objects of a git repository via a single persistent ``git cat-file --batch`` process.
+
+    The process is started on the first read and it is restarted if it dies or if the object is
+    used by a different process (ie. by a worker forked after the process has been started).
+    """
+
+    def __init__(self, repository_path):
+        # type: (typing.Text) -> None
+        self.repository_path = repository_path
+        self._process = None  # type: typing.Optional[subprocess.Popen]
+        self._process_owner_pid = None  # type: typing.Optional[int]
+        self._lock = threading.Lock()
+
+    def _get_process(self):
+        # type: () -> subprocess.Popen
+        if self._process is None or self._process.poll() is not None or self._process_owner_pid != os.getpid():
+            self._process = subprocess.Popen(
+                ['git', 'cat-file', '--batch'],
+                cwd=self.repository_path,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+            self._process_owner_pid = os.getpid()
+        return self._process
+
+    def read(self, object_name):
+        # type: (typing.Text) -> typing.Tuple[typing.Text, bytes]
+        """
+        Read the object identified by `object_name` (ie. ``<rev>:<path>``).
+
+        :return: the object hash and its content
+        :raises GitError: if the object does not exist
+        """
+        if '\n' in object_name:
+            raise GitError('Invalid object name {!r}'.format(object_name))
+        with self._lock:
+            process = self._get_process()
+            process.stdin.write(object_name.encode('utf-8') + b'\n')
+            process.stdin.flush()
+            header = process.stdout.readline().decode('utf-8').split()
+            if len(header) != 3:
+                raise GitError('{} does not exist in {}'.format(object_name, self.repository_path))
+            object_hash, _, size = header
+            content = process.stdout.read(int(size))
+            process.stdout.read(1)  # Objects content is terminated by a new line
+            return object_hash, content
+
+    def close(self):
+        # type: () -> None
+        with self._lock:
+            if self._process is not None and self._process_owner_pid == os.getpid():
+                self._process.stdin.close()
+                self._process.wait()
+            self._process = None
+
+
+_CAT_FILES = {}  # type: typing.Dict[typing.Text, GitCatFile]
+_CAT_FILES_LOCK = threading.Lock()
+
+
+_REPOSITORY_PATHS = {}  # type: typing.Dict[typing.Text, typing.Text]
+
+
+def _repository_path(path):
+    # type: (typing.Text) -> typing.Text
+    if path not in _REPOSITORY_PATHS:
+        try:
+            _REPOSITORY_PATHS[path] = subprocess.check_output(
+                ['git', 'rev-parse', '--show-toplevel'], cwd=path, stderr=subprocess.STDOUT,
+            ).decode('utf-8').strip()
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise GitError('{} is not within a git repository. {}'.format(path, e))
+    return _REPOSITORY_PATHS[path]
+
+
+def get_cat_file(path=None):
+    # type: (typing.Optional[typing.Text]) -> GitCatFile
+    """
+    Get the (shared) ``git cat-file`` reader of the repository containing `path` (default: current working directory).
+    """
+    repository_path = _repository_path(path or os.getcwd())
+    with _CAT_FILES_LOCK:
+        if repository_path not in _CAT_FILES:
+            _CAT_FILES[repository_path] = GitCatFile(repository_path)
+        return _CAT_FILES[repository_path]
+
+
+@atexit.register
+def _close_cat_files():
+    # type: () -> None
+    with _CAT_FILES_LOCK:
+        for cat_file in _CAT_FILES.values():
+            cat_file.close()
+        _CAT_FILES.clear()
+
+
+def is_git_uri(uri):
+    # type: (typing.Text) -> bool
+    return uri.startswith('{}:'.format(GIT_SCHEME))
+
+
+def resolve_git_uri(uri):
+    # type: (typing.Text) -> typing.Text
+    """
+    Convert a ``git:<rev>:<path>`` URI into its canonical form ``git://<commit hash>/<path>``.
+
+    The path is relative to the root of the repository containing the current working directory.
+    The canonical form is stable even if the revision is a moving reference (ie. a branch) and allows
+    relative $refs to be resolved within the same revision.
+    """
+    if uri.startswith('{}://'.format(GIT_SCHEME)):
+        return uri
+    revision, separator, path = uri[len(GIT_SCHEME) + 1:].partition(':')
+    if not revision or not separator or not path:
+        raise GitError('{} is not a valid git URI, expected git:<rev>:<path>'.format(uri))
+    commit_hash, _ = get_cat_file().read('{}^{{commit}}'.format(revision))
+    return '{}://{}/{}'.format(GIT_SCHEME, commit_hash, path.lstrip('/'))
+
+
+def read_git_uri(uri):
+    # type: (typing.Text) -> bytes
+    """
+    Read the content of the file referenced by a git URI (ignoring the fragment, if any).
+    """
+    parsed_uri = urlparse(urldefrag(resolve_git_uri(uri))[0])
+    _, content = get_cat_file().read('{}:{}'.format(parsed_uri.netloc, parsed_uri.path.lstrip('/')))
+    return content
+
+
+def join_git_uri(base_uri, reference):
+    # type: (typing.Text, typing.Text) -> typing.Text
+    """
+    Resolve the $ref `reference` relatively to the canonical git URI `base_uri`, within the same revision.
+
+    urljoin (used by jsonschema to resolve the $refs) resolves relative references only for the schemes
+    it knows about, so the references of the git documents are resolved explicitly.
+    """
+    if urlparse(reference).scheme:
+        return reference
+    base_uri = base_uri.partition('#')[0]
+    if reference.startswith('#'):
+        return base_uri + reference
+    path, _, fragment = reference.partition('#')
+    parsed_base_uri = urlparse(base_uri)
+    path = posixpath.normpath(posixpath.join(posixpath.dirname(parsed_base_uri.path), path))
+    return urlunparse((GIT_SCHEME, parsed_base_uri.netloc, path, '', '', fragment))
+
+
+def absolute_references(node, base_uri, local_references=True):
+    # type: (typing.Any, typing.Text, bool) -> typing.Any
+    """
+    Make the relative $refs of node absolute, resolving them relatively to the git URI `base_uri`.
+
+    Node is not modified: the containers with references to update are copied, while the others are returned as they are.
+
+    :param local_references: False keeps the local references (ie. ``#/definitions/Model``) as they are
+    """
+    if isinstance(node, dict):
+        updates = {}  # type: typing.Dict[typing.Text, typing.Any]
+        for key, value in iteritems(node):
+            if key == '$ref' and isinstance(value, string_types):
+                if local_references or not value.startswith('#'):
+                    reference = join_git_uri(base_uri, value)
+                    if reference != value:
+                        updates[key] = reference
+            else:
+                updated_value = absolute_references(value, base_uri, local_references)
+                if updated_value is not value:
+                    updates[key] = updated_value
+        if not updates:
+            return node
+        updated_node = dict(node)
+        updated_node.update(updates)
+        return updated_node
+    elif isinstance(node, list):
+        items = [absolute_references(item, base_uri, local_references) for item in node]
+        return node if all(item is original for item, original in zip(items, node)) else items
+    return node
+
+
+def _git_ref_handler(uri):
+    # type: (typing.Text) -> typing.Any
+    uri = resolve_git_uri(uri).partition('#')[0]
+    content = read_git_uri(uri)
+    # The documents are cached with their references already resolved (ie. not as load_reference_document does)
+    return REFERENCE_DOCUMENTS_CACHE.get_or_load(
+        content_hash(GIT_SCHEME, uri, content),
+        lambda: absolute_references(parse_reference_document(uri, content), uri),
+        size=len(content),
+    )
+
+
+def _marshal_git_uri(target_uri, origin_uri):
+    # type: (ParseResult, typing.Optional[ParseResult]) -> typing.Text
+    """
+    Marshal the URIs referenced by specs loaded from git into model names (check
+    ``bravado_core.spec_flattening.flattened_spec``).
+
+    Similarly to local files, the files of the revision of the root spec file are named relatively to it,
+    so the names do not depend on the revision.
+    """
+    if not target_uri.scheme and not target_uri.path and origin_uri is not None:
+        # Local references of the root spec file, kept relative by jsonschema as urljoin does not know git URIs
+        target_uri = origin_uri._replace(fragment=target_uri.fragment)
+
+    scheme, netloc, path = target_uri.scheme, target_uri.netloc, target_uri.path
+    if scheme == GIT_SCHEME:
+        scheme = 'l{}'.format(GIT_SCHEME)
+        if origin_uri and origin_uri.scheme == GIT_SCHEME and origin_uri.netloc == target_uri.netloc:
+            netloc, path = '', posixpath.relpath(target_uri.path, posixpath.dirname(origin_uri.path))
+    marshalled_target = urlunparse((scheme, netloc, path, target_uri.params, target_uri.query, target_uri.fragment))
+    for src, dst in iteritems(MARSHAL_REPLACEMENT_PATTERNS):
+        marshalled_target = marshalled_target.replace(src, dst)
+    return marshalled_target
+
+
+class GitSpec(LightweightSpec):
+    """
+    Spec whose $refs could be resolved from git URIs, ie. the files of the revision of the spec.
+
+    The relative $refs of the spec (and of the git documents it references) are made absolute while
+    loading them (check `absolute_references`), as urljoin does not resolve relative git URIs.
+    """
+
+    @classmethod
+    def from_dict(cls, spec_dict, origin_url=None, http_client=None, config=None):
+        # type: (typing.Mapping[typing.Text, typing.Any], typing.Optional[typing.Text], typing.Any, typing.Any) -> Spec
+        if origin_url is not None:
+            # Local references are resolved by jsonschema anyway, they are kept so the specs of different
+            # revisions stay equal if they did not change
+            spec_dict = absolute_references(spec_dict, origin_url, local_references=False)
+        return super(GitSpec, cls).from_dict(spec_dict, origin_url=origin_url, http_client=http_client, config=config)
+
+    def get_ref_handlers(self):
+        # type: () -> typing.Dict[typing.Text, typing.Callable[[typing.Text], typing.Any]]
+        handlers = super(GitSpec, self).get_ref_handlers()
+        handlers[GIT_SCHEME] = _git_ref_handler
+        return handlers
+
+    def read_reference(self, uri):
+        # type: (typing.Text) -> bytes
+        if is_git_uri(uri):
+            return read_git_uri(uri)
+        return super(GitSpec, self).read_reference(uri)
+
+    @cached_property
+    def flattened_spec(self):
+        # type: () -> typing.Mapping[typing.Text, typing.Any]
+        return strip_xscope(
+            spec_dict=flattened_spec(swagger_spec=self, marshal_uri_function=_marshal_git_uri),
+        )
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import typing
+
+import requests
+from requests.adapters import HTTPAdapter
+from six import iteritems
+from six import string_types
+from six.moves.urllib.parse import urljoin
+from six.moves.urllib.parse import urlparse
+
+from swagger_spec_compatibility.cache import content_hash
+from swagger_spec_compatibility.executors import ExecutorType
+from swagger_spec_compatibility.executors import get_executor
+from swagger_spec_compatibility.reference_documents import load_reference_document
+
+
+log = logging.getLogger(__name__)
+
+HTTP_SCHEMES = ('http', 'https')
+# Connections kept open per host, it bounds the concurrent fetches as well
+_POOL_SIZE = 16
+
+
+def is_http_uri(uri):
+    # type: (typing.Text) -> bool
+    return urlparse(uri).scheme in HTTP_SCHEMES
+
+
+HTTPDocument = typing.NamedTuple(
+    'HTTPDocument', (
+        ('content', bytes),
+        ('content_type', typing.Text),
+    ),
+)
+
+
+class HTTPCache(object):
+    """
+    Fetch documents over HTTP(S) via a pool of persistent connections, shared by all the fetches
+    of the process (ie. the old and new spec and the documents they reference).
+
+    If `directory` is provided the fetched documents are stored in it, together with their
+    ``ETag`` and ``Last-Modified`` headers, and they are revalidated via conditional requests,
+    so unmodified documents are not downloaded again (the server replies ``304 Not Modified``).
+
+    Each document is stored in the cache directory as ``<URI hash>.http``: the JSON encoded
+    response headers, a new line and the content of the document.
+    """
+
+    def __init__(self, directory=None, timeout=30.0):
+        # type: (typing.Optional[typing.Text], typing.Optional[float]) -> None
+        self.directory = directory
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._session = None  # type: typing.Optional[requests.Session]
+        self._session_owner_pid = None  # type: typing.Optional[int]
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        # type: () -> requests.Session
+        # Connections could not be shared with forked processes, so each process gets its own session
+        with self._lock:
+            if self._session is None or self._session_owner_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=_POOL_SIZE, pool_maxsize=_POOL_SIZE)
+                for scheme in HTTP_SCHEMES:
+                    session.mount('{}://'.format(scheme), adapter)
+                self._session, self._session_owner_pid = session, os.getpid()
+            return self._session
+
+    def _path(self, uri):
+        # type: (typing.Text) -> typing.Text
+        return os.path.join(typing.cast(typing.Text, self.directory), '{}.http'.format(content_hash(uri)))
+
+    def _read_entry(self, uri):
+        # type: (typing.Text) -> typing.Optional[typing.Tuple[typing.Dict[typing.Text, typing.Text], bytes]]
+        try:
+            with open(self._path(uri), 'rb') as f:
+                headers, _, content = f.read().partition(b'\n')
+            return json.loads(headers.decode('utf-8')), content
+        except Exception:
+            # Not cached or corrupted entry
+            return None
+
+    def _write_entry(self, uri, headers, content):
+        # type: (typing.Text, typing.Dict[typing.Text, typing.Text], bytes) -> None
+        # Files are renamed in place once written, so concurrent processes never read partial files
+        try:
+            if not os.path.isdir(typing.cast(typing.Text, self.directory)):
+                os.makedirs(typing.cast(typing.Text, self.directory))
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(json.dumps(headers).encode('utf-8') + b'\n' + content)
+                os.rename(tmp_path, self._path(uri))
+            except OSError:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:  # Caching is best effort, the document is fetched again on the next run
+            log.warning('Failed to cache %s: %s', uri, e)
+
+    def get(self, uri):
+        # type: (typing.Text) -> HTTPDocument
+        """
+        Fetch the document referenced by uri (ignoring the fragment, if any).
+
+        :raises requests.RequestException: if the document could not be fetched
+        """
+        uri = uri.partition('#')[0]
+        entry = self._read_entry(uri) if self.directory is not None else None
+        request_headers = {}
+        if entry is not None:
+            if 'ETag' in entry[0]:
+                request_headers['If-None-Match'] = entry[0]['ETag']
+            if 'Last-Modified' in entry[0]:
+                request_headers['If-Modified-Since'] = entry[0]['Last-Modified']
+
+        response = self.session.get(uri, headers=request_headers, timeout=self.timeout)
+        if entry is not None and response.status_code == requests.codes.not_modified:
+            self.hits += 1
+            headers, content = entry
+        else:
+            response.raise_for_status()
+            self.misses += 1
+            headers = {
+                header: response.headers[header]
+                for header in ('Content-Type', 'ETag', 'Last-Modified')
+                if header in response.headers
+            }
+            content = response.content
+            # Documents without validators could not be revalidated, so they are not cached
+            if self.directory is not None and ('ETag' in headers or 'Last-Modified' in headers):
+                self._write_entry(uri, headers, content)
+        return HTTPDocument(content=content, content_type=headers.get('Content-Type', ''))
+
+    def clear(self):
+        # type: () -> None
+        if self.directory is None or not os.path.isdir(self.directory):
+            return
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith('.http'):
+                os.unlink(os.path.join(self.directory, file_name))
+
+
+# HTTP client used while loading the specs, the responses are not persisted by default
+HTTP_CACHE = HTTPCache()
+
+
+def read_http_uri(uri):
+    # type: (typing.Text) -> bytes
+    """
+    Read the content of the document referenced by an HTTP(S) URI via ``HTTP_CACHE``.
+    """
+    return HTTP_CACHE.get(uri).content
+
+
+def load_http_document(uri):
+    # type: (typing.Text) -> typing.Any
+    """
+    Fetch and parse (as YAML or JSON, as bravado-core does) the document referenced by an HTTP(S) URI.
+    The parsed documents are shared via ``reference_documents.REFERENCE_DOCUMENTS_CACHE``.
+    """
+    document = HTTP_CACHE.get(uri)
+    return load_reference_document(uri, document.content, document.content_type)
+
+
+def _iter_referenced_http_uris(node, base_uri):
+    # type: (typing.Any, typing.Text) -> typing.Iterator[typing.Text]
+    """
+    Iterate over the URIs (without fragment) of the HTTP(S) documents referenced by node.
+    """
+    if isinstance(node, dict):
+        reference = node.get('$ref')
+        if isinstance(reference, string_types) and not reference.startswith('#'):
+            uri = urljoin(base_uri, reference).partition('#')[0]
+            if is_http_uri(uri):
+                yield uri
+        for _, value in iteritems(node):
+            for uri in _iter_referenced_http_uris(value, base_uri):
+                yield uri
+    elif isinstance(node, list):
+        for item in node:
+            for uri in _iter_referenced_http_uris(item, base_uri):
+                yield uri
+
+
+def prefetch_http_references(spec_dict, origin_url, jobs=_POOL_SIZE):
+    # type: (typing.Mapping[typing.Text, typing.Any], typing.Text, int) -> typing.Dict[typing.Text, typing.Any]
+    """
+    Fetch concurrently the HTTP(S) documents referenced, directly or not, by the spec.
+
+    The documents referenced by the fetched ones are fetched as well, level by level.
+    Prefetching is best effort: documents that could not be fetched (or parsed) are skipped,
+    so the errors are reported once the references are resolved.
+
+    :return: the parsed documents keyed by their URI
+    """
+    documents = {}  # type: typing.Dict[typing.Text, typing.Any]
+    seen_uris = {origin_url.partition('#')[0]}
+    pending = [(spec_dict, origin_url)]  # type: typing.List[typing.Tuple[typing.Any, typing.Text]]
+    while pending:
+        uris = []  # type: typing.List[typing.Text]
+        for document, base_uri in pending:
+            for uri in _iter_referenced_http_uris(document, base_uri):
+                if uri not in seen_uris:
+                    seen_uris.add(uri)
+                    uris.append(uri)
+        if not uris:
+            break
+
+        with get_executor(ExecutorType.THREAD, jobs=min(jobs, len(uris))) as executor:
+            futures = [(uri, executor.submit(load_http_document, uri)) for uri in uris]
+        pending = []
+        for uri, future in futures:
+            try:
+                documents[uri] = future.result()
+            except Exception as e:
+                log.debug('Failed to prefetch %s: %s', uri, e)
+            else:
+                pending.append((documents[uri], uri))
+    return documents
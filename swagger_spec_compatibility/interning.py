@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+import typing
+
+from six import iteritems
+from six import string_types
+from six import text_type
+
+
+def _immutable(self, *args, **kwargs):
+    # type: (typing.Any, typing.Any, typing.Any) -> None
+    raise TypeError('{} objects are shared across specs, so they could not be modified'.format(self.__class__.__name__))
+
+
+class InternedDict(dict):  # type: ignore
+    """
+    Immutable dictionary produced by `SpecsInterner`, it could be shared by multiple specs.
+    """
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _immutable  # type: ignore
+
+    def __reduce__(self):
+        # type: () -> typing.Tuple[typing.Any, ...]
+        # The default protocol fills the unpickled (or copied) dictionary via __setitem__
+        return type(self), (dict(self),)
+
+    # copy.copy would return a mutable dictionary otherwise
+    def __copy__(self):
+        # type: () -> 'InternedDict'
+        return self
+
+    def __deepcopy__(self, memo):
+        # type: (typing.Dict[int, typing.Any]) -> 'InternedDict'
+        return self
+
+
+class InternedList(list):  # type: ignore
+    """
+    Immutable list produced by `SpecsInterner`, it could be shared by multiple specs.
+    """
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable  # type: ignore
+    append = clear = extend = insert = pop = remove = reverse = sort = _immutable  # type: ignore
+
+    def __reduce__(self):
+        # type: () -> typing.Tuple[typing.Any, ...]
+        # The default protocol fills the unpickled (or copied) list via append/extend
+        return type(self), (list(self),)
+
+    def __copy__(self):
+        # type: () -> 'InternedList'
+        return self
+
+    def __deepcopy__(self, memo):
+        # type: (typing.Dict[int, typing.Any]) -> 'InternedList'
+        return self
+
+
+def is_interned(node):
+    # type: (typing.Any) -> bool
+    """
+    Check if node is a subtree shared via `SpecsInterner`.
+
+    Interned subtrees do not contain $refs, so two specs sharing the same interned subtree
+    have equal (dereferenced) content there.
+    """
+    return isinstance(node, (InternedDict, InternedList))
+
+
+def _is_reference(node):
+    # type: (typing.Mapping[typing.Any, typing.Any]) -> bool
+    return isinstance(node.get('$ref'), string_types)
+
+
+class SpecsInterner(object):
+    """
+    Hash-consing of the spec dictionaries: identical subtrees (and strings), across all the
+    interned specs, are canonicalized into a single shared object.
+
+    The old and new versions of a spec are usually mostly identical, so interning both of them
+    roughly halves their memory footprint and the unchanged areas of the specs become the same objects
+    (which allows the walkers to skip them, check `Walker.skip_identical_subtrees`).
+
+    Only the subtrees without $refs are shared, as immutable `InternedDict` and `InternedList`:
+    the same $ref could point to different content in different specs and the $ref objects are
+    annotated (ie. ``x-scope``) while the spec is validated. The other containers are copied,
+    pointing to the shared subtrees, so the interned specs could be loaded as usual.
+
+    NOTE: the interner is thread safe and holds the canonical objects until it is dropped, so it
+    is meant to be scoped to the specs loaded together (ie. the old and new spec of a run).
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self._strings = {}  # type: typing.Dict[typing.Text, typing.Text]
+        # Canonical subtrees keyed by their type and the identity of their (already canonical) children
+        self._subtrees = {}  # type: typing.Dict[typing.Tuple[typing.Any, ...], typing.Any]
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # type: () -> typing.Dict[typing.Text, typing.Any]
+        # Objects could not be shared across processes, so other processes get an empty interner
+        return {}
+
+    def __setstate__(self, state):
+        # type: (typing.Dict[typing.Text, typing.Any]) -> None
+        self.__init__()  # type: ignore
+
+    def __len__(self):
+        # type: () -> int
+        """
+        Number of distinct subtrees shared by the interned specs.
+        """
+        return len(self._subtrees)
+
+    def intern(self, spec_dict):
+        # type: (typing.Mapping[typing.Text, typing.Any]) -> typing.Mapping[typing.Text, typing.Any]
+        """
+        Get the interned copy of spec_dict. NOTE: spec_dict is not modified.
+        """
+        with self._lock:
+            return typing.cast(typing.Mapping[typing.Text, typing.Any], self._intern(spec_dict)[0])
+
+    def _key(self, node):
+        # type: (typing.Any) -> typing.Any
+        # Containers are canonical already, scalars are keyed by type as well (ie. 1 == 1.0 == True)
+        return id(node) if isinstance(node, (dict, list)) else (type(node), node)
+
+    def _intern(self, node):
+        # type: (typing.Any) -> typing.Tuple[typing.Any, bool]
+        """
+        :return: the interned node and whether it is shared (ie. it does not contain $refs)
+        """
+        if isinstance(node, dict):
+            items = [
+                (self._strings.setdefault(key, key) if isinstance(key, text_type) else key, self._intern(value))
+                for key, value in iteritems(node)
+            ]
+            if _is_reference(node) or not all(shared for _, (_, shared) in items):
+                return {key: value for key, (value, _) in items}, False
+            key = (InternedDict,) + tuple((item_key, self._key(value)) for item_key, (value, _) in items)
+            if key not in self._subtrees:
+                self._subtrees[key] = InternedDict((item_key, value) for item_key, (value, _) in items)
+            return self._subtrees[key], True
+        elif isinstance(node, list):
+            items = [self._intern(item) for item in node]
+            if not all(shared for _, shared in items):
+                return [item for item, _ in items], False
+            key = (InternedList,) + tuple(self._key(item) for item, _ in items)
+            if key not in self._subtrees:
+                self._subtrees[key] = InternedList(item for item, _ in items)
+            return self._subtrees[key], True
+        elif isinstance(node, text_type):
+            return self._strings.setdefault(node, node), True
+        else:
+            return node, True
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import typing
+
+from bravado_core.spec import Spec
+from six import iteritems
+from six import string_types
+from six.moves import copyreg
+from six.moves.urllib.parse import urljoin
+
+from swagger_spec_compatibility.cache import typed_lifetime_cache
+from swagger_spec_compatibility.interning import is_interned
+
+
+def _document_uri(uri):
+    # type: (typing.Text) -> typing.Text
+    # urldefrag is not used as it normalizes the URIs with an empty netloc (ie. memory:// to memory:)
+    return uri.partition('#')[0]
+
+
+def _join_reference(scope, reference):
+    # type: (typing.Text, typing.Text) -> typing.Text
+    # urljoin ignores the base URI of not well known schemes (ie. memory://), even for local references
+    return scope + reference if reference.startswith('#') else urljoin(scope, reference)
+
+
+class LazyDereferencer(object):
+    """
+    Resolve the $refs of a spec on demand, as the nodes of the spec are accessed.
+
+    The $refs are resolved relatively to the document containing them (so $refs of external
+    documents are supported as well) and the resolutions are memoized. Each container node is
+    wrapped at most once per document, so the wrapped nodes have a stable identity and recursive
+    definitions could be detected by identity (as it happens with the fully dereferenced specs).
+    """
+
+    def __init__(self, spec):
+        # type: (Spec) -> None
+        self.spec = spec
+        self._resolutions = {}  # type: typing.Dict[typing.Tuple[typing.Text, typing.Text], typing.Tuple[typing.Text, typing.Any]]
+        # Raw nodes are stored together with their wrappers, so their ids are not reused
+        self._wrapped_nodes = {}  # type: typing.Dict[typing.Tuple[int, typing.Text], typing.Tuple[typing.Any, typing.Any]]
+
+    def __getstate__(self):
+        # type: () -> typing.Dict[typing.Text, typing.Any]
+        # The memoized nodes are keyed by id, so they are meaningless in other processes.
+        # The unpickled wrappers register themselves again (check `register`).
+        return {'spec': self.spec}
+
+    def __setstate__(self, state):
+        # type: (typing.Dict[typing.Text, typing.Any]) -> None
+        self.spec = state['spec']
+        # Wrappers might have been registered already, as they are unpickled before the dereferencer state
+        self.__dict__.setdefault('_resolutions', {})
+        self.__dict__.setdefault('_wrapped_nodes', {})
+
+    def register(self, node, scope, wrapped_node):
+        # type: (typing.Any, typing.Text, typing.Any) -> typing.Any
+        """
+        Register wrapped_node as the wrapper of node, unless node is wrapped already.
+
+        :return: the wrapper of node
+        """
+        # setdefault ensures that threads wrapping the same node concurrently get the same wrapper
+        return self.__dict__.setdefault('_wrapped_nodes', {}).setdefault((id(node), scope), (node, wrapped_node))[1]
+
+    def resolve(self, node, scope):
+        # type: (typing.Any, typing.Text) -> typing.Tuple[typing.Any, typing.Text]
+        """
+        Follow the (chain of) $refs of node.
+
+        :return: the referenced node and the URI of the document containing it
+        """
+        followed_references = set()  # type: typing.Set[typing.Tuple[typing.Text, typing.Text]]
+        while isinstance(node, dict) and isinstance(node.get('$ref'), string_types):
+            key = (scope, node['$ref'])
+            if key in followed_references:
+                # Self referencing $refs could not be resolved, they are kept as they are
+                break
+            followed_references.add(key)
+            resolution = self._resolutions.get(key)
+            if resolution is None:
+                url = _join_reference(scope, node['$ref'])
+                resolution = self._resolutions.setdefault(key, (_document_uri(url), self.spec.resolver.resolve_from_url(url)))
+            scope, node = resolution
+        return node, scope
+
+    def wrap(self, node, scope):
+        # type: (typing.Any, typing.Text) -> typing.Any
+        """
+        Get the lazily dereferenced view of node, contained by the document identified by scope.
+        """
+        if isinstance(node, (LazyDerefDict, LazyDerefList)):
+            return node
+        node, scope = self.resolve(node, scope)
+        if is_interned(node):
+            # Interned subtrees do not contain $refs, so they are shared as they are
+            return node
+        elif isinstance(node, dict):
+            wrapper_type = LazyDerefDict  # type: typing.Type[typing.Any]
+        elif isinstance(node, list):
+            wrapper_type = LazyDerefList
+        else:
+            return node
+
+        wrapped_node = self._wrapped_nodes.get((id(node), scope))
+        if wrapped_node is None:
+            return self.register(node, scope, wrapper_type(node, scope, self))
+        return wrapped_node[1]
+
+
+class LazyDerefDict(dict):  # type: ignore
+    """
+    Dictionary whose values are dereferenced once accessed.
+    """
+
+    def __init__(self, node, scope, dereferencer):
+        # type: (typing.Mapping[typing.Any, typing.Any], typing.Text, LazyDereferencer) -> None
+        super(LazyDerefDict, self).__init__(node)
+        self._node = node
+        self._scope = scope
+        self._dereferencer = dereferencer
+        # Keys whose values could contain $refs and are not yet dereferenced
+        self._pending_keys = {key for key, value in iteritems(node) if isinstance(value, (dict, list))}
+
+    def __getitem__(self, key):
+        # type: (typing.Any) -> typing.Any
+        value = super(LazyDerefDict, self).__getitem__(key)
+        if key in self._pending_keys:
+            value = self._dereferencer.wrap(value, self._scope)
+            super(LazyDerefDict, self).__setitem__(key, value)
+            self._pending_keys.discard(key)
+        return value
+
+    # Overriding __iter__ disables the CPython fast paths copying the raw values (ie. dict(node) and {**node}),
+    # they fall back to keys() and __getitem__
+    def __iter__(self):
+        # type: () -> typing.Iterator[typing.Any]
+        return dict.__iter__(self)
+
+    def keys(self):
+        # type: () -> typing.List[typing.Any]
+        return list(dict.__iter__(self))
+
+    def get(self, key, default=None):
+        # type: (typing.Any, typing.Any) -> typing.Any
+        return self[key] if key in self else default
+
+    def pop(self, key, *default):
+        # type: (typing.Any, typing.Any) -> typing.Any
+        if key not in self:
+            return dict.pop(self, key, *default)
+        value = self[key]
+        dict.__delitem__(self, key)
+        return value
+
+    def popitem(self):
+        # type: () -> typing.Tuple[typing.Any, typing.Any]
+        if not self:
+            raise KeyError('popitem(): dictionary is empty')
+        key = self.keys()[-1]
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        # type: (typing.Any, typing.Any) -> typing.Any
+        return self[key] if key in self else dict.setdefault(self, key, default)
+
+    def values(self):
+        # type: () -> typing.List[typing.Any]
+        return [self[key] for key in self]
+
+    def items(self):
+        # type: () -> typing.List[typing.Tuple[typing.Any, typing.Any]]
+        return [(key, self[key]) for key in self]
+
+    # six.iteritems and six.itervalues rely on them on Python 2
+    itervalues = values
+    iteritems = items
+
+    def copy(self):
+        # type: () -> typing.Dict[typing.Any, typing.Any]
+        return dict(self.items())
+
+    def __reduce_ex__(self, protocol):
+        # type: (typing.Any) -> typing.Tuple[typing.Any, ...]
+        # Values are pickled as they are, so pickling does not dereference the whole spec.
+        # The pending keys are copied, as copy.copy shares the state with the copy
+        state = dict(self.__dict__, _pending_keys=set(self._pending_keys))
+        return copyreg.__newobj__, (type(self),), state, None, iter(list(dict.items(self)))
+
+    def __setstate__(self, state):
+        # type: (typing.Dict[typing.Text, typing.Any]) -> None
+        self.__dict__.update(state)
+        self._dereferencer.register(self._node, self._scope, self)
+
+    def __eq__(self, other):
+        # type: (typing.Any) -> bool
+        for node in (self, other):
+            if isinstance(node, LazyDerefDict):
+                node.values()  # Dereference the pending values
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        # type: (typing.Any) -> bool
+        return not self == other
+
+    __hash__ = None  # type: ignore
+
+
+class LazyDerefList(list):  # type: ignore
+    """
+    List whose items are dereferenced once accessed.
+    """
+
+    def __init__(self, node, scope, dereferencer):
+        # type: (typing.Sequence[typing.Any], typing.Text, LazyDereferencer) -> None
+        super(LazyDerefList, self).__init__(node)
+        self._node = node
+        self._scope = scope
+        self._dereferencer = dereferencer
+        # Indexes of the items that could contain $refs and are not yet dereferenced
+        self._pending_indexes = {index for index, item in enumerate(node) if isinstance(item, (dict, list))}
+
+    def _get_item(self, index):
+        # type: (int) -> typing.Any
+        item = super(LazyDerefList, self).__getitem__(index)
+        if index in self._pending_indexes:
+            item = self._dereferencer.wrap(item, self._scope)
+            super(LazyDerefList, self).__setitem__(index, item)
+            self._pending_indexes.discard(index)
+        return item
+
+    def __getitem__(self, index):  # type: ignore
+        # type: (typing.Union[int, slice]) -> typing.Any
+        if isinstance(index, slice):
+            return [self._get_item(item_index) for item_index in range(*index.indices(len(self)))]
+        return self._get_item(index if index >= 0 else len(self) + index)
+
+    def __iter__(self):
+        # type: () -> typing.Iterator[typing.Any]
+        for index in range(len(self)):
+            yield self._get_item(index)
+
+    def __reversed__(self):
+        # type: () -> typing.Iterator[typing.Any]
+        for index in reversed(range(len(self))):
+            yield self._get_item(index)
+
+    def __contains__(self, item):
+        # type: (typing.Any) -> bool
+        return any(item == own_item for own_item in self)
+
+    # Concatenations (ie. of path and operation parameters) are built from the dereferenced items
+    def __add__(self, other):
+        # type: (typing.Iterable[typing.Any]) -> typing.List[typing.Any]
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        # type: (typing.Iterable[typing.Any]) -> typing.List[typing.Any]
+        return list(other) + list(self)
+
+    def copy(self):
+        # type: () -> typing.List[typing.Any]
+        return list(self)
+
+    def index(self, item, *args):
+        # type: (typing.Any, int) -> int
+        return list(self).index(item, *args)
+
+    def count(self, item):
+        # type: (typing.Any) -> int
+        return list(self).count(item)
+
+    def __reduce_ex__(self, protocol):
+        # type: (typing.Any) -> typing.Tuple[typing.Any, ...]
+        # Items are pickled as they are, so pickling does not dereference the whole spec.
+        # The pending indexes are copied, as copy.copy shares the state with the copy
+        state = dict(self.__dict__, _pending_indexes=set(self._pending_indexes))
+        return copyreg.__newobj__, (type(self),), state, iter(list(list.__iter__(self))), None
+
+    def __setstate__(self, state):
+        # type: (typing.Dict[typing.Text, typing.Any]) -> None
+        self.__dict__.update(state)
+        self._dereferencer.register(self._node, self._scope, self)
+
+    def __eq__(self, other):
+        # type: (typing.Any) -> bool
+        for node in (self, other):
+            if isinstance(node, LazyDerefList):
+                list(node)  # Dereference the pending items
+        return list.__eq__(self, other)
+
+    def __ne__(self, other):
+        # type: (typing.Any) -> bool
+        return not self == other
+
+    __hash__ = None  # type: ignore
+
+
+@typed_lifetime_cache
+def lazily_dereferenced_spec(spec):
+    # type: (Spec) -> typing.Mapping[typing.Text, typing.Any]
+    """
+    Get the view of the spec where the $refs are resolved once reached, an alternative to
+    ``spec.deref_flattened_spec`` that does not flatten and dereference the whole spec up front.
+
+    NOTE: differently from ``spec.deref_flattened_spec`` the models defined by external documents
+    are not collected into the ``definitions`` of the spec.
+    """
+    return typing.cast(
+        typing.Mapping[typing.Text, typing.Any],
+        LazyDereferencer(spec).wrap(spec.spec_dict, _document_uri(spec.origin_url or '')),
+    )
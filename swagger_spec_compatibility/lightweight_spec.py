@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import typing
+
+from bravado.requests_client import RequestsClient
+from bravado_core.resource import build_resources
+from bravado_core.spec import Spec
+from bravado_core.util import strip_xscope
+
+from swagger_spec_compatibility import validation
+from swagger_spec_compatibility.http_cache import HTTP_SCHEMES
+from swagger_spec_compatibility.http_cache import is_http_uri
+from swagger_spec_compatibility.http_cache import load_http_document
+from swagger_spec_compatibility.http_cache import prefetch_http_references
+from swagger_spec_compatibility.http_cache import read_http_uri
+from swagger_spec_compatibility.lazy_dereferencing import lazily_dereferenced_spec
+from swagger_spec_compatibility.profiling import TIMINGS
+from swagger_spec_compatibility.reference_documents import load_file_document
+from swagger_spec_compatibility.reference_documents import read_file_uri
+
+
+T = typing.TypeVar('T')
+
+# Same configuration used while loading the specs via bravado.client.SwaggerClient
+SPEC_CONFIG = {
+    'internally_dereference_refs': True,
+    # Build the operations from the lazily dereferenced spec (check `lazily_dereferenced_spec`)
+    'lazy_dereferencing': False,
+}  # type: typing.Dict[typing.Text, typing.Any]
+
+
+def _identity(obj):
+    # type: (T) -> T
+    return obj
+
+
+class LightweightSpec(Spec):
+    """
+    Spec that builds only what the rules and the walkers rely on: the validated and dereferenced
+    spec, ``deref`` and the operations (with their path name and HTTP method).
+
+    Models types discovery, user defined formats registration and API URL detection are skipped,
+    as they are needed only by clients and servers using the spec to exchange requests and responses.
+    With the ``lazy_dereferencing`` config the operations are built from the lazily dereferenced spec,
+    so ``deref_flattened_spec`` is computed only if needed (ie. by walkers not using lazy dereferencing).
+
+    Specs that already passed validation (according to ``validation.VALIDATION_CACHE``) are not
+    validated again, while trusted specs could skip validation via ``validate_swagger_spec=False`` config.
+
+    The HTTP(S) documents referenced by specs loaded over HTTP(S) are fetched concurrently, before validating
+    the spec, via ``http_cache.HTTP_CACHE`` (check `prefetch_http_references`). The specs loaded from other
+    sources are not traversed to find them, their HTTP(S) references are fetched once resolved.
+    The parsed documents referenced by the spec are shared with the other specs loaded by the process
+    (check ``reference_documents.REFERENCE_DOCUMENTS_CACHE``).
+    """
+
+    # Parsed HTTP(S) documents referenced by the spec, keyed by their URI
+    remote_documents = {}  # type: typing.Mapping[typing.Text, typing.Any]
+    # Key of the spec in ``validation.VALIDATION_CACHE``, if validated
+    validation_key = None  # type: typing.Optional[typing.Text]
+
+    @classmethod
+    def from_dict(cls, spec_dict, origin_url=None, http_client=None, config=None):
+        # type: (typing.Mapping[typing.Text, typing.Any], typing.Optional[typing.Text], typing.Any, typing.Any) -> Spec
+        # A requests based client is used, as done by bravado, to download the remote references
+        return super(LightweightSpec, cls).from_dict(
+            spec_dict,
+            origin_url=origin_url,
+            http_client=http_client or RequestsClient(),
+            config=dict(SPEC_CONFIG, **(config or {})),
+        )
+
+    def _load_remote_document(self, uri):
+        # type: (typing.Text) -> typing.Any
+        document = self.remote_documents.get(uri)
+        return load_http_document(uri) if document is None else document
+
+    def get_ref_handlers(self):
+        # type: () -> typing.Dict[typing.Text, typing.Callable[[typing.Text], typing.Any]]
+        handlers = super(LightweightSpec, self).get_ref_handlers()
+        handlers['file'] = load_file_document
+        for scheme in HTTP_SCHEMES:
+            handlers[scheme] = self._load_remote_document
+        return handlers
+
+    def read_reference(self, uri):
+        # type: (typing.Text) -> bytes
+        """
+        Read the content of a document referenced by the spec.
+
+        The HTTP(S) documents already prefetched are not fetched again, their parsed content is returned instead
+        (without the ``x-scope`` annotations added while validating the spec, so it does not change once validated).
+        """
+        if uri.partition(':')[0] in HTTP_SCHEMES:
+            document = self.remote_documents.get(uri.partition('#')[0])
+            if document is not None:
+                return json.dumps(strip_xscope(document), sort_keys=True, default=str).encode('utf-8')
+            return read_http_uri(uri)
+        return read_file_uri(uri)
+
+    def _validate_spec(self):
+        # type: () -> None
+        if not self.config['validate_swagger_spec']:
+            return
+        validation_cache = validation.VALIDATION_CACHE
+        key = self.validation_key = validation_cache.key(self.spec_dict, self.origin_url)
+        if validation_cache.is_valid(key, self.read_reference):
+            return
+        with TIMINGS.measure('validation'):
+            super(LightweightSpec, self)._validate_spec()
+        # The validator resolver (replacing the spec one) stores the documents referenced by the spec
+        validation_cache.mark_valid(key, validation.referenced_uris(self), self.read_reference)
+
+    def build(self):
+        # type: () -> None
+        if is_http_uri(self.origin_url or ''):
+            self.remote_documents = prefetch_http_references(self.spec_dict, typing.cast(typing.Text, self.origin_url))
+        self._validate_spec()
+
+        if self.config['internally_dereference_refs']:
+            # Avoid to evaluate is_ref every time, references are resolved up front (or while accessed if lazy)
+            self.deref = _identity
+            self._internal_spec_dict = (
+                lazily_dereferenced_spec(self) if self.config['lazy_dereferencing'] else self.deref_flattened_spec
+            )
+
+        self.resources = build_resources(self)
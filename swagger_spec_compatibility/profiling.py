@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+import time
+import typing
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class Timings(object):
+    """
+    Thread-safe accumulator of the time spent in the phases of a run (ie. validation or rules).
+
+    The phases are measured in wall-clock time: while a phase is measured by many threads at once
+    (ie. specs validated concurrently) the elapsed time is accounted once, not once per thread.
+
+    NOTE: only the time spent in the current process is accounted.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self._timings = OrderedDict()  # type: typing.MutableMapping[typing.Text, float]
+        # Number of running measures and start time of the first one, per phase
+        self._active = {}  # type: typing.Dict[typing.Text, typing.Tuple[int, float]]
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        # type: (typing.Text, float) -> None
+        with self._lock:
+            self._timings[phase] = self._timings.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, phase):
+        # type: (typing.Text) -> typing.Generator[None, None, None]
+        with self._lock:
+            running, start = self._active.get(phase, (0, 0.0))
+            self._active[phase] = (running + 1, time.time() if running == 0 else start)
+        try:
+            yield
+        finally:
+            with self._lock:
+                running, start = self._active.pop(phase)
+                if running == 1:
+                    self._timings[phase] = self._timings.get(phase, 0.0) + time.time() - start
+                else:
+                    self._active[phase] = (running - 1, start)
+
+    def timings(self):
+        # type: () -> typing.Dict[typing.Text, float]
+        with self._lock:
+            return dict(self._timings)
+
+    def report(self):
+        # type: () -> typing.Text
+        with self._lock:
+            return 'Time spent (seconds):\n{}'.format(
+                '\n'.join('\t{}: {:.3f}'.format(phase, seconds) for phase, seconds in self._timings.items()),
+            )
+
+    def reset(self):
+        # type: () -> None
+        with self._lock:
+            self._timings.clear()
+            self._active.clear()
+
+
+# Time spent by the library, reported by the CLI --profile option
+TIMINGS = Timings()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import typing
+from contextlib import closing
+
+import yaml
+from bravado_core.spec import is_yaml
+from six.moves.urllib.request import urlopen
+
+from swagger_spec_compatibility.cache import content_hash
+from swagger_spec_compatibility.cache import ContentHashCache
+from swagger_spec_compatibility.streaming import local_file_path
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader  # type: ignore
+
+
+# Parsed documents referenced via $ref by the specs, keyed by their URI and content. The cache is
+# shared by all the specs loaded by the process, so the documents referenced by both the old and new spec
+# (or by many specs in batch modes) are parsed once.
+# The bounds could be changed via ``REFERENCE_DOCUMENTS_CACHE.resize``.
+REFERENCE_DOCUMENTS_CACHE = ContentHashCache(max_size=64 * 1024 * 1024)  # type: ContentHashCache[typing.Any]
+
+
+def parse_reference_document(uri, content, content_type=''):
+    # type: (typing.Text, bytes, typing.Text) -> typing.Any
+    """
+    Parse the document as YAML or JSON, according to its URI and content type (as bravado-core does).
+    """
+    if is_yaml(uri, content_type.lower()):
+        return yaml.load(content, Loader=SafeLoader)
+    else:
+        return json.loads(content.decode('utf-8'))
+
+
+def load_reference_document(uri, content, content_type=''):
+    # type: (typing.Text, bytes, typing.Text) -> typing.Any
+    """
+    Get the parsed document referenced by uri, whose raw content is provided, via ``REFERENCE_DOCUMENTS_CACHE``.
+
+    The documents are cached by URI and content, so modified documents are parsed again while
+    the unmodified ones are shared (the content is still read, only parsing is avoided).
+
+    NOTE: the returned document is shared by all the specs referencing it, so it must not be modified.
+    The only exception is the ``x-scope`` annotation of its $refs, added while the specs are validated:
+    it is the same for all the specs as its innermost scope (the one used to resolve the $refs) is the
+    URI of the document itself.
+    """
+    uri = uri.partition('#')[0]
+    return REFERENCE_DOCUMENTS_CACHE.get_or_load(
+        content_hash(uri, content),
+        lambda: parse_reference_document(uri, content, content_type),
+        size=len(content),
+    )
+
+
+def read_file_uri(uri):
+    # type: (typing.Text) -> bytes
+    """
+    Read the content of the document referenced by a ``file:`` URI (ignoring the fragment, if any).
+    """
+    uri = uri.partition('#')[0]
+    path = local_file_path(uri)
+    if path is None:
+        # Remote hosts, the URI is opened as bravado-core does
+        with closing(urlopen(uri)) as f:
+            return f.read()
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def load_file_document(uri):
+    # type: (typing.Text) -> typing.Any
+    """
+    Read and parse the document referenced by a ``file:`` URI, via ``REFERENCE_DOCUMENTS_CACHE``.
+    """
+    return load_reference_document(uri, read_file_uri(uri))
@@ -3,14 +3,60 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import atexit
+import os
+import pickle
+import tempfile
+import threading
 import typing
-from multiprocessing import Pool
+import uuid
+from collections import OrderedDict
+from concurrent.futures import as_completed
+from concurrent.futures import Executor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import wait
+from itertools import chain
 
 from bravado_core.spec import Spec
+from six import text_type
 
+from swagger_spec_compatibility.cache import content_hash
+from swagger_spec_compatibility.executors import available_cpus
+from swagger_spec_compatibility.executors import ExecutorType
+from swagger_spec_compatibility.executors import get_executor
+from swagger_spec_compatibility.executors import is_in_process_executor
+from swagger_spec_compatibility.executors import SerialExecutor
+from swagger_spec_compatibility.executors import shutdown_now
+from swagger_spec_compatibility.rules.common import Level
 from swagger_spec_compatibility.rules.common import RuleProtocol
 from swagger_spec_compatibility.rules.common import RuleRegistry
 from swagger_spec_compatibility.rules.common import ValidationMessage
+from swagger_spec_compatibility.spec_utils import load_spec_from_uri
+from swagger_spec_compatibility.spec_utils import load_uncached_spec_from_uri
+from swagger_spec_compatibility.spec_utils import precompute_spec_data
+from swagger_spec_compatibility.spec_utils import spec_content_key
+from swagger_spec_compatibility.walkers import BudgetExceeded
+from swagger_spec_compatibility.walkers import SchemaWalker
+from swagger_spec_compatibility.walkers import walkers_cache
+from swagger_spec_compatibility.walkers import WalkersBudget
+from swagger_spec_compatibility.walkers import WalkersCache
+from swagger_spec_compatibility.walkers import WalkersResults
+
+
+# Seconds between checks of the cancellation while waiting for the workers
+_CANCEL_EVENT_CHECK_INTERVAL = 0.1
+
+SpecsPairStatus = typing.NamedTuple(
+    'SpecsPairStatus', (
+        ('old_spec_uri', typing.Text),
+        ('new_spec_uri', typing.Text),
+        # Messages reported by each rule, None if the pair could not be evaluated
+        ('status', typing.Optional[typing.Mapping[typing.Type[RuleProtocol], typing.List[ValidationMessage]]]),
+        # Description of the error that prevented the evaluation of the pair, if any
+        ('error', typing.Optional[typing.Text]),
+    ),
+)
 
 
 class _ALL_RULES(object):
@@ -19,46 +65,911 @@ class _ALL_RULES(object):
         return str('ALL_RULES')  # pragma: no cover  # This statement is present only to have a nicer REPL experience
 
 
+def _incomplete_message(rule, reason):
+    # type: (typing.Type[RuleProtocol], BudgetExceeded) -> ValidationMessage
+    return ValidationMessage(level=Level.INCOMPLETE, rule=rule, reference=text_type(reason))
+
+
+def _iter_validate_rules(
+    old_spec,  # type: Spec
+    new_spec,  # type: Spec
+    rules,  # type: typing.Sequence[typing.Type[RuleProtocol]]
+    fail_fast=False,  # type: bool
+    timeout=None,  # type: typing.Optional[float]
+    max_visited_nodes=None,  # type: typing.Optional[int]
+    cache=None,  # type: typing.Optional[WalkersCache]
+    cancel_event=None,  # type: typing.Optional[threading.Event]
+    lazy_dereferencing=False,  # type: bool
+):
+    # type: (...) -> typing.Generator[typing.Tuple[typing.Type[RuleProtocol], ValidationMessage], None, None]
+    """
+    Evaluate the rules yielding the messages while the rules produce them.
+
+    The walkers results are looked up into `cache`, if provided, otherwise a run-scoped cache is used.
+
+    In fail-fast mode the evaluation stops after the first ERROR message. The walkers are not
+    prefetched but lazily traversed, so the traversal stops as soon as a rule reports an error.
+
+    Rules exceeding `timeout` (seconds) or consuming walkers that exceed `max_visited_nodes` are
+    reported via an INCOMPLETE message. The timeout is cooperative: it is checked while the walkers
+    traverse the specs (the shared traversal of the prefetched walkers is bounded by it too) and
+    between the messages reported by the rule. The time spent by the caller consuming the messages
+    is not accounted.
+
+    Once `cancel_event` is set the evaluation stops as soon as possible: the walkers traversals
+    are interrupted and no further rules are evaluated.
+
+    With `lazy_dereferencing` the walkers of the run-scoped cache traverse the lazily dereferenced specs.
+    """
+    with walkers_cache(
+        cache, lazy=fail_fast,
+        budget=WalkersBudget(max_visited_nodes=max_visited_nodes, timeout=timeout, cancel_event=cancel_event),
+        lazy_dereferencing=lazy_dereferencing,
+    ) as active_cache:
+        # Externally provided caches might have no budget
+        budget = active_cache.budget or WalkersBudget()
+        if not fail_fast:
+            # The walkers consumed by the rules are computed all together with a single traversal of the specs
+            budget.start()
+            active_cache.prefetch(
+                walker_classes={walker for rule in rules for walker in getattr(rule, 'walkers', ())},
+                left_spec=old_spec,
+                right_spec=new_spec,
+            )
+        for rule in rules:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            budget.start()
+            try:
+                for message in rule.validate(left_spec=old_spec, right_spec=new_spec):
+                    with budget.paused():
+                        yield rule, message
+                    if fail_fast and message.level is Level.ERROR:
+                        return
+                    budget.check_deadline()
+            except BudgetExceeded as e:
+                yield rule, _incomplete_message(rule, e)
+
+
 def validate_rules(
     old_spec,  # type: Spec
     new_spec,  # type: Spec
     rule,  # type: typing.Type[RuleProtocol]
 ):
     # type: (...) -> typing.Iterable[ValidationMessage]
-    return list(rule.validate(left_spec=old_spec, right_spec=new_spec))   # pragma: no cover
+    return validate_rules_group(old_spec, new_spec, [rule])[0]
 
 
 def multi_run_wrapper(
     args,  # type: typing.Tuple[Spec, Spec, typing.Type[RuleProtocol]]
 ):
     # type: (...) -> typing.Iterable[ValidationMessage]
-    return validate_rules(*args)   # pragma: no cover
+    return validate_rules(*args)
+
+
+def validate_rules_group(
+    old_spec,  # type: Spec
+    new_spec,  # type: Spec
+    rules,  # type: typing.Sequence[typing.Type[RuleProtocol]]
+    fail_fast=False,  # type: bool
+    timeout=None,  # type: typing.Optional[float]
+    max_visited_nodes=None,  # type: typing.Optional[int]
+    cancel_event=None,  # type: typing.Optional[threading.Event]
+    lazy_dereferencing=False,  # type: bool
+):
+    # type: (...) -> typing.List[typing.List[ValidationMessage]]
+    """
+    Validate a group of rules, sharing a single traversal of the specs, and return the messages of each rule
+    (in the same order of `rules`). Check `iter_compatibility_status` for the meaning of the other arguments.
+    """
+    rules_messages = {rule: [] for rule in rules}  # type: typing.Dict[typing.Type[RuleProtocol], typing.List[ValidationMessage]]
+    for rule, message in _iter_validate_rules(
+        old_spec, new_spec, rules, fail_fast=fail_fast, timeout=timeout, max_visited_nodes=max_visited_nodes,
+        cancel_event=cancel_event, lazy_dereferencing=lazy_dereferencing,
+    ):
+        rules_messages[rule].append(message)
+    return [rules_messages[rule] for rule in rules]
+
+
+# Specs shipped to the current worker process, indexed by specs key.
+# The mapping is bounded as caller supplied workers could be reused across many comparisons.
+_WORKER_SPECS = OrderedDict()  # type: typing.MutableMapping[typing.Text, typing.Tuple[Spec, Spec]]
+_MAX_WORKER_SPECS = 2
+
+
+def _store_worker_specs(
+    specs_key,  # type: typing.Text
+    old_spec,  # type: Spec
+    new_spec,  # type: Spec
+):
+    # type: (...) -> None
+    _WORKER_SPECS[specs_key] = (old_spec, new_spec)
+    while len(_WORKER_SPECS) > _MAX_WORKER_SPECS:
+        _WORKER_SPECS.popitem(last=False)  # type: ignore  # MutableMapping.popitem does not accept last
+
+
+def _dump_to_temporary_file(obj):
+    # type: (typing.Any) -> typing.Text
+    """
+    Serialize obj to a new temporary file, so it could be shipped to the workers of caller supplied
+    process executors by path: each worker reads it only the first time it needs it.
+
+    :return: the path of the file, to be removed by the caller
+    """
+    fd, path = tempfile.mkstemp(prefix='swagger-spec-compatibility-', suffix='.pickle')
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump(obj, f, pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+class _SpecsFiles(object):
+    """
+    Temporary files of the specs shipped to the workers of caller supplied process executors, indexed by specs key.
+
+    The files of the specs identified by their content (check `spec_content_key`) are shared by the
+    concurrent, and the following, evaluations of the same specs, so the specs are serialized once
+    and the workers that already received them do not read them again. Each file is removed once
+    not in use anymore, except the files of the `max_unused` most recently used content identified specs.
+    """
+
+    def __init__(self, max_unused):
+        # type: (int) -> None
+        self.max_unused = max_unused
+        self._paths = {}  # type: typing.Dict[typing.Text, typing.Text]
+        self._users = {}  # type: typing.Dict[typing.Text, int]
+        self._unused = OrderedDict()  # type: typing.MutableMapping[typing.Text, None]
+        self._lock = threading.Lock()
+
+    def acquire(self, specs_key, specs):
+        # type: (typing.Text, typing.Tuple[Spec, Spec]) -> typing.Text
+        """
+        Get the path of the file of the specs, serializing them if needed. The file is kept until `release`.
+        """
+        with self._lock:
+            if specs_key not in self._paths:
+                self._paths[specs_key] = _dump_to_temporary_file(specs)
+            self._users[specs_key] = self._users.get(specs_key, 0) + 1
+            self._unused.pop(specs_key, None)
+            return self._paths[specs_key]
+
+    def release(self, specs_key, keep=False):
+        # type: (typing.Text, bool) -> None
+        """
+        :param keep: True keeps the file once not in use, as the specs are identified by their content
+        """
+        with self._lock:
+            self._users[specs_key] -= 1
+            if self._users[specs_key] > 0:
+                return
+            del self._users[specs_key]
+            self._unused[specs_key] = None
+            if not keep:
+                self._remove(specs_key)
+            while len(self._unused) > self.max_unused:
+                self._remove(next(iter(self._unused)))
+
+    def _remove(self, specs_key):
+        # type: (typing.Text) -> None
+        del self._unused[specs_key]
+        os.unlink(self._paths.pop(specs_key))
+
+    def clear(self):
+        # type: () -> None
+        """
+        Remove the files not in use.
+        """
+        with self._lock:
+            for specs_key in list(self._unused):
+                self._remove(specs_key)
+
+
+# Workers keep at most _MAX_WORKER_SPECS specs, so older files would be likely read again anyway
+_SPECS_FILES = _SpecsFiles(max_unused=_MAX_WORKER_SPECS)
+atexit.register(_SPECS_FILES.clear)
+
+
+def _specs_key(old_spec, new_spec):
+    # type: (Spec, Spec) -> typing.Optional[typing.Text]
+    """
+    Key identifying the specs pair by content, if both the specs have been loaded via a specs cache.
+    """
+    old_spec_key, new_spec_key = spec_content_key(old_spec), spec_content_key(new_spec)
+    if old_spec_key is None or new_spec_key is None:
+        return None
+    return content_hash(old_spec_key, new_spec_key)
+
+
+def _get_worker_specs(
+    specs_key,  # type: typing.Text
+    specs_path,  # type: typing.Optional[typing.Text]
+):
+    # type: (...) -> typing.Tuple[Spec, Spec]
+    """
+    Get the specs shipped to the worker.
+
+    The specs are read, from the file where they are serialized, only the first time that the worker needs them.
+    """
+    if specs_key not in _WORKER_SPECS:
+        assert specs_path is not None, 'Specs have not been shipped to the worker'
+        with open(specs_path, 'rb') as f:
+            _store_worker_specs(specs_key, *pickle.load(f))
+    return _WORKER_SPECS[specs_key]
+
+
+_WORKER_NEW_SPECS = OrderedDict()  # type: typing.MutableMapping[typing.Text, Spec]
+
+
+def _store_worker_new_spec(
+    specs_key,  # type: typing.Text
+    new_spec,  # type: Spec
+):
+    # type: (...) -> None
+    precompute_spec_data(new_spec)
+    _WORKER_NEW_SPECS[specs_key] = new_spec
+    while len(_WORKER_NEW_SPECS) > _MAX_WORKER_SPECS:
+        _WORKER_NEW_SPECS.popitem(last=False)  # type: ignore  # MutableMapping.popitem does not accept last
+
+
+def _get_worker_new_spec(
+    specs_key,  # type: typing.Text
+    new_spec_path,  # type: typing.Optional[typing.Text]
+):
+    # type: (...) -> Spec
+    """
+    Get the new spec shipped to the worker by `compatibility_status_matrix`.
+
+    The spec is read, from the file where it is serialized, and its derived data precomputed only the
+    first time that the worker needs it.
+    """
+    if specs_key not in _WORKER_NEW_SPECS:
+        assert new_spec_path is not None, 'Spec has not been shipped to the worker'
+        with open(new_spec_path, 'rb') as f:
+            _store_worker_new_spec(specs_key, pickle.load(f))
+    return _WORKER_NEW_SPECS[specs_key]
+
+
+def _validate_rules_in_worker(
+    specs_key,  # type: typing.Text
+    specs_path,  # type: typing.Optional[typing.Text]
+    rules,  # type: typing.Sequence[typing.Type[RuleProtocol]]
+    fail_fast=False,  # type: bool
+    timeout=None,  # type: typing.Optional[float]
+    max_visited_nodes=None,  # type: typing.Optional[int]
+    lazy_dereferencing=False,  # type: bool
+):
+    # type: (...) -> typing.List[typing.List[ValidationMessage]]
+    """
+    Validate the rules against the specs shipped to the worker.
+    """
+    old_spec, new_spec = _get_worker_specs(specs_key, specs_path)
+    return validate_rules_group(
+        old_spec, new_spec, rules, fail_fast=fail_fast, timeout=timeout, max_visited_nodes=max_visited_nodes,
+        lazy_dereferencing=lazy_dereferencing,
+    )
+
+
+def _compute_walkers(
+    old_spec,  # type: Spec
+    new_spec,  # type: Spec
+    walker_classes,  # type: typing.Sequence[typing.Type[SchemaWalker[typing.Any]]]
+    timeout=None,  # type: typing.Optional[float]
+    max_visited_nodes=None,  # type: typing.Optional[int]
+    cancel_event=None,  # type: typing.Optional[threading.Event]
+    lazy_dereferencing=False,  # type: bool
+):
+    # type: (...) -> WalkersResults
+    """
+    Compute the walkers with a single traversal of the specs.
+
+    Walkers exceeding the budget (check `iter_compatibility_status`) report the exceeded budget
+    error instead of their results.
+    """
+    budget = WalkersBudget(max_visited_nodes=max_visited_nodes, timeout=timeout, cancel_event=cancel_event)
+    cache = WalkersCache(budget=budget, lazy_dereferencing=lazy_dereferencing)
+    budget.start()
+    cache.prefetch(walker_classes, old_spec, new_spec)
+    return cache.export_results(walker_classes, old_spec, new_spec)
+
+
+def _compute_walkers_in_worker(
+    specs_key,  # type: typing.Text
+    specs_path,  # type: typing.Optional[typing.Text]
+    walker_classes,  # type: typing.Sequence[typing.Type[SchemaWalker[typing.Any]]]
+    timeout=None,  # type: typing.Optional[float]
+    max_visited_nodes=None,  # type: typing.Optional[int]
+    lazy_dereferencing=False,  # type: bool
+):
+    # type: (...) -> WalkersResults
+    old_spec, new_spec = _get_worker_specs(specs_key, specs_path)
+    return _compute_walkers(
+        old_spec, new_spec, walker_classes, timeout=timeout, max_visited_nodes=max_visited_nodes,
+        lazy_dereferencing=lazy_dereferencing,
+    )
+
+
+class _RulesSubmitter(object):
+    """
+    Submit groups of rules to an executor shipping the specs to the workers at most once.
+
+    Executors running in the current process receive the specs as they are. Workers of process
+    pools created by the library receive the specs via the pool initializer (`specs_shipped`), while
+    the specs are serialized once to a temporary file for the workers of other executors: the tasks
+    carry only its path and each worker reads it only the first time it needs the specs.
+    The file is released by `close`, and kept for the following evaluations if `content_key` is set
+    (ie. the specs key identifies the specs by content, check `_SpecsFiles`).
+    """
+
+    def __init__(
+        self,
+        executor,  # type: Executor
+        old_spec,  # type: Spec
+        new_spec,  # type: Spec
+        specs_key,  # type: typing.Text
+        specs_shipped,  # type: bool
+        cancel_event=None,  # type: typing.Optional[threading.Event]
+        lazy_dereferencing=False,  # type: bool
+        content_key=False,  # type: bool
+    ):
+        # type: (...) -> None
+        self.executor = executor
+        self.old_spec = old_spec
+        self.new_spec = new_spec
+        self.specs_key = specs_key
+        # Only the callables running in the current process could observe the cancellation
+        self.cancel_event = cancel_event
+        self.lazy_dereferencing = lazy_dereferencing
+        self.content_key = content_key
+        self.in_process = is_in_process_executor(executor)
+        self.specs_path = None  # type: typing.Optional[typing.Text]
+        if not self.in_process and not specs_shipped:
+            self.specs_path = _SPECS_FILES.acquire(specs_key, (old_spec, new_spec))
+
+    def submit(
+        self,
+        rules,  # type: typing.Sequence[typing.Type[RuleProtocol]]
+        fail_fast=False,  # type: bool
+        timeout=None,  # type: typing.Optional[float]
+        max_visited_nodes=None,  # type: typing.Optional[int]
+    ):
+        # type: (...) -> Future[typing.List[typing.List[ValidationMessage]]]
+        if self.in_process:
+            return self.executor.submit(
+                validate_rules_group, self.old_spec, self.new_spec, rules, fail_fast, timeout, max_visited_nodes, self.cancel_event,
+                self.lazy_dereferencing,
+            )
+        else:
+            return self.executor.submit(
+                _validate_rules_in_worker, self.specs_key, self.specs_path, rules, fail_fast, timeout, max_visited_nodes,
+                self.lazy_dereferencing,
+            )
+
+    def submit_walkers(
+        self,
+        walker_classes,  # type: typing.Sequence[typing.Type[SchemaWalker[typing.Any]]]
+        timeout=None,  # type: typing.Optional[float]
+        max_visited_nodes=None,  # type: typing.Optional[int]
+    ):
+        # type: (...) -> Future[WalkersResults]
+        if self.in_process:
+            return self.executor.submit(
+                _compute_walkers, self.old_spec, self.new_spec, walker_classes, timeout, max_visited_nodes, self.cancel_event,
+                self.lazy_dereferencing,
+            )
+        else:
+            return self.executor.submit(
+                _compute_walkers_in_worker, self.specs_key, self.specs_path, walker_classes, timeout, max_visited_nodes,
+                self.lazy_dereferencing,
+            )
+
+    def close(self):
+        # type: () -> None
+        """
+        Release the serialized specs, to be called once the submitted tasks are completed (or cancelled).
+        """
+        if self.specs_path is not None:
+            _SPECS_FILES.release(self.specs_key, keep=self.content_key)
+            self.specs_path = None
+
+
+def _group_rules(rules, cheap_first=False):
+    # type: (typing.Sequence[typing.Type[RuleProtocol]], bool) -> typing.List[typing.List[typing.Type[RuleProtocol]]]
+    """
+    Group together the rules that declare the consumed walkers, so they can share a single traversal
+    of the specs. The other rules are kept on their own group to preserve the parallelism.
+
+    The groups are ordered by scheduling priority. By default the (expensive) walkers group goes first
+    to reduce the overall run time, with `cheap_first` the other rules go first as they are likely
+    to report an error earlier (ie. `DeletedEndpoint` does not need to traverse the specs).
+    """
+    walkers_rules = [rule for rule in rules if getattr(rule, 'walkers', None)]
+    walkers_group = [walkers_rules] if walkers_rules else []
+    other_groups = [[rule] for rule in rules if rule not in walkers_rules]
+    return other_groups + walkers_group if cheap_first else walkers_group + other_groups
+
+
+class _WalkersPlan(object):
+    """
+    Dependency graph between the rules and the walkers that they declare.
+
+    The walkers are partitioned in (at most) `partitions` groups, each group is computed by a single
+    traversal of the specs and different groups can be computed in parallel. A rule is ready to be
+    evaluated once all its walkers are computed.
+    """
+
+    def __init__(
+        self,
+        rules,  # type: typing.Sequence[typing.Type[RuleProtocol]]
+        partitions,  # type: int
+    ):
+        # type: (...) -> None
+        self.rules = [rule for rule in rules if getattr(rule, 'walkers', None)]
+        walker_classes = sorted(
+            {walker for rule in self.rules for walker in rule.walkers},
+            key=lambda walker: (walker.__module__, walker.__name__),
+        )
+        self.walkers_partitions = [
+            walker_classes[index::partitions]
+            for index in range(min(partitions, len(walker_classes)))
+        ]  # type: typing.List[typing.List[typing.Type[SchemaWalker[typing.Any]]]]
+        self._pending_rules = list(self.rules)
+        self._computed_walkers = set()  # type: typing.Set[typing.Type[SchemaWalker[typing.Any]]]
+
+    def computed(self, walker_classes):
+        # type: (typing.Iterable[typing.Type[SchemaWalker[typing.Any]]]) -> typing.List[typing.Type[RuleProtocol]]
+        """
+        Mark the walkers as computed and return the rules that became ready to be evaluated.
+        """
+        self._computed_walkers.update(walker_classes)
+        ready_rules = [rule for rule in self._pending_rules if self._computed_walkers.issuperset(rule.walkers)]
+        self._pending_rules = [rule for rule in self._pending_rules if rule not in ready_rules]
+        return ready_rules
+
+
+def _as_completed(
+    futures,  # type: typing.Iterable[Future[typing.Any]]
+    cancel_event=None,  # type: typing.Optional[threading.Event]
+):
+    # type: (...) -> typing.Generator[Future[typing.Any], None, None]
+    """
+    Yield the futures as they complete, stopping once `cancel_event` is set.
+    """
+    if cancel_event is None:
+        for future in as_completed(futures):
+            yield future
+        return
+
+    pending = set(futures)
+    while pending and not cancel_event.is_set():
+        done, pending = wait(pending, timeout=_CANCEL_EVENT_CHECK_INTERVAL, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future
+
+
+def iter_compatibility_status(
+    old_spec,  # type: Spec
+    new_spec,  # type: Spec
+    rules=_ALL_RULES(),  # type: typing.Union[_ALL_RULES, typing.Iterable[typing.Type[RuleProtocol]]]
+    executor=ExecutorType.PROCESS,  # type: typing.Union[ExecutorType, Executor]
+    jobs=None,  # type: typing.Optional[int]
+    fail_fast=False,  # type: bool
+    timeout=None,  # type: typing.Optional[float]
+    max_visited_nodes=None,  # type: typing.Optional[int]
+    cancel_event=None,  # type: typing.Optional[threading.Event]
+    lazy_dereferencing=False,  # type: bool
+):
+    # type: (...) -> typing.Generator[typing.Tuple[typing.Type[RuleProtocol], ValidationMessage], None, None]
+    """
+    Evaluate the rules on the old and new specs yielding the messages as soon as they are available.
+
+    The messages of the rules executed by a serial executor are yielded while the rules produce them,
+    otherwise the messages are yielded as soon as the task running the rule completes.
+    NOTE: tasks still pending are cancelled if the generator is closed before being exhausted.
+
+    The rules are executed via `executor`. A caller supplied executor is not shut down, so it could
+    be reused across multiple calls. Otherwise a new executor with `jobs` workers (default: number
+    of available CPUs) is created for the call.
+
+    With `fail_fast` the evaluation stops at the first ERROR message: the cheap rules are scheduled
+    first, the outstanding tasks are cancelled and the walkers stop the traversal as soon as possible.
+
+    `timeout` (seconds) bounds the evaluation time of each rule and `max_visited_nodes` the nodes
+    visited by each walker. Rules exceeding them are reported via a Level.INCOMPLETE message.
+
+    The walkers declared by the rules (check `BaseRule.walkers`) are computed once. Pool executors
+    compute them in parallel, across the workers, and the rules consuming them are evaluated in the
+    current process as soon as all their walkers are available. Serial executors, and the fail-fast
+    mode, compute them via a single traversal of the specs.
+
+    `cancel_event` allows other threads to stop the evaluation: once set no further messages are
+    yielded, the pending tasks are cancelled and the rules running in the current process stop
+    as soon as possible. Tasks already running in worker processes could not be interrupted, so the
+    worker processes of executors created by the library are terminated if the evaluation stops earlier
+    (ie. fail-fast), while the ones of caller supplied executors complete their tasks.
+
+    With `lazy_dereferencing` the walkers traverse the original specs resolving the $refs once reached
+    (check `SchemaWalker`), instead of the fully flattened and dereferenced specs.
+    """
+
+    if isinstance(rules, _ALL_RULES):
+        rules = RuleRegistry.rules()
+    rules = list(rules)
+    if not lazy_dereferencing:
+        # Dereferenced once, instead of once per worker (or concurrently by multiple threads)
+        old_spec.deref_flattened_spec
+        new_spec.deref_flattened_spec
+
+    max_workers = jobs or available_cpus()
+    if fail_fast or executor is ExecutorType.SERIAL or isinstance(executor, SerialExecutor):
+        # Lazily traversed walkers allow to stop earlier than walkers computed ahead of time
+        walkers_plan = _WalkersPlan(rules=(), partitions=0)
+        rules_groups = _group_rules(rules, cheap_first=fail_fast)
+    else:
+        walkers_plan = _WalkersPlan(rules=rules, partitions=max_workers)
+        rules_groups = [[rule] for rule in rules if rule not in walkers_plan.rules]
+
+    # No need to have more workers than tasks to run
+    workers = max(1, min(max_workers, len(rules_groups) + len(walkers_plan.walkers_partitions)))
+    # Specs identified by content are shipped once to the workers of caller supplied executors, across the calls
+    content_specs_key = _specs_key(old_spec, new_spec)
+    specs_key = content_specs_key or uuid.uuid4().hex
+    with get_executor(
+        executor,
+        jobs=workers,
+        # Process pools created by the library receive the specs once per worker
+        initializer=_store_worker_specs,
+        initargs=(specs_key, old_spec, new_spec),
+    ) as rules_executor:
+        if isinstance(rules_executor, SerialExecutor):
+            for rules_group in rules_groups:
+                for rule, message in _iter_validate_rules(
+                    old_spec, new_spec, rules_group,
+                    fail_fast=fail_fast, timeout=timeout, max_visited_nodes=max_visited_nodes, cancel_event=cancel_event,
+                    lazy_dereferencing=lazy_dereferencing,
+                ):
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    yield rule, message
+                    if fail_fast and message.level is Level.ERROR:
+                        return
+            return
+
+        # Set once the evaluation is over, so the rules running in threads do not outlive it
+        tasks_cancel_event = threading.Event()
+        submitter = _RulesSubmitter(
+            executor=rules_executor,
+            old_spec=old_spec,
+            new_spec=new_spec,
+            specs_key=specs_key,
+            specs_shipped=executor is ExecutorType.PROCESS,
+            cancel_event=tasks_cancel_event,
+            lazy_dereferencing=lazy_dereferencing,
+            content_key=content_specs_key is not None,
+        )
+        walkers_futures = {
+            submitter.submit_walkers(walkers_partition, timeout=timeout, max_visited_nodes=max_visited_nodes): walkers_partition
+            for walkers_partition in walkers_plan.walkers_partitions
+        }
+        rules_futures = {
+            submitter.submit(rules_group, fail_fast=fail_fast, timeout=timeout, max_visited_nodes=max_visited_nodes): rules_group
+            for rules_group in rules_groups
+        }
+        # Cache of the walkers computed by the workers, used to evaluate the rules consuming them
+        cache = WalkersCache(
+            budget=WalkersBudget(max_visited_nodes=max_visited_nodes, timeout=timeout, cancel_event=cancel_event),
+            lazy_dereferencing=lazy_dereferencing,
+        )
+        try:
+            for future in _as_completed(list(walkers_futures) + list(rules_futures), cancel_event):
+                if future in walkers_futures:
+                    cache.import_results(future.result(), old_spec, new_spec)
+                    rules_messages = _iter_validate_rules(
+                        old_spec, new_spec, walkers_plan.computed(walkers_futures[future]),
+                        timeout=timeout, max_visited_nodes=max_visited_nodes, cache=cache, cancel_event=cancel_event,
+                    )  # type: typing.Iterable[typing.Tuple[typing.Type[RuleProtocol], ValidationMessage]]
+                else:
+                    rules_messages = (
+                        (rule, message)
+                        for rule, messages in zip(rules_futures[future], future.result())
+                        for message in messages
+                    )
+                for rule, message in rules_messages:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    yield rule, message
+                    if fail_fast and message.level is Level.ERROR:
+                        return
+        finally:
+            for future in chain(walkers_futures, rules_futures):
+                future.cancel()
+            tasks_cancel_event.set()
+            if not isinstance(executor, Executor) and not all(future.done() for future in chain(walkers_futures, rules_futures)):
+                # Stopped earlier (ie. fail-fast or cancelled), the tasks still running are not waited for
+                shutdown_now(rules_executor)
+            submitter.close()
+            cache.clear()
 
 
 def compatibility_status(
     old_spec,  # type: Spec
     new_spec,  # type: Spec
     rules=_ALL_RULES(),  # type: typing.Union[_ALL_RULES, typing.Iterable[typing.Type[RuleProtocol]]]
+    executor=ExecutorType.PROCESS,  # type: typing.Union[ExecutorType, Executor]
+    jobs=None,  # type: typing.Optional[int]
+    fail_fast=False,  # type: bool
+    timeout=None,  # type: typing.Optional[float]
+    max_visited_nodes=None,  # type: typing.Optional[int]
+    cancel_event=None,  # type: typing.Optional[threading.Event]
+    lazy_dereferencing=False,  # type: bool
 ):
     # type: (...) -> typing.Mapping[typing.Type[RuleProtocol], typing.Iterable[ValidationMessage]]
+    """
+    Evaluate the rules on the old and new specs.
+
+    Check `iter_compatibility_status` for details about `executor`, `jobs`, `fail_fast`, `timeout`,
+    `max_visited_nodes`, `cancel_event` and `lazy_dereferencing`.
+    NOTE: in fail-fast mode the messages of the rules not evaluated yet are not reported.
+    """
 
     if isinstance(rules, _ALL_RULES):
         rules = RuleRegistry.rules()
 
     rules_list = list(rules)
-
-    args_list = [
-        (old_spec, new_spec, rule)
+    rules_to_error_level_mapping = {
+        rule: []
         for rule in rules_list
-    ]
+    }  # type: typing.Dict[typing.Type[RuleProtocol], typing.List[ValidationMessage]]
+    for rule, message in iter_compatibility_status(
+        old_spec, new_spec, rules_list, executor=executor, jobs=jobs, fail_fast=fail_fast,
+        timeout=timeout, max_visited_nodes=max_visited_nodes, cancel_event=cancel_event,
+        lazy_dereferencing=lazy_dereferencing,
+    ):
+        rules_to_error_level_mapping[rule].append(message)
 
-    pool = Pool(processes=4)
-    results = pool.map(multi_run_wrapper, args_list)
-    pool.terminate()
+    return rules_to_error_level_mapping
 
-    rules_to_error_level_mapping = {
-        rules_list[i]: results[i]
-        for i in range(len(rules_list))
-    }
 
-    return rules_to_error_level_mapping
+def error_description(error):
+    # type: (Exception) -> typing.Text
+    # Errors are reported as text as exceptions might not be serializable
+    return '{}: {}'.format(error.__class__.__name__, error)
+
+
+def _compatibility_status_of_uris(
+    old_spec_uri,  # type: typing.Text
+    new_spec_uri,  # type: typing.Text
+    rules,  # type: typing.Sequence[typing.Type[RuleProtocol]]
+    timeout=None,  # type: typing.Optional[float]
+    max_visited_nodes=None,  # type: typing.Optional[int]
+    new_spec=None,  # type: typing.Optional[Spec]
+):
+    # type: (...) -> SpecsPairStatus
+    """
+    Evaluate the rules on the specs pair, `new_spec` (if provided) is used instead of loading `new_spec_uri`.
+    """
+    try:
+        old_spec = load_spec_from_uri(old_spec_uri)
+        if new_spec is None:
+            new_spec = load_spec_from_uri(new_spec_uri)
+        rules_messages = validate_rules_group(old_spec, new_spec, rules, timeout=timeout, max_visited_nodes=max_visited_nodes)
+    except Exception as e:
+        return SpecsPairStatus(
+            old_spec_uri=old_spec_uri,
+            new_spec_uri=new_spec_uri,
+            status=None,
+            error=error_description(e),
+        )
+    return SpecsPairStatus(
+        old_spec_uri=old_spec_uri,
+        new_spec_uri=new_spec_uri,
+        status=dict(zip(rules, rules_messages)),
+        error=None,
+    )
+
+
+def _compatibility_status_of_uris_in_worker(
+    specs_key,  # type: typing.Text
+    new_spec_path,  # type: typing.Optional[typing.Text]
+    old_spec_uri,  # type: typing.Text
+    new_spec_uri,  # type: typing.Text
+    rules,  # type: typing.Sequence[typing.Type[RuleProtocol]]
+    timeout=None,  # type: typing.Optional[float]
+    max_visited_nodes=None,  # type: typing.Optional[int]
+):
+    # type: (...) -> SpecsPairStatus
+    return _compatibility_status_of_uris(
+        old_spec_uri, new_spec_uri, rules, timeout, max_visited_nodes,
+        new_spec=_get_worker_new_spec(specs_key, new_spec_path),
+    )
+
+
+def compatibility_status_many(
+    specs_uris,  # type: typing.Iterable[typing.Tuple[typing.Text, typing.Text]]
+    rules=_ALL_RULES(),  # type: typing.Union[_ALL_RULES, typing.Iterable[typing.Type[RuleProtocol]]]
+    executor=ExecutorType.PROCESS,  # type: typing.Union[ExecutorType, Executor]
+    jobs=None,  # type: typing.Optional[int]
+    timeout=None,  # type: typing.Optional[float]
+    max_visited_nodes=None,  # type: typing.Optional[int]
+):
+    # type: (...) -> typing.Generator[SpecsPairStatus, None, None]
+    """
+    Evaluate the rules on many (old spec URI, new spec URI) pairs, yielding the status of each pair.
+
+    The pairs are distributed across the workers of `executor`. Each worker loads the specs of a
+    pair and evaluates all the rules on them, so loading and rules evaluation of different pairs
+    overlap. Statuses are yielded in completion order. Pairs that could not be loaded or evaluated
+    report the error instead of failing the whole batch.
+    NOTE: tasks still pending are cancelled if the generator is closed before being exhausted.
+
+    Check `iter_compatibility_status` for details about the other parameters.
+    """
+
+    if isinstance(rules, _ALL_RULES):
+        rules = RuleRegistry.rules()
+    rules = list(rules)
+    specs_uris = list(specs_uris)
+
+    with get_executor(executor, jobs=max(1, min(jobs or available_cpus(), len(specs_uris)))) as pairs_executor:
+        if isinstance(pairs_executor, SerialExecutor):
+            # Evaluate the pairs only when requested, as SerialExecutor evaluates them on submission
+            for old_spec_uri, new_spec_uri in specs_uris:
+                yield _compatibility_status_of_uris(old_spec_uri, new_spec_uri, rules, timeout, max_visited_nodes)
+            return
+
+        futures = [
+            pairs_executor.submit(_compatibility_status_of_uris, old_spec_uri, new_spec_uri, rules, timeout, max_visited_nodes)
+            for old_spec_uri, new_spec_uri in specs_uris
+        ]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def compatibility_status_chain(
+    specs_uris,  # type: typing.Iterable[typing.Text]
+    rules=_ALL_RULES(),  # type: typing.Union[_ALL_RULES, typing.Iterable[typing.Type[RuleProtocol]]]
+    executor=ExecutorType.PROCESS,  # type: typing.Union[ExecutorType, Executor]
+    jobs=None,  # type: typing.Optional[int]
+    timeout=None,  # type: typing.Optional[float]
+    max_visited_nodes=None,  # type: typing.Optional[int]
+):
+    # type: (...) -> typing.Generator[SpecsPairStatus, None, None]
+    """
+    Evaluate the rules on each transition of an ordered history of specs (v1 -> v2 -> ... -> vN),
+    yielding the status of each transition in history order.
+
+    Each spec is loaded exactly once and at most two specs are kept in memory, so the memory usage
+    does not depend on the history length. The same executor is used for all the transitions.
+    Transitions involving a spec that could not be loaded report the error.
+
+    Check `iter_compatibility_status` for details about the other parameters.
+    """
+
+    if isinstance(rules, _ALL_RULES):
+        rules = RuleRegistry.rules()
+    rules = list(rules)
+
+    with get_executor(executor, jobs=jobs) as chain_executor:
+        previous_spec_uri = None  # type: typing.Optional[typing.Text]
+        previous_spec = None  # type: typing.Optional[Spec]
+        previous_error = None  # type: typing.Optional[typing.Text]
+        for spec_uri in specs_uris:
+            spec = None  # type: typing.Optional[Spec]
+            error = None  # type: typing.Optional[typing.Text]
+            try:
+                # Not cached as the cache would keep an additional spec alive
+                spec = load_uncached_spec_from_uri(spec_uri)
+            except Exception as e:
+                error = error_description(e)
+
+            if previous_spec_uri is not None:
+                if previous_spec is None or spec is None:
+                    yield SpecsPairStatus(
+                        old_spec_uri=previous_spec_uri,
+                        new_spec_uri=spec_uri,
+                        status=None,
+                        error=previous_error or error,
+                    )
+                else:
+                    yield SpecsPairStatus(
+                        old_spec_uri=previous_spec_uri,
+                        new_spec_uri=spec_uri,
+                        status=compatibility_status(
+                            old_spec=previous_spec,
+                            new_spec=spec,
+                            rules=rules,
+                            executor=chain_executor,
+                            jobs=jobs,
+                            timeout=timeout,
+                            max_visited_nodes=max_visited_nodes,
+                        ),  # type: ignore  # compatibility_status returns lists of messages
+                        error=None,
+                    )
+
+            # The old spec is released before loading the following one
+            previous_spec_uri, previous_spec, previous_error = spec_uri, spec, error
+
+
+def compatibility_status_matrix(
+    new_spec_uri,  # type: typing.Text
+    old_specs_uris,  # type: typing.Iterable[typing.Text]
+    rules=_ALL_RULES(),  # type: typing.Union[_ALL_RULES, typing.Iterable[typing.Type[RuleProtocol]]]
+    executor=ExecutorType.PROCESS,  # type: typing.Union[ExecutorType, Executor]
+    jobs=None,  # type: typing.Optional[int]
+    timeout=None,  # type: typing.Optional[float]
+    max_visited_nodes=None,  # type: typing.Optional[int]
+):
+    # type: (...) -> typing.Generator[SpecsPairStatus, None, None]
+    """
+    Evaluate the rules of the new spec against many old specs, yielding the status of each (old spec, new spec) pair.
+
+    The new spec is loaded, validated and dereferenced once and the data derived from it (ie. endpoints)
+    is precomputed once, so only the old specs are loaded by the pairs evaluation. The pairs are
+    distributed across the workers of `executor`, process pools created by the library receive the
+    new spec once per worker. Statuses are yielded in completion order.
+    If the new spec could not be loaded all the pairs report the error.
+    NOTE: tasks still pending are cancelled if the generator is closed before being exhausted.
+
+    Check `iter_compatibility_status` for details about the other parameters.
+    """
+
+    if isinstance(rules, _ALL_RULES):
+        rules = RuleRegistry.rules()
+    rules = list(rules)
+    old_specs_uris = list(old_specs_uris)
+
+    try:
+        # Not cached as the cache would not guarantee to keep the spec alive during the whole evaluation
+        new_spec = load_uncached_spec_from_uri(new_spec_uri)
+    except Exception as e:
+        error = error_description(e)
+        for old_spec_uri in old_specs_uris:
+            yield SpecsPairStatus(old_spec_uri=old_spec_uri, new_spec_uri=new_spec_uri, status=None, error=error)
+        return
+    precompute_spec_data(new_spec)
+
+    specs_key = uuid.uuid4().hex
+    with get_executor(
+        executor,
+        jobs=max(1, min(jobs or available_cpus(), len(old_specs_uris))),
+        # Process pools created by the library receive the new spec once per worker
+        initializer=_store_worker_new_spec,
+        initargs=(specs_key, new_spec),
+    ) as pairs_executor:
+        if isinstance(pairs_executor, SerialExecutor):
+            # Evaluate the pairs only when requested, as SerialExecutor evaluates them on submission
+            for old_spec_uri in old_specs_uris:
+                yield _compatibility_status_of_uris(
+                    old_spec_uri, new_spec_uri, rules, timeout, max_visited_nodes, new_spec=new_spec,
+                )
+            return
+
+        new_spec_path = None  # type: typing.Optional[typing.Text]
+        if is_in_process_executor(pairs_executor):
+            futures = [
+                pairs_executor.submit(
+                    _compatibility_status_of_uris, old_spec_uri, new_spec_uri, rules, timeout, max_visited_nodes, new_spec,
+                )
+                for old_spec_uri in old_specs_uris
+            ]
+        else:
+            if executor is not ExecutorType.PROCESS:
+                # Caller supplied workers read the new spec once (process pools created here receive it via the initializer)
+                new_spec_path = _dump_to_temporary_file(new_spec)
+            futures = [
+                pairs_executor.submit(
+                    _compatibility_status_of_uris_in_worker,
+                    specs_key, new_spec_path, old_spec_uri, new_spec_uri, rules, timeout, max_visited_nodes,
+                )
+                for old_spec_uri in old_specs_uris
+            ]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+            if new_spec_path is not None:
+                os.unlink(new_spec_path)
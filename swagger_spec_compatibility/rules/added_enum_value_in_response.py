@@ -13,6 +13,8 @@ from swagger_spec_compatibility.rules.common import RuleType
 from swagger_spec_compatibility.rules.common import ValidationMessage
 from swagger_spec_compatibility.util import is_path_in_top_level_paths
 from swagger_spec_compatibility.walkers import format_path
+from swagger_spec_compatibility.walkers import iter_walker_results
+from swagger_spec_compatibility.walkers import walker_results
 from swagger_spec_compatibility.walkers.enum_values import EnumValuesDifferWalker
 from swagger_spec_compatibility.walkers.response_paths import ResponsePathsWalker
 
@@ -24,13 +26,14 @@ class AddedEnumValueInRequest(BaseRule):
     error_level = Level.ERROR
     rule_type = RuleType.RESPONSE_CONTRACT
     short_name = 'Added Enum value in Response contract'
+    walkers = (ResponsePathsWalker, EnumValuesDifferWalker)
 
     @classmethod
     def validate(cls, left_spec, right_spec):
         # type: (Spec, Spec) -> typing.Iterable[ValidationMessage]
-        response_paths = ResponsePathsWalker(left_spec, right_spec).walk()
+        response_paths = walker_results(ResponsePathsWalker, left_spec, right_spec)
 
-        for enum_values_diff in EnumValuesDifferWalker(left_spec, right_spec).walk():
+        for enum_values_diff in iter_walker_results(EnumValuesDifferWalker, left_spec, right_spec):
             if not enum_values_diff.mapping.new:
                 continue
             if not is_path_in_top_level_paths(response_paths, enum_values_diff.path):
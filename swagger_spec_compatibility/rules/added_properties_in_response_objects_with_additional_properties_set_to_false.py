@@ -13,6 +13,8 @@ from swagger_spec_compatibility.rules.common import RuleType
 from swagger_spec_compatibility.rules.common import ValidationMessage
 from swagger_spec_compatibility.util import is_path_in_top_level_paths
 from swagger_spec_compatibility.walkers import format_path
+from swagger_spec_compatibility.walkers import iter_walker_results
+from swagger_spec_compatibility.walkers import walker_results
 from swagger_spec_compatibility.walkers.additional_properties import AdditionalPropertiesDifferWalker
 from swagger_spec_compatibility.walkers.additional_properties import DiffType
 from swagger_spec_compatibility.walkers.response_paths import ResponsePathsWalker
@@ -28,12 +30,13 @@ class AddedPropertiesInResponseObjectsWithAdditionalPropertiesSetToFalse(BaseRul
     error_level = Level.ERROR
     rule_type = RuleType.RESPONSE_CONTRACT
     short_name = 'Added properties in an object with additionalProperties set to False used in response'
+    walkers = (ResponsePathsWalker, AdditionalPropertiesDifferWalker)
 
     @classmethod
     def validate(cls, left_spec, right_spec):
         # type: (Spec, Spec) -> typing.Iterable[ValidationMessage]
-        response_paths = ResponsePathsWalker(left_spec, right_spec).walk()
-        for additional_properties_diff in AdditionalPropertiesDifferWalker(left_spec, right_spec).walk():
+        response_paths = walker_results(ResponsePathsWalker, left_spec, right_spec)
+        for additional_properties_diff in iter_walker_results(AdditionalPropertiesDifferWalker, left_spec, right_spec):
             if additional_properties_diff.diff_type != DiffType.PROPERTIES:
                 continue
             if additional_properties_diff.properties and not additional_properties_diff.properties.new:
@@ -13,6 +13,8 @@ from swagger_spec_compatibility.rules.common import RuleType
 from swagger_spec_compatibility.rules.common import ValidationMessage
 from swagger_spec_compatibility.util import is_path_in_top_level_paths
 from swagger_spec_compatibility.walkers import format_path
+from swagger_spec_compatibility.walkers import iter_walker_results
+from swagger_spec_compatibility.walkers import walker_results
 from swagger_spec_compatibility.walkers.request_parameters import RequestParametersWalker
 from swagger_spec_compatibility.walkers.required_properties import RequiredPropertiesDifferWalker
 
@@ -25,14 +27,15 @@ class AddedRequiredPropertyInRequest(BaseRule):
     error_level = Level.ERROR
     rule_type = RuleType.REQUEST_CONTRACT
     short_name = 'Added Required Property in Request contract'
+    walkers = (RequestParametersWalker, RequiredPropertiesDifferWalker)
 
     @classmethod
     def validate(cls, left_spec, right_spec):
         # type: (Spec, Spec) -> typing.Iterable[ValidationMessage]
-        request_parameters_paths = RequestParametersWalker(left_spec, right_spec).walk()
+        request_parameters_paths = walker_results(RequestParametersWalker, left_spec, right_spec)
 
         # FIXME: the used walker is not able to merge together parameters defined in different locations
-        for required_property_diff in RequiredPropertiesDifferWalker(left_spec, right_spec).walk():
+        for required_property_diff in iter_walker_results(RequiredPropertiesDifferWalker, left_spec, right_spec):
             if not required_property_diff.mapping.new:
                 continue
             if not is_path_in_top_level_paths(request_parameters_paths, required_property_diff.path):
@@ -12,6 +12,7 @@ from swagger_spec_compatibility.rules.common import Level
 from swagger_spec_compatibility.rules.common import RuleType
 from swagger_spec_compatibility.rules.common import ValidationMessage
 from swagger_spec_compatibility.walkers import format_path
+from swagger_spec_compatibility.walkers import iter_walker_results
 from swagger_spec_compatibility.walkers.additional_properties import AdditionalPropertiesDifferWalker
 from swagger_spec_compatibility.walkers.additional_properties import DiffType
 
@@ -27,11 +28,12 @@ class ChangedAdditionalPropertiesToFalse(BaseRule):
     error_level = Level.ERROR
     rule_type = RuleType.REQUEST_CONTRACT
     short_name = 'Changing additionalProperties to False for a request parameter'
+    walkers = (AdditionalPropertiesDifferWalker,)
 
     @classmethod
     def validate(cls, left_spec, right_spec):
         # type: (Spec, Spec) -> typing.Iterable[ValidationMessage]
-        for additional_properties_diff in AdditionalPropertiesDifferWalker(left_spec, right_spec).walk():
+        for additional_properties_diff in iter_walker_results(AdditionalPropertiesDifferWalker, left_spec, right_spec):
             if additional_properties_diff.diff_type != DiffType.VALUE:
                 continue
             if (
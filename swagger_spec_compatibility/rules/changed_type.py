@@ -13,6 +13,8 @@ from swagger_spec_compatibility.rules.common import RuleType
 from swagger_spec_compatibility.rules.common import ValidationMessage
 from swagger_spec_compatibility.util import is_path_in_top_level_paths
 from swagger_spec_compatibility.walkers import format_path
+from swagger_spec_compatibility.walkers import iter_walker_results
+from swagger_spec_compatibility.walkers import walker_results
 from swagger_spec_compatibility.walkers.changed_types import ChangedTypesDifferWalker
 from swagger_spec_compatibility.walkers.request_parameters import RequestParametersWalker
 from swagger_spec_compatibility.walkers.response_paths import ResponsePathsWalker
@@ -28,15 +30,16 @@ class ChangedType(BaseRule):
     error_level = Level.ERROR
     rule_type = RuleType.MISCELLANEOUS
     short_name = 'Changed type'
+    walkers = (RequestParametersWalker, ResponsePathsWalker, ChangedTypesDifferWalker)
 
     @classmethod
     def validate(cls, left_spec, right_spec):
         # type: (Spec, Spec) -> typing.Iterable[ValidationMessage]
 
-        request_parameter_paths = RequestParametersWalker(left_spec, right_spec).walk()
-        response_paths = ResponsePathsWalker(left_spec, right_spec).walk()
+        request_parameter_paths = walker_results(RequestParametersWalker, left_spec, right_spec)
+        response_paths = walker_results(ResponsePathsWalker, left_spec, right_spec)
 
-        for changed_types_diff in ChangedTypesDifferWalker(left_spec, right_spec).walk():
+        for changed_types_diff in iter_walker_results(ChangedTypesDifferWalker, left_spec, right_spec):
             if (
                 not is_path_in_top_level_paths(request_parameter_paths, changed_types_diff.path) and
                 not is_path_in_top_level_paths(response_paths, changed_types_diff.path)
@@ -16,6 +16,7 @@ from six import with_metaclass
 from termcolor import colored
 
 from swagger_spec_compatibility.util import wrap
+from swagger_spec_compatibility.walkers import SchemaWalker
 
 
 def _read_the_docs_link(rule):
@@ -41,6 +42,9 @@ def get_rule_documentation_link(rule):
         return None
 
 
+R = typing.TypeVar('R', bound='BaseRule')
+
+
 class RuleRegistry(ABCMeta):
     _REGISTRY = {}  # type: typing.MutableMapping[typing.Text, typing.Type['BaseRule']]
 
@@ -52,6 +56,10 @@ class RuleRegistry(ABCMeta):
         assert getattr(cls, 'description', None) is not None, 'description is a required class attribute for {}'.format(cls)
         assert getattr(cls, 'error_level', None) is not None, 'error_level is a required class attribute for {}'.format(cls)
         assert getattr(cls, 'rule_type', None) is not None, 'rule_type is a required class attribute for {}'.format(cls)
+        assert all(
+            isinstance(walker, type) and issubclass(walker, SchemaWalker)
+            for walker in getattr(cls, 'walkers', ())
+        ), 'walkers should contain only SchemaWalker subclasses for {}'.format(cls)
 
     @classmethod
     def _prevent_rule_duplication(mcs, cls):
@@ -115,6 +123,8 @@ class Level(IntEnum):
     INFO = 0
     WARNING = 1
     ERROR = 2
+    # Reported by the library, and not by the rules, if a rule could not be fully evaluated (ie. budget exceeded)
+    INCOMPLETE = 3
 
 
 class RuleProtocol(typing_extensions.Protocol):
@@ -130,6 +140,9 @@ class RuleProtocol(typing_extensions.Protocol):
     rule_type = None  # type: typing_extensions.ClassVar[RuleType]
     # Documentation link
     documentation_link = None  # type: typing_extensions.ClassVar[typing.Optional[typing.Text]]
+    # Walkers whose results are consumed by the rule (via walkers.walker_results).
+    # Declaring them allows to traverse the specs only once for all the rules
+    walkers = ()  # type: typing_extensions.ClassVar[typing.Sequence[typing.Type[SchemaWalker[typing.Any]]]]
 
     @classmethod
     def validate(cls, left_spec, right_spec):
@@ -179,6 +192,9 @@ class BaseRule(with_metaclass(RuleRegistry)):
     rule_type = None  # type: typing_extensions.ClassVar[RuleType]
     # Documentation link
     documentation_link = None  # type: typing_extensions.ClassVar[typing.Optional[typing.Text]]
+    # Walkers whose results are consumed by the rule (via walkers.walker_results), check also `uses_walkers`.
+    # Declaring them allows to traverse the specs only once for all the rules
+    walkers = ()  # type: typing_extensions.ClassVar[typing.Sequence[typing.Type[SchemaWalker[typing.Any]]]]
 
     def __init__(self):
         # type: () -> None
@@ -209,3 +225,25 @@ class BaseRule(with_metaclass(RuleRegistry)):
             rule=cls,
             reference=reference,
         )
+
+
+def uses_walkers(*walker_classes):
+    # type: (*typing.Type[SchemaWalker[typing.Any]]) -> typing.Callable[[typing.Type[R]], typing.Type[R]]
+    """
+    Class decorator declaring the walkers consumed by a rule (alternative to set `BaseRule.walkers`).
+
+    The walkers declared by the rules are computed once per run, and shared by all the rules.
+    """
+    assert all(
+        isinstance(walker, type) and issubclass(walker, SchemaWalker)
+        for walker in walker_classes
+    ), 'uses_walkers accepts only SchemaWalker subclasses'
+
+    def decorator(rule):
+        # type: (typing.Type[R]) -> typing.Type[R]
+        rule.walkers = tuple(rule.walkers) + tuple(  # type: ignore  # mypy does not allow to assign ClassVars
+            walker for walker in walker_classes if walker not in rule.walkers
+        )
+        return rule
+
+    return decorator
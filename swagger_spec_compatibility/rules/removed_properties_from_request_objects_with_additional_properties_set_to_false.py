@@ -13,6 +13,8 @@ from swagger_spec_compatibility.rules.common import RuleType
 from swagger_spec_compatibility.rules.common import ValidationMessage
 from swagger_spec_compatibility.util import is_path_in_top_level_paths
 from swagger_spec_compatibility.walkers import format_path
+from swagger_spec_compatibility.walkers import iter_walker_results
+from swagger_spec_compatibility.walkers import walker_results
 from swagger_spec_compatibility.walkers.additional_properties import AdditionalPropertiesDifferWalker
 from swagger_spec_compatibility.walkers.additional_properties import DiffType
 from swagger_spec_compatibility.walkers.request_parameters import RequestParametersWalker
@@ -28,12 +30,13 @@ class RemovedPropertiesFromRequestObjectsWithAdditionalPropertiesSetToFalse(Base
     error_level = Level.ERROR
     rule_type = RuleType.REQUEST_CONTRACT
     short_name = 'Removing properties from an object with additionalProperties set to False used as request parameter'
+    walkers = (RequestParametersWalker, AdditionalPropertiesDifferWalker)
 
     @classmethod
     def validate(cls, left_spec, right_spec):
         # type: (Spec, Spec) -> typing.Iterable[ValidationMessage]
-        request_parameter_paths = RequestParametersWalker(left_spec, right_spec).walk()
-        for additional_properties_diff in AdditionalPropertiesDifferWalker(left_spec, right_spec).walk():
+        request_parameter_paths = walker_results(RequestParametersWalker, left_spec, right_spec)
+        for additional_properties_diff in iter_walker_results(AdditionalPropertiesDifferWalker, left_spec, right_spec):
             if additional_properties_diff.diff_type != DiffType.PROPERTIES:
                 continue
             if additional_properties_diff.properties and not additional_properties_diff.properties.old:
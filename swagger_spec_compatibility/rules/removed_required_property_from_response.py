@@ -13,6 +13,8 @@ from swagger_spec_compatibility.rules.common import RuleType
 from swagger_spec_compatibility.rules.common import ValidationMessage
 from swagger_spec_compatibility.util import is_path_in_top_level_paths
 from swagger_spec_compatibility.walkers import format_path
+from swagger_spec_compatibility.walkers import iter_walker_results
+from swagger_spec_compatibility.walkers import walker_results
 from swagger_spec_compatibility.walkers.required_properties import RequiredPropertiesDifferWalker
 from swagger_spec_compatibility.walkers.response_paths import ResponsePathsWalker
 
@@ -27,12 +29,13 @@ class RemovedRequiredPropertyFromResponse(BaseRule):
     error_code = 'RES-E002'
     rule_type = RuleType.RESPONSE_CONTRACT
     short_name = 'Removed Required Property from Response contract'
+    walkers = (ResponsePathsWalker, RequiredPropertiesDifferWalker)
 
     @classmethod
     def validate(cls, left_spec, right_spec):
         # type: (Spec, Spec) -> typing.Iterable[ValidationMessage]
-        response_paths = ResponsePathsWalker(left_spec, right_spec).walk()
-        for required_property_diff in RequiredPropertiesDifferWalker(left_spec, right_spec).walk():
+        response_paths = walker_results(ResponsePathsWalker, left_spec, right_spec)
+        for required_property_diff in iter_walker_results(RequiredPropertiesDifferWalker, left_spec, right_spec):
             if not required_property_diff.mapping.old:
                 continue
             if not is_path_in_top_level_paths(response_paths, required_property_diff.path):
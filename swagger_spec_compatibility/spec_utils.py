@@ -3,20 +3,80 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import bz2
+import json
+import mmap
+import os
 import typing
+import zlib
+from collections import OrderedDict
+from contextlib import closing
 from enum import Enum
 from itertools import chain
 
-from bravado.client import SwaggerClient
+import yaml
 from bravado_core.operation import Operation
 from bravado_core.spec import Spec
 from bravado_core.util import determine_object_type
 from bravado_core.util import ObjectType
+from bravado_core.util import strip_xscope
+from six import iteritems
 from six import iterkeys
+from six import itervalues
+from six.moves.urllib.parse import urlparse
+from six.moves.urllib.request import urlopen
 from swagger_spec_validator.validator20 import get_collapsed_properties_type_mappings
 
-from swagger_spec_compatibility.cache import typed_lru_cache
+from swagger_spec_compatibility.cache import content_hash
+from swagger_spec_compatibility.cache import ContentHashCache
+from swagger_spec_compatibility.cache import typed_lifetime_cache
+from swagger_spec_compatibility.executors import ExecutorType
+from swagger_spec_compatibility.executors import get_executor
+from swagger_spec_compatibility.git import GitSpec
+from swagger_spec_compatibility.git import is_git_uri
+from swagger_spec_compatibility.git import read_git_uri
+from swagger_spec_compatibility.git import resolve_git_uri
+from swagger_spec_compatibility.http_cache import is_http_uri
+from swagger_spec_compatibility.http_cache import load_http_document
+from swagger_spec_compatibility.http_cache import read_http_uri
+from swagger_spec_compatibility.interning import SpecsInterner
+from swagger_spec_compatibility.lightweight_spec import LightweightSpec
+from swagger_spec_compatibility.profiling import TIMINGS
+from swagger_spec_compatibility.streaming import is_streaming_available
+from swagger_spec_compatibility.streaming import local_file_path
+from swagger_spec_compatibility.streaming import mapped_file
+from swagger_spec_compatibility.streaming import parse_json_file
 from swagger_spec_compatibility.util import EntityMapping
+from swagger_spec_compatibility.validation import referenced_uris
+
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml based, much faster than the pure python loader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader  # type: ignore
+
+try:
+    import lzma
+except ImportError:  # pragma: no cover  # py<3.3
+    lzma = None
+
+
+class SpecFormat(Enum):
+    JSON = 'json'
+    YAML = 'yaml'
+
+
+def _gzip_decompress(content):
+    # type: (bytes) -> bytes
+    return zlib.decompress(content, 16 + zlib.MAX_WBITS)  # 16 + MAX_WBITS expects the gzip header
+
+
+# (magic bytes, file extension, decompression function) of the supported compression formats
+_COMPRESSIONS = [
+    (b'\x1f\x8b', '.gz', _gzip_decompress),
+    (b'BZh', '.bz2', bz2.decompress),
+]  # type: typing.List[typing.Tuple[bytes, typing.Text, typing.Callable[[bytes], bytes]]]
+if lzma is not None:  # pragma: no branch
+    _COMPRESSIONS.append((b'\xfd7zXZ\x00', '.xz', lzma.decompress))
 
 
 class HTTPVerb(Enum):
@@ -63,18 +123,327 @@ class Endpoint(
         return isinstance(other, self.__class__) and self.http_verb == other.http_verb and self.path == other.path
 
 
-@typed_lru_cache(maxsize=2)
-def load_spec_from_uri(uri):
-    # type: (typing.Text) -> Spec
-    return SwaggerClient.from_url(uri, config={'internally_dereference_refs': True}).swagger_spec
+def load_uncached_spec_from_uri(uri, validate=True, interner=None, lazy_dereferencing=False):
+    # type: (typing.Text, bool, typing.Optional[SpecsInterner], bool) -> Spec
+    """
+    Load the spec without caching it, this allows the caller to fully control the lifetime of the spec.
+
+    Besides the URIs supported by urllib, ``git:<rev>:<path>`` URIs load the spec, and the files
+    it references, from the given revision of the git repository of the current working directory.
+
+    The documents referenced via $ref are parsed once per process, and shared by all the specs referencing
+    them, as long as their content does not change (check ``reference_documents.REFERENCE_DOCUMENTS_CACHE``).
+
+    :param validate: False skips the validation of the spec, meant for trusted (ie. already validated) specs
+    :param interner: interner sharing the identical subtrees of the specs loaded with it (check `SpecsInterner`)
+    :param lazy_dereferencing: build the operations from the lazily dereferenced spec (check `lazily_dereferenced_spec`)
+    """
+    path = streamable_file_path(uri)
+    if path is not None:
+        return _load_spec_from_streamable_file(
+            path, origin_url=uri, validate=validate, interner=interner, lazy_dereferencing=lazy_dereferencing,
+        )
+    return load_spec_from_content(
+        read_spec_content(uri), origin_url=uri, validate=validate, interner=interner, lazy_dereferencing=lazy_dereferencing,
+    )
+
+
+# Specs loaded by load_spec_from_uri, bounded by the total size of the specs content (64 MiB by default).
+# The bounds could be changed via ``SPECS_CACHE.resize`` and specs could be dropped via ``SPECS_CACHE.invalidate``.
+SPECS_CACHE = ContentHashCache(max_size=64 * 1024 * 1024)  # type: ContentHashCache[Spec]
+
+
+def _spec_key(uri, content, validate, interner, lazy_dereferencing):
+    # type: (typing.Text, typing.Union[bytes, mmap.mmap], bool, typing.Optional[SpecsInterner], bool) -> typing.Text
+    """
+    Key of the spec in the specs caches, the same content is loaded differently depending on the loading mode.
+    """
+    return content_hash(
+        uri,
+        content,
+        # Trusted specs are not validated, so they are not shared with the validated ones
+        'validated' if validate else 'trusted',
+        'lazy' if lazy_dereferencing else 'eager',
+        # Interned specs share their subtrees only with the specs loaded with the same interner
+        '' if interner is None else 'interner:{}'.format(id(interner)),
+    )
+
+
+# Attributes of the cached specs storing the hashes of the content of the documents they reference (by URI)
+# and the key of the content they were loaded from (check `spec_content_key`)
+_REFERENCES_HASHES_ATTRIBUTE = '_cached_references_hashes'
+_CONTENT_KEY_ATTRIBUTE = '_cached_content_key'
+
+
+def _reference_hash(uri, remote_documents):
+    # type: (typing.Text, typing.Mapping[typing.Text, typing.Any]) -> typing.Text
+    if is_http_uri(uri):
+        # HTTP(S) documents are hashed by their parsed content, so the documents prefetched
+        # while loading the spec (check `LightweightSpec.remote_documents`) are not fetched again
+        document = remote_documents.get(uri.partition('#')[0])
+        if document is None:
+            document = load_http_document(uri)
+        return content_hash(json.dumps(strip_xscope(document), sort_keys=True, default=str))
+    return content_hash(read_spec_content(uri))
+
+
+def _references_changed(spec, remote_documents):
+    # type: (Spec, typing.Mapping[typing.Text, typing.Any]) -> bool
+    """
+    Check if the content of any document referenced by the cached spec changed since it was loaded.
+
+    The documents resolved after loading the spec (ie. while lazily dereferenced) are tracked from the first check.
+    """
+    references_hashes = spec.__dict__.setdefault(_REFERENCES_HASHES_ATTRIBUTE, {})
+    for reference in referenced_uris(spec):
+        try:
+            reference_hash = _reference_hash(reference, remote_documents)
+        except Exception:  # Referenced documents not available anymore
+            return True
+        if references_hashes.setdefault(reference, reference_hash) != reference_hash:
+            return True
+    return False
+
+
+def get_or_load_spec(specs_cache, key, loader, size=0):
+    # type: (ContentHashCache[Spec], typing.Text, typing.Callable[[], Spec], int) -> Spec
+    """
+    Get the spec cached with `key`, or load it via `loader` and cache it (check `ContentHashCache.get_or_load`).
+
+    Cached specs referencing documents whose content changed since they were loaded are loaded again.
+    """
+    loaded = []  # type: typing.List[Spec]
+
+    def load():
+        # type: () -> Spec
+        spec = loader()
+        # Records the hashes of the referenced documents
+        _references_changed(spec, getattr(spec, 'remote_documents', {}))
+        spec.__dict__[_CONTENT_KEY_ATTRIBUTE] = content_hash(
+            key,
+            *(part for reference_hash in sorted(iteritems(spec.__dict__[_REFERENCES_HASHES_ATTRIBUTE])) for part in reference_hash)
+        )
+        loaded.append(spec)
+        return spec
+
+    spec = specs_cache.get_or_load(key, load, size=size)
+    if not loaded and _references_changed(spec, {}):
+        specs_cache.invalidate(key)
+        spec = specs_cache.get_or_load(key, load, size=size)
+    return spec
+
+
+def spec_content_key(spec):
+    # type: (Spec) -> typing.Optional[typing.Text]
+    """
+    Key of the content (including the referenced documents) and of the loading mode of a spec loaded
+    via a specs cache (check `get_or_load_spec`), None for the other specs.
+    Specs with the same content key are interchangeable.
+    """
+    return spec.__dict__.get(_CONTENT_KEY_ATTRIBUTE)
+
+
+def load_spec_from_uri(uri, specs_cache=None, validate=True, interner=None, lazy_dereferencing=False):
+    # type: (typing.Text, typing.Optional[ContentHashCache[Spec]], bool, typing.Optional[SpecsInterner], bool) -> Spec
+    """
+    Load the spec, caching it in `specs_cache` (default: ``SPECS_CACHE``) by its URI, content and loading mode.
+
+    The content of the spec is read on each call, so specs modified under the same URI are loaded
+    again. The same holds for the documents referenced via $ref, as the cached specs are loaded
+    again if the content of any of them changed.
 
+    Large local JSON specs are hashed and parsed from their memory mapping (check `streamable_file_path`).
 
-def load_spec_from_spec_dict(spec_dict):
-    # type: (typing.Mapping[typing.Text, typing.Any]) -> Spec
-    return SwaggerClient.from_spec(spec_dict, origin_url='', config={'internally_dereference_refs': True}).swagger_spec
+    :param validate: False skips the validation of the spec, meant for trusted (ie. already validated) specs
+    :param interner: interner sharing the identical subtrees of the specs loaded with it (check `SpecsInterner`)
+    :param lazy_dereferencing: build the operations from the lazily dereferenced spec (check `lazily_dereferenced_spec`)
+    """
+    if is_git_uri(uri):
+        # The canonical URI refers to the commit, so it is part of the key as well
+        uri = resolve_git_uri(uri)
+    specs_cache = SPECS_CACHE if specs_cache is None else specs_cache
+    path = streamable_file_path(uri)
+    if path is not None:
+        with mapped_file(path) as mapped_content:
+            key = _spec_key(uri, mapped_content, validate, interner, lazy_dereferencing)
+            size = len(mapped_content)
+        return get_or_load_spec(
+            specs_cache,
+            key,
+            lambda: _load_spec_from_streamable_file(
+                typing.cast(typing.Text, path), origin_url=uri, validate=validate, interner=interner,
+                lazy_dereferencing=lazy_dereferencing,
+            ),
+            size=size,
+        )
+
+    content = read_spec_content(uri)
+    return get_or_load_spec(
+        specs_cache,
+        _spec_key(uri, content, validate, interner, lazy_dereferencing),
+        lambda: load_spec_from_content(
+            content, origin_url=uri, validate=validate, interner=interner, lazy_dereferencing=lazy_dereferencing,
+        ),
+        size=len(content),
+    )
+
+
+def load_specs_concurrently(
+    uris,  # type: typing.Iterable[typing.Text]
+    load_spec=load_spec_from_uri,  # type: typing.Callable[..., Spec]
+    executor=ExecutorType.THREAD,  # type: ExecutorType
+    **load_spec_kwargs  # type: typing.Any
+):
+    # type: (...) -> typing.List[Spec]
+    """
+    Load the specs, and the documents they reference, concurrently via `load_spec(uri, **load_spec_kwargs)`.
+    The specs are returned in the same order of `uris`, repeated URIs are loaded once.
+
+    Threads overlap the I/O bound part of the loading (ie. fetching remote specs), while processes
+    overlap the CPU bound part (parsing, validation and dereferencing) at the cost of sending the
+    loaded specs back to the current process. NOTE: `load_spec` and its arguments have to be
+    pickleable in order to use processes.
+    """
+    uris = list(uris)
+    unique_uris = list(OrderedDict.fromkeys(uris))
+    with get_executor(executor, jobs=len(unique_uris)) as load_executor:
+        futures = {uri: load_executor.submit(load_spec, uri, **load_spec_kwargs) for uri in unique_uris}
+        return [futures[uri].result() for uri in uris]
+
+
+def load_spec_from_spec_dict(spec_dict, origin_url='', validate=True, interner=None, lazy_dereferencing=False):
+    # type: (typing.Mapping[typing.Text, typing.Any], typing.Text, bool, typing.Optional[SpecsInterner], bool) -> Spec
+    """
+    Load the spec as :class:`LightweightSpec`, building only what the rules rely on.
+
+    :param validate: False skips the validation of the spec, meant for trusted (ie. already validated) specs
+    :param interner: interner sharing the identical subtrees of the specs loaded with it (check `SpecsInterner`)
+    :param lazy_dereferencing: build the operations from the lazily dereferenced spec (check `lazily_dereferenced_spec`)
+    """
+    if interner is not None:
+        with TIMINGS.measure('interning'):
+            spec_dict = interner.intern(spec_dict)
+    config = {'validate_swagger_spec': validate, 'lazy_dereferencing': lazy_dereferencing}
+    if is_git_uri(origin_url):
+        # The references are resolved within the git revision of the spec
+        return GitSpec.from_dict(spec_dict, origin_url=resolve_git_uri(origin_url), config=config)
+    return LightweightSpec.from_dict(spec_dict, origin_url=origin_url, config=config)
+
+
+def read_spec_content(uri):
+    # type: (typing.Text) -> bytes
+    """
+    Read the raw content of the spec, without parsing it.
+    """
+    if is_git_uri(uri):
+        return read_git_uri(uri)
+    if is_http_uri(uri):
+        return read_http_uri(uri)
+    with closing(urlopen(uri)) as f:
+        return f.read()
+
+
+# Local JSON specs at least this large (in bytes) are parsed incrementally, if ijson is installed
+STREAMING_MIN_SIZE = 16 * 1024 * 1024
+# Bytes inspected to detect the format of the spec
+_HEAD_SIZE = 1024
+
+
+def streamable_file_path(uri):
+    # type: (typing.Text) -> typing.Optional[typing.Text]
+    """
+    Path of the spec file, if the spec should be parsed incrementally from its memory mapping instead of
+    from its content: the spec is a local not compressed JSON file of at least ``STREAMING_MIN_SIZE`` bytes
+    and ijson is installed. Otherwise None.
+    """
+    path = local_file_path(uri)
+    if not is_streaming_available() or path is None or not os.path.isfile(path) or os.path.getsize(path) < STREAMING_MIN_SIZE:
+        return None
+    with mapped_file(path) as mapped_content:
+        head = mapped_content[:_HEAD_SIZE]
+    if any(head.startswith(magic_bytes) for magic_bytes, _, _ in _COMPRESSIONS):
+        return None
+    return path if detect_spec_format(head, uri) is SpecFormat.JSON else None
+
+
+def _load_spec_from_streamable_file(path, origin_url, validate=True, interner=None, lazy_dereferencing=False):
+    # type: (typing.Text, typing.Text, bool, typing.Optional[SpecsInterner], bool) -> Spec
+    with TIMINGS.measure('parsing'):
+        spec_dict = parse_json_file(path)
+    return load_spec_from_spec_dict(
+        spec_dict, origin_url=origin_url, validate=validate, interner=interner, lazy_dereferencing=lazy_dereferencing,
+    )
+
+
+def decompress_spec_content(content):
+    # type: (bytes) -> bytes
+    """
+    Decompress gzip, bz2 or xz compressed content, detected by its magic bytes.
+    Not compressed content is returned as is.
+    """
+    for magic_bytes, _, decompress in _COMPRESSIONS:
+        if content.startswith(magic_bytes):
+            return decompress(content)
+    return content
+
+
+def detect_spec_format(content, origin_url):
+    # type: (bytes, typing.Text) -> SpecFormat
+    """
+    Detect the format of the (decompressed) spec content, according to the origin url extension
+    (ignoring the compression extension, ie. ``swagger.yaml.gz``) or, if not conclusive, to the content.
+    """
+    path = urlparse(origin_url).path.lower()
+    for _, extension, _ in _COMPRESSIONS:
+        if path.endswith(extension):
+            path = path[:-len(extension)]
+    if path.endswith(('.yaml', '.yml')):
+        return SpecFormat.YAML
+    elif path.endswith('.json'):
+        return SpecFormat.JSON
+    # JSON specs are objects, YAML specs hardly start with a flow mapping
+    return SpecFormat.JSON if content.lstrip()[:1] == b'{' else SpecFormat.YAML
 
 
-@typed_lru_cache(maxsize=2)
+def parse_spec_content(content, origin_url):
+    # type: (bytes, typing.Text) -> typing.Dict[typing.Text, typing.Any]
+    """
+    Parse the raw, eventually compressed, content of the spec. The time spent is accounted as parsing.
+    """
+    with TIMINGS.measure('parsing'):
+        content = decompress_spec_content(content)
+        if detect_spec_format(content, origin_url) is SpecFormat.JSON:
+            return typing.cast(typing.Dict[typing.Text, typing.Any], json.loads(content.decode('utf-8')))
+
+        spec_dict = yaml.load(content, Loader=SafeLoader)
+        # YAML parses not quoted status codes as integers, while they are strings in JSON specs
+        for path_spec in itervalues(spec_dict.get('paths') or {}):
+            for operation_spec in itervalues(path_spec):
+                if isinstance(operation_spec, dict) and isinstance(operation_spec.get('responses'), dict):
+                    operation_spec['responses'] = {
+                        str(status_code): response
+                        for status_code, response in iteritems(operation_spec['responses'])
+                    }
+        return typing.cast(typing.Dict[typing.Text, typing.Any], spec_dict)
+
+
+def load_spec_from_content(content, origin_url, validate=True, interner=None, lazy_dereferencing=False):
+    # type: (bytes, typing.Text, bool, typing.Optional[SpecsInterner], bool) -> Spec
+    """
+    Load the spec from its raw content, parsed via :func:`parse_spec_content`.
+    The origin url is used to detect the format and to resolve the relative references.
+
+    :param validate: False skips the validation of the spec, meant for trusted (ie. already validated) specs
+    :param interner: interner sharing the identical subtrees of the specs loaded with it (check `SpecsInterner`)
+    :param lazy_dereferencing: build the operations from the lazily dereferenced spec (check `lazily_dereferenced_spec`)
+    """
+    return load_spec_from_spec_dict(
+        parse_spec_content(content, origin_url), origin_url=origin_url, validate=validate, interner=interner,
+        lazy_dereferencing=lazy_dereferencing,
+    )
+
+
+@typed_lifetime_cache
 def get_operations(spec):
     # type: (Spec) -> typing.List[Operation]
     return [
@@ -84,7 +453,7 @@ def get_operations(spec):
     ]
 
 
-@typed_lru_cache(maxsize=2)
+@typed_lifetime_cache
 def get_endpoints(spec):
     # type: (Spec) -> typing.Set[Endpoint]
     return {
@@ -93,6 +462,15 @@ def get_endpoints(spec):
     }
 
 
+def precompute_spec_data(spec):
+    # type: (Spec) -> None
+    """
+    Precompute the data derived from the spec (operations and endpoints), so that comparing
+    the spec against many other specs does not compute them again.
+    """
+    get_endpoints(spec)
+
+
 def get_operation_mappings(old_spec, new_spec):
     # type: (Spec, Spec) -> typing.Set[EntityMapping[Operation]]
     old_endpoints = get_endpoints(old_spec)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import mmap
+import os
+import typing
+from contextlib import contextmanager
+
+from six.moves.urllib.parse import unquote
+from six.moves.urllib.parse import urlparse
+from six.moves.urllib.request import url2pathname
+
+try:
+    import ijson  # Optional, install swagger-spec-compatibility[streaming] to parse large specs incrementally
+except ImportError:  # pragma: no cover
+    ijson = None
+
+
+# Strings longer than this (ie. descriptions) are rarely repeated, so they are not interned
+_MAX_INTERNED_STRING_LENGTH = 64
+
+
+def is_streaming_available():
+    # type: () -> bool
+    return ijson is not None
+
+
+def local_file_path(uri):
+    # type: (typing.Text) -> typing.Optional[typing.Text]
+    """
+    Path of the local file referenced by a ``file:`` URI, None for other URIs.
+    """
+    parsed_uri = urlparse(uri)
+    if parsed_uri.scheme != 'file' or parsed_uri.netloc not in ('', 'localhost'):
+        return None
+    return url2pathname(unquote(parsed_uri.path))
+
+
+@contextmanager
+def mapped_file(path):
+    # type: (typing.Text) -> typing.Generator[typing.Union[mmap.mmap, bytes], None, None]
+    """
+    Map the file in memory (read only), so its content is paged in by the OS instead of being read into a string.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files could not be mapped
+            yield b''
+            return
+        mapped_content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped_content
+        finally:
+            mapped_content.close()
+
+
+def build_from_events(events):
+    # type: (typing.Iterable[typing.Tuple[typing.Text, typing.Any]]) -> typing.Any
+    """
+    Build the JSON document described by the ``ijson.basic_parse`` events.
+
+    Differently from ``ijson.items`` the keys and the short strings are interned, so the (highly repeated)
+    keywords of the specs are stored once and the built document is more compact.
+    """
+    strings = {}  # type: typing.Dict[typing.Text, typing.Text]
+    containers = []  # type: typing.List[typing.Any]
+    key = None  # type: typing.Optional[typing.Text]
+    document = None  # type: typing.Any
+    for event, value in events:
+        if event == 'map_key':
+            key = strings.setdefault(value, value)
+            continue
+        elif event in ('end_map', 'end_array'):
+            containers.pop()
+            continue
+        elif event == 'start_map':
+            value = {}
+        elif event == 'start_array':
+            value = []
+        elif event == 'string' and len(value) <= _MAX_INTERNED_STRING_LENGTH:
+            value = strings.setdefault(value, value)
+
+        if not containers:
+            document = value
+        elif isinstance(containers[-1], dict):
+            containers[-1][key] = value
+        else:
+            containers[-1].append(value)
+
+        if event in ('start_map', 'start_array'):
+            containers.append(value)
+    return document
+
+
+def parse_json_file(path):
+    # type: (typing.Text) -> typing.Any
+    """
+    Parse the JSON file incrementally from its memory mapping, so the peak memory usage is
+    bound by the size of the parsed document instead of the size of the file content.
+
+    NOTE: ijson is required (check `is_streaming_available`)
+    """
+    with mapped_file(path) as content:
+        return build_from_events(ijson.basic_parse(content, use_float=True))
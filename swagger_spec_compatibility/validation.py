@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import os
+import threading
+import typing
+
+from bravado_core.spec import Spec
+from jsonschema.validators import RefResolver
+from six.moves.urllib.parse import urldefrag
+
+from swagger_spec_compatibility.cache import content_hash
+
+
+_META_SCHEMAS_URIS = None  # type: typing.Optional[typing.Set[typing.Text]]
+
+
+def referenced_uris(spec):
+    # type: (Spec) -> typing.List[typing.Text]
+    """
+    Extract the URIs of the documents referenced, directly or not, by the (validated or dereferenced) spec.
+    """
+    global _META_SCHEMAS_URIS
+    if _META_SCHEMAS_URIS is None:
+        # The resolvers store is pre-populated with the JSON schema meta-schemas
+        _META_SCHEMAS_URIS = set(RefResolver('', {}).store)
+    origin_url = urldefrag(spec.origin_url or '')[0]
+    return sorted(
+        uri
+        for uri in spec.resolver.store
+        if uri and uri != origin_url and uri not in _META_SCHEMAS_URIS
+    )
+
+
+class ValidationCache(object):
+    """
+    Set of the specs that passed the swagger-spec-validator validation, so valid specs are not validated again.
+
+    The specs are keyed by the hash of their origin URL and content (check `key`). As the validation
+    covers the documents referenced via $ref as well, the URIs of the referenced documents are
+    recorded together with the spec key and the spec is valid only if their content did not change.
+
+    The set is kept in memory and, if `directory` is provided, persisted in it, so it is shared across runs:
+
+    * ``<key>.references.json``: the URIs of the documents referenced by the spec
+    * ``<entry key>.valid``: marker of the valid specs, where the entry key depends on the spec key
+      and on the content of the referenced documents
+    """
+
+    def __init__(self, directory=None):
+        # type: (typing.Optional[typing.Text]) -> None
+        self.directory = directory
+        self._valid_keys = set()  # type: typing.Set[typing.Text]
+        self._references = {}  # type: typing.Dict[typing.Text, typing.List[typing.Text]]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(spec_dict, origin_url):
+        # type: (typing.Mapping[typing.Text, typing.Any], typing.Optional[typing.Text]) -> typing.Text
+        # default=str deals with the YAML types not supported by JSON (ie. dates)
+        return content_hash(origin_url or '', json.dumps(spec_dict, sort_keys=True, default=str))
+
+    def _path(self, key, suffix):
+        # type: (typing.Text, typing.Text) -> typing.Text
+        return os.path.join(typing.cast(typing.Text, self.directory), '{}.{}'.format(key, suffix))
+
+    @staticmethod
+    def _entry_key(key, references, read_document):
+        # type: (typing.Text, typing.Iterable[typing.Text], typing.Optional[typing.Callable[[typing.Text], bytes]]) -> typing.Text
+        return content_hash(
+            key,
+            *(
+                part
+                for reference in references
+                for part in (reference, typing.cast(typing.Callable[[typing.Text], bytes], read_document)(reference))
+            )
+        )
+
+    def _read_references(self, key):
+        # type: (typing.Text) -> typing.Optional[typing.List[typing.Text]]
+        with self._lock:
+            references = self._references.get(key)
+        if references is None and self.directory is not None:
+            try:
+                with open(self._path(key, 'references.json'), 'rb') as f:
+                    references = json.loads(f.read().decode('utf-8'))
+            except Exception:
+                # Not validated or corrupted entry
+                return None
+        return references
+
+    def references(self, key):
+        # type: (typing.Text) -> typing.Optional[typing.List[typing.Text]]
+        """
+        URIs of the documents referenced by the spec, as recorded by `mark_valid`, None if not recorded.
+        """
+        return self._read_references(key)
+
+    def is_valid(self, key, read_document=None):
+        # type: (typing.Text, typing.Optional[typing.Callable[[typing.Text], bytes]]) -> bool
+        """
+        :param read_document: function reading the raw content of the documents referenced by the spec
+        """
+        references = self._read_references(key)
+        if references is None:
+            return False
+        try:
+            entry_key = self._entry_key(key, references, read_document)
+        except Exception:
+            # Referenced documents not available anymore, the spec is validated again to report the error
+            return False
+
+        with self._lock:
+            if entry_key in self._valid_keys:
+                return True
+        if self.directory is not None and os.path.exists(self._path(entry_key, 'valid')):
+            with self._lock:
+                self._references[key] = references
+                self._valid_keys.add(entry_key)
+            return True
+        return False
+
+    def mark_valid(self, key, references=(), read_document=None):
+        # type: (typing.Text, typing.Iterable[typing.Text], typing.Optional[typing.Callable[[typing.Text], bytes]]) -> None
+        """
+        :param references: URIs of the documents referenced by the spec (check `referenced_uris`)
+        :param read_document: function reading the raw content of the referenced documents
+        """
+        references = sorted(references)
+        try:
+            entry_key = self._entry_key(key, references, read_document)
+        except Exception:  # The referenced documents could not be read, so the spec is validated again next time
+            return
+        with self._lock:
+            self._references[key] = references
+            self._valid_keys.add(entry_key)
+        if self.directory is not None:
+            try:
+                if not os.path.isdir(self.directory):
+                    os.makedirs(self.directory)
+                with open(self._path(key, 'references.json'), 'wb') as f:
+                    f.write(json.dumps(references).encode('utf-8'))
+                open(self._path(entry_key, 'valid'), 'w').close()
+            except (IOError, OSError):  # Persisting is best effort, the spec is validated again on the next run
+                pass
+
+    def clear(self):
+        # type: () -> None
+        with self._lock:
+            self._valid_keys.clear()
+            self._references.clear()
+        if self.directory is not None and os.path.isdir(self.directory):
+            for file_name in os.listdir(self.directory):
+                if file_name.endswith(('.valid', '.references.json')):
+                    os.unlink(os.path.join(self.directory, file_name))
+
+
+# Validation cache used while loading the specs, in memory only by default
+VALIDATION_CACHE = ValidationCache()
@@ -3,9 +3,12 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import threading
+import time
 import typing
 import warnings
 from abc import abstractmethod
+from contextlib import contextmanager
 from itertools import chain
 
 from bravado_core.spec import Spec
@@ -14,6 +17,9 @@ from six import iterkeys
 from six import text_type
 from six.moves import zip_longest
 
+from swagger_spec_compatibility.interning import is_interned
+from swagger_spec_compatibility.lazy_dereferencing import lazily_dereferenced_spec
+
 
 class NoValue(object):
     pass
@@ -24,6 +30,8 @@ _HTTP_OPERATIONS = {'get', 'put', 'post', 'delete', 'options', 'head', 'patch'}
 T = typing.TypeVar('T')
 PathType = typing.Tuple[typing.Union[typing.Text, int], ...]
 NO_VALUE = NoValue()
+# Number of visited nodes between two checks of the walkers deadline, this keeps the budget checks cheap
+_DEADLINE_CHECK_INTERVAL = 1024
 
 
 def format_path(path):
@@ -31,20 +39,82 @@ def format_path(path):
     return '#/{}'.format('/'.join(text_type(path_item) for path_item in path))
 
 
+class BudgetExceeded(Exception):
+    """
+    Raised once a walker exceeds its traversal budget (check `WalkersBudget`).
+    """
+
+
+class WalkersBudget(object):
+    """
+    Limits on the traversal of the walkers.
+
+    `max_visited_nodes` bounds the number of nodes visited by each walker, while `timeout` (in seconds)
+    bounds the wall-clock time of the traversals started after `start()`. The budget could be shared
+    by multiple walkers (ie. all the walkers of a run).
+
+    Setting `cancel_event` exhausts the budget, this allows other threads to stop the traversals.
+
+    NOTE:   the checks are cheap enough to be always active, the visited nodes are counted by the
+            walkers and the clock is read only once every few thousands visited nodes
+    """
+
+    def __init__(self, max_visited_nodes=None, timeout=None, cancel_event=None):
+        # type: (typing.Optional[int], typing.Optional[float], typing.Optional[threading.Event]) -> None
+        self.max_visited_nodes = max_visited_nodes
+        self.timeout = timeout
+        self.cancel_event = cancel_event
+        self.deadline = None  # type: typing.Optional[float]
+
+    def start(self):
+        # type: () -> None
+        self.deadline = None if self.timeout is None else time.time() + self.timeout
+
+    def check_deadline(self):
+        # type: () -> None
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise BudgetExceeded('Evaluation cancelled')
+        if self.deadline is not None and time.time() > self.deadline:
+            raise BudgetExceeded('Time budget of {} seconds exceeded'.format(self.timeout))
+
+    @contextmanager
+    def paused(self):
+        # type: () -> typing.Generator[None, None, None]
+        """
+        Suspend the deadline, the time spent within the context is not accounted.
+        """
+        remaining = None if self.deadline is None else self.deadline - time.time()
+        try:
+            yield
+        finally:
+            if remaining is not None:
+                self.deadline = time.time() + remaining
+
+
 class Walker(typing.Generic[T]):
     """
     Generic Walker over two objects.
 
     The abstract class strips away the details related to dictionary vs list iterations,
     path update etc.
+
+    The traversal could be bounded by a `budget`, walkers exceeding it raise `BudgetExceeded`.
+
+    Walkers whose checks report only differences between left and right could set `skip_identical_subtrees`,
+    so the subtrees shared by left and right (check `SpecsInterner`) are not traversed.
     """
 
+    budget = None  # type: typing.Optional[WalkersBudget]
+    skip_identical_subtrees = False
+
     def __init__(self, left, right, **kwargs):
         # type: (typing.Any, typing.Any, typing.Any) -> None
         self.left = left
         self.right = right
         self._walk_result = NO_VALUE  # type: typing.Union[NoValue, typing.Iterable[T]]
         self._inner_walk_calls = {}  # type: typing.Dict
+        self._walk_error = None  # type: typing.Optional[BudgetExceeded]
+        self._visited_nodes = 0
         for attr_name, attr_value in iteritems(kwargs):
             setattr(self, attr_name, attr_value)
 
@@ -132,6 +202,30 @@ class Walker(typing.Generic[T]):
             prev[path_component] = True
             return False
 
+    def _is_identical_subtree(self, left, right):
+        # type: (typing.Any, typing.Any) -> bool
+        """
+        Determine if left and right are the same interned subtree, which the walker could skip.
+
+        Interned subtrees do not contain $refs, so the identity implies that the subtrees are equal.
+        """
+        return self.skip_identical_subtrees and left is right and is_interned(left)
+
+    def _count_visited_node(self):
+        # type: () -> None
+        """
+        Account the visit of a node against the walker budget, if any.
+        """
+        self._visited_nodes += 1
+        budget = self.budget
+        if budget is not None:
+            if budget.max_visited_nodes is not None and self._visited_nodes > budget.max_visited_nodes:
+                raise BudgetExceeded(
+                    '{} exceeded the budget of {} visited nodes'.format(self.__class__.__name__, budget.max_visited_nodes),
+                )
+            if self._visited_nodes % _DEADLINE_CHECK_INTERVAL == 0:
+                budget.check_deadline()
+
     def _inner_walk(self, path, left, right):
         # type: (PathType, typing.Any, typing.Any) -> typing.Iterable[T]
         """
@@ -141,8 +235,13 @@ class Walker(typing.Generic[T]):
          * a given path should not be traversed
          * the path has already been traversed (recursive definition)
         """
-        if not self.should_path_be_walked_through(path) or self._is_recursive_call(path, left, right):
+        if (
+            self._is_identical_subtree(left, right) or
+            not self.should_path_be_walked_through(path) or
+            self._is_recursive_call(path, left, right)
+        ):
             return ()
+        self._count_visited_node()
 
         if isinstance(left, dict) and isinstance(right, dict):
             return chain(
@@ -179,17 +278,54 @@ class Walker(typing.Generic[T]):
         Fully traverse the left and right objects.
         NOTE:   the traversing is internally cached such that all the subsequent calls
                 to `walk()` are equivalent to an attribute access
+        NOTE:   if the walker exceeded its budget all the calls raise BudgetExceeded
         """
+        if self._walk_error is not None:
+            raise self._walk_error
         if isinstance(self._walk_result, NoValue):  # pragma: no branch
-            self._walk_result = list(
-                self._inner_walk(
-                    path=tuple(),
-                    left=self.left,
-                    right=self.right,
-                ),
-            )
+            try:
+                self._walk_result = list(
+                    self._inner_walk(
+                        path=tuple(),
+                        left=self.left,
+                        right=self.right,
+                    ),
+                )
+            except BudgetExceeded as e:
+                self._walk_error = e
+                raise
         return self._walk_result
 
+    def iter_walk(self):
+        # type: () -> typing.Iterator[T]
+        """
+        Lazily traverse the left and right objects, results are yielded as soon as they are found.
+
+        This allows the caller to interrupt the traversal once it is not interested into further results.
+        NOTE:   the results are cached only if the traversal is completed
+        """
+        if self._walk_error is not None:
+            raise self._walk_error
+        if isinstance(self._walk_result, NoValue):
+            return self._iter_walk()
+        else:
+            return iter(self._walk_result)
+
+    def _iter_walk(self):
+        # type: () -> typing.Generator[T, None, None]
+        # A previous traversal could have been interrupted, so the visited objects are reset
+        self._inner_walk_calls = {}
+        self._visited_nodes = 0
+        results = []  # type: typing.List[T]
+        try:
+            for value in self._inner_walk(path=tuple(), left=self.left, right=self.right):
+                results.append(value)
+                yield value
+        except BudgetExceeded as e:
+            self._walk_error = e
+            raise
+        self._walk_result = results
+
 
 class SchemaWalker(Walker[T]):
     """
@@ -199,14 +335,26 @@ class SchemaWalker(Walker[T]):
     keeps in consideration some peculiarity of the swagger specs.
 
     The walker implementation should never worry about dereferencing as the traversing
-    is performed on the fully flattened and dereferenced specs
+    is performed on the fully flattened and dereferenced specs.
+
+    With `lazy_dereferencing` the traversing is performed on the original specs, whose $refs are
+    resolved once reached (check `lazily_dereferenced_spec`), so the areas of the specs not walked
+    through are never dereferenced.
+    NOTE: the subtrees of interned specs (check `Walker.skip_identical_subtrees`) are shared only by the
+    lazily dereferenced specs, as the fully dereferenced specs are copies.
     """
 
+    lazy_dereferencing = False
+
     def __init__(self, left_spec, right_spec, **kwargs):
         # type: (Spec, Spec, typing.Any) -> None
+        if kwargs.get('lazy_dereferencing', self.lazy_dereferencing):
+            left, right = lazily_dereferenced_spec(left_spec), lazily_dereferenced_spec(right_spec)
+        else:
+            left, right = left_spec.deref_flattened_spec, right_spec.deref_flattened_spec
         super(SchemaWalker, self).__init__(
-            left=left_spec.deref_flattened_spec,
-            right=right_spec.deref_flattened_spec,
+            left=left,
+            right=right,
             left_spec=left_spec,
             right_spec=right_spec,
             **kwargs
@@ -293,3 +441,362 @@ class SchemaWalker(Walker[T]):
             )
         else:
             return super(SchemaWalker, self)._inner_walk(path=path, left=left, right=right)
+
+
+class FusedWalker(object):
+    """
+    Walker that traverses the left and right objects only once on behalf of multiple walkers.
+
+    Every visited node is dispatched to all the walkers interested into it. Each walker keeps
+    its own view of the traversal, so ``should_path_be_walked_through`` and the detection of
+    recursive definitions are honored independently per walker.
+
+    NOTE:   once the traversal is completed the results are stored on the walkers, so
+            calling ``walk()`` on any of them is equivalent to an attribute access
+    NOTE:   walkers exceeding their budget are excluded from the rest of the traversal, without
+            affecting the other walkers, and raise BudgetExceeded once their results are requested
+    """
+
+    def __init__(self, walkers):
+        # type: (typing.Iterable[Walker[typing.Any]]) -> None
+        self.walkers = list(walkers)
+        assert all(
+            walker.left is self.walkers[0].left and walker.right is self.walkers[0].right
+            for walker in self.walkers
+        ), 'All the walkers should traverse the same objects'
+
+    def _inner_walk_parameters(
+        self,
+        path,  # type: PathType
+        left,  # type: typing.Any
+        right,  # type: typing.Any
+        walkers,  # type: typing.List[SchemaWalker[typing.Any]]
+        results,  # type: typing.Dict[Walker[typing.Any], typing.List[typing.Any]]
+    ):
+        # type: (...) -> None
+        """
+        Traverse a list of parameters as SchemaWalker._inner_walk does, parameters are matched by name.
+        """
+        left_parameters_map = {} if left is NO_VALUE else {parameter['name']: parameter for parameter in left}
+        right_parameters_map = {} if right is NO_VALUE else {parameter['name']: parameter for parameter in right}
+        parameters_index = {} if right is NO_VALUE else {parameter['name']: index for index, parameter in enumerate(right)}
+        for key in set(chain(iterkeys(left_parameters_map), iterkeys(right_parameters_map))):
+            new_path = tuple(chain(path, [key]))
+            parameter_results = {walker: [] for walker in walkers}  # type: typing.Dict[Walker[typing.Any], typing.List[typing.Any]]
+            self._inner_walk(
+                path=new_path,
+                left=left_parameters_map.get(key, NO_VALUE),
+                right=right_parameters_map.get(key, NO_VALUE),
+                walkers=walkers,
+                results=parameter_results,
+            )
+            for walker in walkers:
+                original_path = walker._get_original_parameter_path(new_path, parameters_index)
+                results[walker].extend(
+                    walker.fix_parameter_path(path=new_path, original_path=original_path, value=value)
+                    for value in parameter_results[walker]
+                )
+
+    def _inner_walk(
+        self,
+        path,  # type: PathType
+        left,  # type: typing.Any
+        right,  # type: typing.Any
+        walkers,  # type: typing.Sequence[Walker[typing.Any]]
+        results,  # type: typing.Dict[Walker[typing.Any], typing.List[typing.Any]]
+    ):
+        # type: (...) -> None
+        """
+        Traverse the left and right objects dispatching the checks to the walkers interested into path.
+
+        The traversal of a node is interrupted once none of the walkers is interested into it.
+        """
+        walkers = [walker for walker in walkers if walker._walk_error is None]
+        parameters_walkers = [
+            walker
+            for walker in walkers
+            if isinstance(walker, SchemaWalker) and walker._is_path_a_parameter_list_location(path)
+        ]  # type: typing.List[SchemaWalker[typing.Any]]
+        if parameters_walkers:
+            self._inner_walk_parameters(path=path, left=left, right=right, walkers=parameters_walkers, results=results)
+            walkers = [walker for walker in walkers if walker not in parameters_walkers]
+
+        active_walkers = [
+            walker
+            for walker in walkers
+            if (
+                not walker._is_identical_subtree(left, right) and
+                walker.should_path_be_walked_through(path) and
+                not walker._is_recursive_call(path, left, right) and
+                self._count_visited_node(walker)
+            )
+        ]
+        if not active_walkers:
+            return
+
+        if isinstance(left, dict) and isinstance(right, dict):
+            for walker in active_walkers:
+                results[walker].extend(walker.dict_check(path, left, right))
+            for key in set(chain(iterkeys(left), iterkeys(right))):
+                self._inner_walk(
+                    path=tuple(chain(path, [key])),
+                    left=left.get(key, NO_VALUE),
+                    right=right.get(key, NO_VALUE),
+                    walkers=active_walkers,
+                    results=results,
+                )
+        elif isinstance(left, list) and isinstance(right, list):
+            for walker in active_walkers:
+                results[walker].extend(walker.list_check(path, left, right))
+            for index, (left_item, right_item) in enumerate(zip_longest(left, right, fillvalue=NO_VALUE)):
+                self._inner_walk(
+                    path=tuple(chain(path, [index])),
+                    left=left_item,
+                    right=right_item,
+                    walkers=active_walkers,
+                    results=results,
+                )
+        else:
+            for walker in active_walkers:
+                results[walker].extend(walker.value_check(path, left, right))
+
+    @staticmethod
+    def _count_visited_node(walker):
+        # type: (Walker[typing.Any]) -> bool
+        """
+        Account the visit of a node for walker. Returns False if the walker exceeded its budget.
+        """
+        try:
+            walker._count_visited_node()
+            return True
+        except BudgetExceeded as e:
+            walker._walk_error = e
+            return False
+
+    def traverse(self):
+        # type: () -> None
+        """
+        Traverse the left and right objects once, storing the results on the walkers.
+        """
+        walkers_to_run = [
+            walker
+            for walker in self.walkers
+            if isinstance(walker._walk_result, NoValue) and walker._walk_error is None
+        ]
+        if walkers_to_run:
+            results = {walker: [] for walker in walkers_to_run}  # type: typing.Dict[Walker[typing.Any], typing.List[typing.Any]]
+            self._inner_walk(
+                path=tuple(),
+                left=walkers_to_run[0].left,
+                right=walkers_to_run[0].right,
+                walkers=walkers_to_run,
+                results=results,
+            )
+            for walker in walkers_to_run:
+                if walker._walk_error is None:
+                    walker._walk_result = results[walker]
+
+    def walk(self):
+        # type: () -> typing.List[typing.Iterable[typing.Any]]
+        """
+        Traverse the left and right objects once and return the results of each walker (same order as `walkers`).
+        """
+        self.traverse()
+        return [walker.walk() for walker in self.walkers]
+
+
+# Results, or exceeded budget error, of walkers indexed by walker class
+WalkersResults = typing.Dict[typing.Type[SchemaWalker[typing.Any]], typing.Union[typing.List[typing.Any], BudgetExceeded]]
+
+
+class WalkersCache(object):
+    """
+    Cache of walkers results keyed by walker class and spec pair.
+
+    The cache is meant to be run-scoped (check `walkers_cache`), this allows rules to request
+    the results of the same walker without traversing the specs multiple times.
+
+    In `lazy` mode the walkers requested via `iter_walk` traverse the specs while their results
+    are consumed, so the traversal stops as soon as the consumer is not interested in more results.
+
+    The walkers created by the cache share `budget`, if provided, and traverse the lazily
+    dereferenced specs if `lazy_dereferencing` is set (check `SchemaWalker`).
+    """
+
+    def __init__(self, lazy=False, budget=None, lazy_dereferencing=False):
+        # type: (bool, typing.Optional[WalkersBudget], bool) -> None
+        self.lazy = lazy
+        self.budget = budget
+        self.lazy_dereferencing = lazy_dereferencing
+        # NOTE: the walkers hold references to the specs, so ids are not reused while the walkers are cached
+        self._walkers = {}  # type: typing.Dict[typing.Tuple[typing.Type[SchemaWalker[typing.Any]], int, int], SchemaWalker[typing.Any]]
+        self.hits = 0
+        self.misses = 0
+
+    def _get_walker(
+        self,
+        walker_class,  # type: typing.Type[SchemaWalker[T]]
+        left_spec,  # type: Spec
+        right_spec,  # type: Spec
+    ):
+        # type: (...) -> SchemaWalker[T]
+        key = (walker_class, id(left_spec), id(right_spec))
+        walker = self._walkers.get(key)
+        if walker is None:
+            # The mode is passed only if needed, so walkers not accepting extra arguments are supported in the default mode
+            walker = self._walkers[key] = (
+                walker_class(left_spec, right_spec, lazy_dereferencing=True)  # type: ignore
+                if self.lazy_dereferencing
+                else walker_class(left_spec, right_spec)
+            )
+            walker.budget = self.budget
+        return walker
+
+    def prefetch(
+        self,
+        walker_classes,  # type: typing.Iterable[typing.Type[SchemaWalker[typing.Any]]]
+        left_spec,  # type: Spec
+        right_spec,  # type: Spec
+    ):
+        # type: (...) -> None
+        """
+        Compute the results of all the walker classes, not yet cached, with a single traversal of the specs.
+        """
+        FusedWalker(
+            self._get_walker(walker_class, left_spec, right_spec)
+            for walker_class in set(walker_classes)
+        ).traverse()
+
+    def walk(
+        self,
+        walker_class,  # type: typing.Type[SchemaWalker[T]]
+        left_spec,  # type: Spec
+        right_spec,  # type: Spec
+    ):
+        # type: (...) -> typing.Iterable[T]
+        walker = self._get_walker(walker_class, left_spec, right_spec)
+        if isinstance(walker._walk_result, NoValue) and walker._walk_error is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return walker.walk()
+
+    def iter_walk(
+        self,
+        walker_class,  # type: typing.Type[SchemaWalker[T]]
+        left_spec,  # type: Spec
+        right_spec,  # type: Spec
+    ):
+        # type: (...) -> typing.Iterator[T]
+        walker = self._get_walker(walker_class, left_spec, right_spec)
+        if not self.lazy or not isinstance(walker._walk_result, NoValue) or walker._walk_error is not None:
+            return iter(self.walk(walker_class, left_spec, right_spec))
+        self.misses += 1
+        return walker.iter_walk()
+
+    def export_results(
+        self,
+        walker_classes,  # type: typing.Iterable[typing.Type[SchemaWalker[typing.Any]]]
+        left_spec,  # type: Spec
+        right_spec,  # type: Spec
+    ):
+        # type: (...) -> WalkersResults
+        """
+        Extract the results, or the exceeded budget error, of the given walkers.
+
+        The exported results could be shipped to other processes and imported via `import_results`.
+        """
+        exported_results = {}  # type: WalkersResults
+        for walker_class in walker_classes:
+            try:
+                exported_results[walker_class] = list(self.walk(walker_class, left_spec, right_spec))
+            except BudgetExceeded as e:
+                exported_results[walker_class] = e
+        return exported_results
+
+    def import_results(
+        self,
+        walkers_results,  # type: WalkersResults
+        left_spec,  # type: Spec
+        right_spec,  # type: Spec
+    ):
+        # type: (...) -> None
+        """
+        Seed the cache with walkers results computed elsewhere (check `export_results`).
+        """
+        for walker_class, results in iteritems(walkers_results):
+            walker = self._get_walker(walker_class, left_spec, right_spec)
+            if isinstance(results, BudgetExceeded):
+                walker._walk_error = results
+            else:
+                walker._walk_result = results
+
+    def clear(self):
+        # type: () -> None
+        self._walkers.clear()
+
+
+class _ActiveWalkersCaches(threading.local):
+    def __init__(self):
+        # type: () -> None
+        # Stack of the active caches, the innermost one is used by walker_results
+        self.stack = []  # type: typing.List[WalkersCache]
+
+
+# Thread local as rules could be executed concurrently by a thread pool
+_ACTIVE_WALKERS_CACHES = _ActiveWalkersCaches()
+
+
+@contextmanager
+def walkers_cache(cache=None, lazy=False, budget=None, lazy_dereferencing=False):
+    # type: (typing.Optional[WalkersCache], bool, typing.Optional[WalkersBudget], bool) -> typing.Generator[WalkersCache, None, None]
+    """
+    Activate a walkers cache, so `walker_results` computes each walker only once per spec pair.
+
+    The cache is dropped at the end of the context unless an externally owned cache is provided.
+    `lazy`, `budget` and `lazy_dereferencing` are used only if a new cache is created (check `WalkersCache`).
+    """
+    active_cache = WalkersCache(lazy=lazy, budget=budget, lazy_dereferencing=lazy_dereferencing) if cache is None else cache
+    _ACTIVE_WALKERS_CACHES.stack.append(active_cache)
+    try:
+        yield active_cache
+    finally:
+        _ACTIVE_WALKERS_CACHES.stack.remove(active_cache)
+        if cache is None:
+            active_cache.clear()
+
+
+def walker_results(
+    walker_class,  # type: typing.Type[SchemaWalker[T]]
+    left_spec,  # type: Spec
+    right_spec,  # type: Spec
+):
+    # type: (...) -> typing.Iterable[T]
+    """
+    Get the results of walker_class on the given specs.
+
+    If a walkers cache is active the results are shared, otherwise the specs are traversed.
+    """
+    if _ACTIVE_WALKERS_CACHES.stack:
+        return _ACTIVE_WALKERS_CACHES.stack[-1].walk(walker_class, left_spec, right_spec)
+    else:
+        return walker_class(left_spec, right_spec).walk()
+
+
+def iter_walker_results(
+    walker_class,  # type: typing.Type[SchemaWalker[T]]
+    left_spec,  # type: Spec
+    right_spec,  # type: Spec
+):
+    # type: (...) -> typing.Iterator[T]
+    """
+    Iterate over the results of walker_class on the given specs.
+
+    Differently from `walker_results` the specs could be traversed while the results are consumed
+    (ie. if no walkers cache is active or if the active one is lazy), so it should be used by
+    consumers that iterate over the results only once and might stop early.
+    """
+    if _ACTIVE_WALKERS_CACHES.stack:
+        return _ACTIVE_WALKERS_CACHES.stack[-1].iter_walk(walker_class, left_spec, right_spec)
+    else:
+        return walker_class(left_spec, right_spec).iter_walk()
@@ -134,6 +134,7 @@ def _evaluate_additional_properties_diffs(
 class AdditionalPropertiesDifferWalker(SchemaWalker[AdditionalPropertiesDiff]):
     left_spec = None  # type: Spec
     right_spec = None  # type: Spec
+    skip_identical_subtrees = True  # Equal subtrees have no differences
     additionalPropertiesValue = None  # type: typing.Union[bool, typing.Mapping[typing.Text, typing.Any]]
     diffs = None  # type: typing.List[AdditionalPropertiesDiff]
 
@@ -57,17 +57,20 @@ class ChangedTypesDiff(
 class ChangedTypesDifferWalker(SchemaWalker[ChangedTypesDiff]):
     left_spec = None  # type: Spec
     right_spec = None  # type: Spec
+    skip_identical_subtrees = True  # Equal subtrees have no differences
     diffs = None  # type: typing.List[ChangedTypesDiff]
 
     def __init__(
         self,
         left_spec,  # type: Spec
         right_spec,  # type: Spec
+        **kwargs  # type: typing.Any
     ):
         # type: (...) -> None
         super(ChangedTypesDifferWalker, self).__init__(
             left_spec=left_spec,
             right_spec=right_spec,
+            **kwargs
         )
 
     def dict_check(
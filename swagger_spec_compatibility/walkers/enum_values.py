@@ -62,6 +62,7 @@ class EnumValuesDiff(
 class EnumValuesDifferWalker(SchemaWalker[EnumValuesDiff]):
     left_spec = None  # type: Spec
     right_spec = None  # type: Spec
+    skip_identical_subtrees = True  # Equal subtrees have no differences
 
     def dict_check(
         self,
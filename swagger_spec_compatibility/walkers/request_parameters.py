@@ -47,9 +47,10 @@ class RequestParametersWalker(SchemaWalker[PathType]):
         self,
         left_spec,  # type: Spec
         right_spec,  # type: Spec
+        **kwargs  # type: typing.Any
     ):
         # type: (...) -> None
-        super(RequestParametersWalker, self).__init__(left_spec=left_spec, right_spec=right_spec)
+        super(RequestParametersWalker, self).__init__(left_spec=left_spec, right_spec=right_spec, **kwargs)
 
     def dict_check(
         self,
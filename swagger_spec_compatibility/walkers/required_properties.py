@@ -55,17 +55,20 @@ class RequiredPropertiesDiff(
 class RequiredPropertiesDifferWalker(SchemaWalker[RequiredPropertiesDiff]):
     left_spec = None  # type: Spec
     right_spec = None  # type: Spec
+    skip_identical_subtrees = True  # Equal subtrees have no differences
     diffs = None  # type: typing.List[RequiredPropertiesDiff]
 
     def __init__(
         self,
         left_spec,  # type: Spec
         right_spec,  # type: Spec
+        **kwargs  # type: typing.Any
     ):
         # type: (...) -> None
         super(RequiredPropertiesDifferWalker, self).__init__(
             left_spec=left_spec,
             right_spec=right_spec,
+            **kwargs
         )
 
     def dict_check(
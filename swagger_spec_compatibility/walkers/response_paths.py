@@ -34,9 +34,10 @@ class ResponsePathsWalker(SchemaWalker[PathType]):
         self,
         left_spec,  # type: Spec
         right_spec,  # type: Spec
+        **kwargs  # type: typing.Any
     ):
         # type: (...) -> None
-        super(ResponsePathsWalker, self).__init__(left_spec=left_spec, right_spec=right_spec)
+        super(ResponsePathsWalker, self).__init__(left_spec=left_spec, right_spec=right_spec, **kwargs)
         self.paths = set()
 
     def dict_check(
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import asyncio
+import json
+import threading
+import time
+import typing
+
+import pytest
+from bravado_core.spec import Spec
+
+from swagger_spec_compatibility.aio import compatibility_status
+from swagger_spec_compatibility.aio import compatibility_status_many
+from swagger_spec_compatibility.aio import load_spec_from_uri
+from swagger_spec_compatibility.executors import ExecutorType
+from swagger_spec_compatibility.rules import SpecsPairStatus
+from swagger_spec_compatibility.rules.common import Level
+from swagger_spec_compatibility.rules.common import ValidationMessage
+from tests.conftest import DummyErrorRule
+from tests.conftest import DummyRule
+
+
+class _EndlessRule(object):
+    error_code = 'TEST_ENDLESS'
+    short_name = 'Endless rule'
+    error_level = Level.WARNING
+    reported_messages = 0
+
+    @classmethod
+    def validate(cls, left_spec, right_spec):
+        # type: (typing.Any, typing.Any) -> typing.Iterable[ValidationMessage]
+        for index in range(1000):
+            time.sleep(0.01)
+            cls.reported_messages += 1
+            yield ValidationMessage(level=cls.error_level, rule=cls, reference=str(index))  # type: ignore
+
+
+class _ConcurrencyTrackingRule(object):
+    error_code = 'TEST_CONCURRENCY'
+    short_name = 'Concurrency tracking rule'
+    error_level = Level.WARNING
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    @classmethod
+    def validate(cls, left_spec, right_spec):
+        # type: (typing.Any, typing.Any) -> typing.Iterable[ValidationMessage]
+        with cls.lock:
+            cls.running += 1
+            cls.max_running = max(cls.max_running, cls.running)
+        time.sleep(0.1)
+        with cls.lock:
+            cls.running -= 1
+        return ()
+
+
+@pytest.fixture
+def spec_uris(tmpdir, minimal_spec_dict):
+    uris = []
+    for version in range(4):
+        spec_path = tmpdir.join('v{}.json'.format(version))
+        spec_path.write(json.dumps(minimal_spec_dict))
+        uris.append('file://{}'.format(spec_path.strpath))
+    return uris
+
+
+def test_load_spec_from_uri(spec_uris, minimal_spec_dict):
+    spec = asyncio.run(load_spec_from_uri(spec_uris[0]))
+    assert isinstance(spec, Spec)
+    assert spec.spec_dict == minimal_spec_dict
+
+
+@pytest.mark.parametrize('executor', [ExecutorType.SERIAL, ExecutorType.THREAD, ExecutorType.PROCESS])
+def test_compatibility_status(minimal_spec, executor):
+    assert asyncio.run(
+        compatibility_status(minimal_spec, minimal_spec, rules=(DummyRule, DummyErrorRule), executor=executor),
+    ) == {DummyRule: [], DummyErrorRule: [DummyErrorRule.validation_message('test')]}
+
+
+def test_compatibility_status_cancellation_stops_the_rules(minimal_spec):
+    async def cancel_running_compatibility_status():
+        task = asyncio.ensure_future(
+            compatibility_status(minimal_spec, minimal_spec, rules=(_EndlessRule,), executor=ExecutorType.SERIAL),
+        )
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    _EndlessRule.reported_messages = 0
+    asyncio.run(cancel_running_compatibility_status())
+    time.sleep(0.1)
+    reported_messages = _EndlessRule.reported_messages
+    time.sleep(0.2)
+    assert 0 < reported_messages < 1000
+    # The rule is not running anymore
+    assert _EndlessRule.reported_messages == reported_messages
+
+
+def test_compatibility_status_many(spec_uris, tmpdir):
+    invalid_spec_uri = 'file://{}'.format(tmpdir.join('not-existing.json').strpath)
+    statuses = asyncio.run(
+        compatibility_status_many(
+            [(spec_uris[0], spec_uris[1]), (invalid_spec_uri, spec_uris[1]), (spec_uris[2], spec_uris[3])],
+            rules=(DummyErrorRule,),
+            executor=ExecutorType.THREAD,
+        ),
+    )
+    assert [(status.old_spec_uri, status.new_spec_uri) for status in statuses] == [
+        (spec_uris[0], spec_uris[1]), (invalid_spec_uri, spec_uris[1]), (spec_uris[2], spec_uris[3]),
+    ]
+    assert statuses[0] == SpecsPairStatus(
+        old_spec_uri=spec_uris[0],
+        new_spec_uri=spec_uris[1],
+        status={DummyErrorRule: [DummyErrorRule.validation_message('test')]},
+        error=None,
+    )
+    assert statuses[1].status is None and statuses[1].error is not None
+    assert statuses[2].status == statuses[0].status
+
+
+def test_compatibility_status_many_limits_the_concurrency(spec_uris):
+    _ConcurrencyTrackingRule.max_running = 0
+    statuses = asyncio.run(
+        compatibility_status_many(
+            [(spec_uri, spec_uri) for spec_uri in spec_uris],
+            rules=(_ConcurrencyTrackingRule,),
+            executor=ExecutorType.THREAD,
+            jobs=4,
+            concurrency=2,
+        ),
+    )
+    assert all(status.error is None for status in statuses)
+    assert _ConcurrencyTrackingRule.max_running <= 2
@@ -3,6 +3,15 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import gc
+import typing
+import weakref
+
+import mock
+
+from swagger_spec_compatibility.cache import content_hash
+from swagger_spec_compatibility.cache import ContentHashCache
+from swagger_spec_compatibility.cache import typed_lifetime_cache
 from swagger_spec_compatibility.cache import typed_lru_cache
 
 _NUMBER_OF_CALLS = 0
@@ -26,3 +35,81 @@ def test_typed_lru_cache_wraps_results():
     assert foo(3) == 3  # Cache sets number=3 call result and drops number=1 (due to maxsize=2)
     assert foo(3) == 3  # Cache already knows number=3 call result
     assert foo(1) == 4  # Cache does not know anymore the number=1 call result, so sets number=1 call result and drop number=2 (due to maxsize=2)  # noqa
+
+
+def test_content_hash():
+    assert content_hash('uri', b'content') == content_hash(b'uri', 'content')
+    assert content_hash('uri', b'content') != content_hash('uric', b'ontent')
+
+
+def test_ContentHashCache_evicts_least_recently_used_values_exceeding_max_size():
+    cache = ContentHashCache(max_size=10)  # type: ContentHashCache[typing.Text]
+    loader = mock.Mock(side_effect=lambda: 'value')
+    for key, size in (('a', 4), ('b', 4), ('a', 4), ('c', 4)):
+        cache.get_or_load(key, loader, size=size)
+    assert loader.call_count == 3
+    assert cache.stats() == {'hits': 1, 'misses': 3, 'size': 2, 'content_size': 8}
+
+    cache.get_or_load('a', loader, size=4)
+    assert cache.stats()['hits'] == 2
+    cache.get_or_load('b', loader, size=4)
+    assert cache.stats()['misses'] == 4
+
+
+def test_ContentHashCache_keeps_the_most_recently_used_value():
+    cache = ContentHashCache(max_size=10)  # type: ContentHashCache[typing.Text]
+    cache.get_or_load('a', lambda: 'a', size=4)
+    assert cache.get_or_load('big', lambda: 'big', size=20) == 'big'
+    assert cache.stats() == {'hits': 0, 'misses': 2, 'size': 1, 'content_size': 20}
+
+
+def test_ContentHashCache_max_entries():
+    cache = ContentHashCache(max_entries=1)  # type: ContentHashCache[typing.Text]
+    cache.get_or_load('a', lambda: 'a')
+    cache.get_or_load('b', lambda: 'b')
+    assert cache.get_or_load('a', lambda: 'reloaded') == 'reloaded'
+
+
+def test_ContentHashCache_invalidate():
+    cache = ContentHashCache()  # type: ContentHashCache[typing.Text]
+    cache.get_or_load('a', lambda: 'a', size=1)
+    cache.get_or_load('b', lambda: 'b', size=2)
+    cache.invalidate('a')
+    cache.invalidate('not-cached')
+    assert cache.stats() == {'hits': 0, 'misses': 2, 'size': 1, 'content_size': 2}
+    assert cache.get_or_load('a', lambda: 'reloaded') == 'reloaded'
+    cache.invalidate()
+    assert cache.stats() == {'hits': 0, 'misses': 3, 'size': 0, 'content_size': 0}
+
+
+def test_ContentHashCache_resize():
+    cache = ContentHashCache()  # type: ContentHashCache[typing.Text]
+    for key in ('a', 'b', 'c'):
+        cache.get_or_load(key, lambda: key, size=1)
+    cache.resize(max_size=2)
+    assert cache.stats()['size'] == 2
+    cache.resize(max_entries=1)
+    assert cache.stats()['size'] == 1
+    assert cache.get_or_load('c', lambda: 'reloaded') == 'c'
+
+
+class _Argument(object):
+    pass
+
+
+def test_typed_lifetime_cache():
+    @typed_lifetime_cache
+    def foo(argument):
+        return _foo(argument)
+
+    argument, other_argument = _Argument(), _Argument()
+    result = foo(argument)
+    assert foo(argument) == result
+    assert foo(other_argument) == result + 1
+    assert foo(argument) == result
+
+    # The result is dropped together with the argument
+    argument_reference = weakref.ref(argument)
+    del argument
+    gc.collect()
+    assert argument_reference() is None
@@ -11,10 +11,20 @@ import mock
 import pytest
 
 from swagger_spec_compatibility.cli.common import CLIRulesProtocol
+from swagger_spec_compatibility.cli.common import positive_float
+from swagger_spec_compatibility.cli.common import positive_integer
 from swagger_spec_compatibility.cli.common import pre_process_cli_to_discover_rules
+from swagger_spec_compatibility.cli.common import print_specs_pair_status
 from swagger_spec_compatibility.cli.common import rules
+from swagger_spec_compatibility.cli.common import specs_pair_status_exit_code
+from swagger_spec_compatibility.cli.common import specs_pair_status_json
 from swagger_spec_compatibility.cli.common import uri
+from swagger_spec_compatibility.rules import SpecsPairStatus
+from swagger_spec_compatibility.rules.common import Level
+from swagger_spec_compatibility.rules.common import ValidationMessage
+from tests.conftest import DummyErrorRule
 from tests.conftest import DummyRule
+from tests.conftest import DummyWarningRule
 from tests.conftest import REPO_ROOT
 
 
@@ -38,6 +48,7 @@ from tests.conftest import REPO_ROOT
             ),
         ),
         ('schema://path.domain', 'schema://path.domain'),
+        ('git:HEAD:api/swagger.yaml', 'git:HEAD:api/swagger.yaml'),
     ],
 )
 def test_uri(param, expected_result):
@@ -49,6 +60,20 @@ def test_uri_raises_if_path_does_not_exists(tmpdir):
         uri(os.path.join(tmpdir.strpath, str('not-existing-file')))
 
 
+def test_positive_integer():
+    assert positive_integer('3') == 3
+    for param in ('0', '-1', 'a'):
+        with pytest.raises(ArgumentTypeError):
+            positive_integer(param)
+
+
+def test_positive_float():
+    assert positive_float('0.5') == 0.5
+    for param in ('0', '-1.5', 'a'):
+        with pytest.raises(ArgumentTypeError):
+            positive_float(param)
+
+
 @pytest.mark.parametrize(
     'cli_rules, cli_blacklist_rules, expected_rules',
     [
@@ -122,3 +147,69 @@ def test_pre_process_cli_to_discover_rules_warns_if_the_module_does_not_exist():
         match='\'a.module.that.does.not.exist\' module, specified via the rule discovery CLI, is not found. Ignoring it.',
     ):
         pre_process_cli_to_discover_rules(['-d', 'a.module.that.does.not.exist'])
+
+
+def test_specs_pair_status_json():
+    assert specs_pair_status_json(
+        SpecsPairStatus(
+            old_spec_uri='old',
+            new_spec_uri='new',
+            status={
+                DummyRule: [],
+                DummyErrorRule: [DummyErrorRule.validation_message('ref')],
+                DummyWarningRule: [DummyWarningRule.validation_message('ref')],
+            },
+            error=None,
+        ),
+    ) == {
+        'old_spec': 'old',
+        'new_spec': 'new',
+        'messages': {
+            'ERROR': [DummyErrorRule.validation_message('ref').json_representation()],
+            'WARNING': [DummyWarningRule.validation_message('ref').json_representation()],
+        },
+    }
+    assert specs_pair_status_json(
+        SpecsPairStatus(old_spec_uri='old', new_spec_uri='new', status=None, error='IOError: error'),
+    ) == {'old_spec': 'old', 'new_spec': 'new', 'error': 'IOError: error'}
+
+
+@pytest.mark.parametrize(
+    'status, error, strict, expected_exit_code',
+    [
+        ({DummyWarningRule: [DummyWarningRule.validation_message('ref')]}, None, False, 0),
+        ({DummyWarningRule: [DummyWarningRule.validation_message('ref')]}, None, True, 1),
+        ({DummyErrorRule: [DummyErrorRule.validation_message('ref')]}, None, False, 1),
+        ({DummyRule: []}, None, True, 0),
+        ({DummyRule: [ValidationMessage(level=Level.INCOMPLETE, rule=DummyRule, reference='timeout')]}, None, False, 1),
+        (None, 'IOError: error', False, 1),
+    ],
+)
+def test_specs_pair_status_exit_code(status, error, strict, expected_exit_code):
+    assert specs_pair_status_exit_code(
+        SpecsPairStatus(old_spec_uri='old', new_spec_uri='new', status=status, error=error),
+        strict=strict,
+    ) == expected_exit_code
+
+
+def test_print_specs_pair_status(capsys):
+    print_specs_pair_status(
+        SpecsPairStatus(
+            old_spec_uri='v1',
+            new_spec_uri='v2',
+            status={
+                DummyWarningRule: [DummyWarningRule.validation_message('ref')],
+                DummyErrorRule: [DummyErrorRule.validation_message('ref')],
+            },
+            error=None,
+        ),
+    )
+    print_specs_pair_status(SpecsPairStatus(old_spec_uri='v2', new_spec_uri='v3', status=None, error='IOError: error'))
+    out, _ = capsys.readouterr()
+    assert out == (
+        'v1 -> v2\n'
+        '\tERROR: [TEST_ERROR_MSG] DummyErrorRule: ref\n'
+        '\tWARNING: [TEST_WARNING_MSG] DummyWarningRule: ref\n'
+        'v2 -> v3\n'
+        '\tFAILED: IOError: error\n'
+    )
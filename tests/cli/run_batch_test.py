@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+from collections import namedtuple
+
+import pytest
+
+from swagger_spec_compatibility.cli.run_batch import _Namespace
+from swagger_spec_compatibility.cli.run_batch import _read_manifest
+from swagger_spec_compatibility.cli.run_batch import execute
+
+
+# Need to use a namedtuple instead of mock because these
+# args are used in multiprocessing and thus need to be
+# serializable with pickle (mock is not)
+MockCLIArgs = namedtuple(
+    'MockCLIArgs', [
+        'spec_set',
+        'command',
+        'func',
+        'rules',
+        'blacklist_rules',
+        'strict',
+        'manifest',
+        'jobs',
+        'timeout',
+        'max_visited_nodes',
+    ],
+)
+
+
+@pytest.fixture
+def cli_args():
+    return MockCLIArgs(
+        spec_set=_Namespace,
+        command='execute',
+        func=execute,
+        rules=('DummyRule',),
+        blacklist_rules=(),
+        strict=False,
+        manifest=io.StringIO(),
+        jobs=None,
+        timeout=None,
+        max_visited_nodes=None,
+    )
+
+
+@pytest.fixture
+def spec_path(tmpdir, minimal_spec_dict):
+    spec_path = str(os.path.join(tmpdir.strpath, 'swagger.json'))
+    with open(spec_path, 'w') as f:
+        json.dump(minimal_spec_dict, f)
+    return spec_path
+
+
+def test__read_manifest(spec_path):
+    assert _read_manifest([
+        '# Comment\n',
+        '\n',
+        '{} http://host/swagger.json\n'.format(spec_path),
+        '  not-existing-file\t{}  \n'.format(spec_path),
+    ]) == [
+        (spec_path, 'http://host/swagger.json'),
+        ('not-existing-file', spec_path),
+    ]
+
+
+def test__read_manifest_invalid_lines():
+    with pytest.raises(ValueError) as excinfo:
+        _read_manifest(['old new\n', 'old\n'])
+    assert str(excinfo.value) == 'Line 2: expected "<old spec> <new spec>", found "old"'
+
+
+@pytest.mark.parametrize('jobs', [None, 1])
+@pytest.mark.parametrize(
+    'strict, rules, expected_exit_code',
+    [
+        (False, ('DummyWarningRule',), 0),
+        (True, ('DummyWarningRule',), 1),
+        (False, ('DummyErrorRule',), 1),
+    ],
+)
+def test_execute(mock_RuleRegistry, cli_args, spec_path, jobs, strict, rules, expected_exit_code, capsys):
+    cli_args = cli_args._replace(
+        manifest=io.StringIO('{0} {0}\n{0} {0}\n'.format(spec_path)),
+        jobs=jobs,
+        strict=strict,
+        rules=rules,
+    )
+    assert execute(cli_args) == expected_exit_code
+    out, _ = capsys.readouterr()
+    lines = [json.loads(line) for line in out.splitlines()]
+    assert len(lines) == 2
+    assert all(set(line['messages']) == {mock_RuleRegistry[rules[0]].error_level.name} for line in lines)
+
+
+def test_execute_reports_pairs_that_cannot_be_loaded(mock_RuleRegistry, cli_args, spec_path, capsys):
+    cli_args = cli_args._replace(manifest=io.StringIO('{0} {0}\nnot-existing-file {0}\n'.format(spec_path)), jobs=1)
+    assert execute(cli_args) == 1
+    out, _ = capsys.readouterr()
+    # The pairs referencing not existing files are reported first
+    invalid_pair, valid_pair = [json.loads(line) for line in out.splitlines()]
+    assert valid_pair['messages'] == {}
+    assert invalid_pair['old_spec'] == 'not-existing-file'
+    assert invalid_pair['error'] == '`not-existing-file` is not an existing file and either a valid URI'
+
+
+def test_execute_with_invalid_manifest(mock_RuleRegistry, cli_args, capsys):
+    assert execute(cli_args._replace(manifest=io.StringIO('old\n'))) == 2
+    _, err = capsys.readouterr()
+    assert err == 'Invalid manifest. Line 1: expected "<old spec> <new spec>", found "old"\n'
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import os
+from collections import namedtuple
+
+import pytest
+
+from swagger_spec_compatibility.cli.common import uri
+from swagger_spec_compatibility.cli.run_matrix import _Namespace
+from swagger_spec_compatibility.cli.run_matrix import execute
+
+
+# Need to use a namedtuple instead of mock because these
+# args are used in multiprocessing and thus need to be
+# serializable with pickle (mock is not)
+MockCLIArgs = namedtuple(
+    'MockCLIArgs', [
+        'spec_set',
+        'command',
+        'func',
+        'rules',
+        'blacklist_rules',
+        'strict',
+        'json_output',
+        'new_spec',
+        'old_specs',
+        'jobs',
+        'timeout',
+        'max_visited_nodes',
+    ],
+)
+
+
+@pytest.fixture
+def cli_args():
+    return MockCLIArgs(
+        spec_set=_Namespace,
+        command='execute',
+        func=execute,
+        rules=('DummyRule',),
+        blacklist_rules=(),
+        strict=False,
+        json_output=False,
+        new_spec='',
+        old_specs=[],
+        jobs=None,
+        timeout=None,
+        max_visited_nodes=None,
+    )
+
+
+@pytest.fixture
+def spec_uri(tmpdir, minimal_spec_dict):
+    spec_path = str(os.path.join(tmpdir.strpath, 'swagger.json'))
+    with open(spec_path, 'w') as f:
+        json.dump(minimal_spec_dict, f)
+    return uri(spec_path)
+
+
+@pytest.mark.parametrize('json_output', [True, False])
+@pytest.mark.parametrize('jobs', [None, 1])
+@pytest.mark.parametrize(
+    'strict, rules, expected_exit_code',
+    [
+        (False, ('DummyWarningRule',), 0),
+        (True, ('DummyWarningRule',), 1),
+        (False, ('DummyErrorRule',), 1),
+    ],
+)
+def test_execute(
+    mock_RuleRegistry, cli_args, spec_uri, json_output, jobs, strict, rules, expected_exit_code, capsys,
+):
+    cli_args = cli_args._replace(
+        new_spec=spec_uri,
+        old_specs=[spec_uri, spec_uri],
+        json_output=json_output,
+        jobs=jobs,
+        strict=strict,
+        rules=rules,
+    )
+    assert execute(cli_args) == expected_exit_code
+    out, _ = capsys.readouterr()
+    if json_output:
+        assert len([json.loads(line) for line in out.splitlines()]) == 2
+    else:
+        assert out.count('{0} -> {0}'.format(spec_uri)) == 2
+
+
+def test_execute_reports_new_spec_loading_failure(mock_RuleRegistry, cli_args, spec_uri, tmpdir, capsys):
+    tmpdir.join('swagger.yaml').write('invalid: [')
+    new_spec_uri = uri(str(tmpdir.join('swagger.yaml')))
+    assert execute(cli_args._replace(new_spec=new_spec_uri, old_specs=[spec_uri])) == 1
+    out, _ = capsys.readouterr()
+    assert out.startswith('{} -> {}\n\tFAILED: '.format(spec_uri, new_spec_uri))
@@ -5,18 +5,23 @@ from __future__ import unicode_literals
 
 import json
 import os
+import typing
 from collections import namedtuple
 
 import mock
 import pytest
+from swagger_spec_validator import validator20
 
 from swagger_spec_compatibility.cli.common import uri
 from swagger_spec_compatibility.cli.run import _Namespace
 from swagger_spec_compatibility.cli.run import _print_json_messages
 from swagger_spec_compatibility.cli.run import _print_raw_messages
+from swagger_spec_compatibility.cli.run import _print_streamed_message
 from swagger_spec_compatibility.cli.run import execute
+from swagger_spec_compatibility.http_cache import HTTPCache
 from swagger_spec_compatibility.rules.changed_type import ChangedType
 from swagger_spec_compatibility.rules.common import Level
+from swagger_spec_compatibility.validation import ValidationCache
 from tests.conftest import DummyWarningRule
 
 
@@ -34,6 +39,17 @@ MockCLIArgs = namedtuple(
         'old_spec',
         'new_spec',
         'json_output',
+        'jobs',
+        'stream',
+        'fail_fast',
+        'timeout',
+        'max_visited_nodes',
+        'cache_dir',
+        'trusted_specs',
+        'load_executor',
+        'lazy_dereferencing',
+        'intern_specs',
+        'profile',
     ],
 )
 
@@ -50,6 +66,17 @@ def cli_args():
         old_spec='memory://',
         new_spec='memory://',
         json_output=False,
+        jobs=None,
+        stream=False,
+        fail_fast=False,
+        timeout=None,
+        max_visited_nodes=None,
+        cache_dir=None,
+        trusted_specs=False,
+        load_executor='thread',
+        lazy_dereferencing=False,
+        intern_specs=False,
+        profile=False,
     )
 
 
@@ -63,19 +90,21 @@ def error_message_library_rule():
     return ChangedType.validation_message('reference')
 
 
+@pytest.mark.parametrize('jobs', [None, 1])
 @pytest.mark.parametrize('json_output', [True, False])
 @pytest.mark.parametrize('strict', [True, False])
 @mock.patch('swagger_spec_compatibility.cli.run._print_raw_messages', autospec=True)
 @mock.patch('swagger_spec_compatibility.cli.run._print_json_messages', autospec=True)
 def test_execute(
     mock__print_json_messages, mock__print_raw_messages, capsys,
-    cli_args, json_output, mock_RuleRegistry, strict, tmpdir, minimal_spec_dict,
+    cli_args, json_output, mock_RuleRegistry, strict, tmpdir, minimal_spec_dict, jobs,
 ):
     spec_path = str(os.path.join(tmpdir.strpath, 'swagger.json'))
     with open(spec_path, 'w') as f:
         json.dump(minimal_spec_dict, f)
     cli_args = cli_args._replace(strict=strict)
     cli_args = cli_args._replace(json_output=json_output)
+    cli_args = cli_args._replace(jobs=jobs)
     cli_args = cli_args._replace(rules=('DummyWarningRule',))
     cli_args = cli_args._replace(old_spec=uri(spec_path))
     cli_args = cli_args._replace(new_spec=uri(spec_path))
@@ -85,6 +114,7 @@ def test_execute(
             Level.INFO: mock.ANY,
             Level.WARNING: mock.ANY,
             Level.ERROR: mock.ANY,
+            Level.INCOMPLETE: mock.ANY,
         })
         assert not mock__print_raw_messages.called
     else:
@@ -92,11 +122,79 @@ def test_execute(
             Level.INFO: mock.ANY,
             Level.WARNING: mock.ANY,
             Level.ERROR: mock.ANY,
+            Level.INCOMPLETE: mock.ANY,
         })
         assert not mock__print_json_messages.called
     capsys.readouterr()
 
 
+@pytest.mark.parametrize('json_output', [True, False])
+@pytest.mark.parametrize(
+    'strict, rules, expected_exit_code',
+    [
+        (False, ('DummyWarningRule',), 0),
+        (True, ('DummyWarningRule',), 1),
+        (False, ('DummyWarningRule', 'DummyErrorRule'), 1),
+        (True, ('DummyRule',), 0),
+    ],
+)
+@mock.patch('swagger_spec_compatibility.cli.run._print_streamed_message', autospec=True)
+def test_execute_streaming(
+    mock__print_streamed_message, cli_args, json_output, mock_RuleRegistry, strict, rules,
+    expected_exit_code, tmpdir, minimal_spec_dict,
+):
+    spec_path = str(os.path.join(tmpdir.strpath, 'swagger.json'))
+    with open(spec_path, 'w') as f:
+        json.dump(minimal_spec_dict, f)
+    cli_args = cli_args._replace(
+        strict=strict,
+        json_output=json_output,
+        rules=rules,
+        old_spec=uri(spec_path),
+        new_spec=uri(spec_path),
+        stream=True,
+        jobs=1,
+    )
+    assert execute(cli_args) == expected_exit_code
+    assert sorted(call[0][0].rule.__name__ for call in mock__print_streamed_message.call_args_list) == sorted(
+        rule for rule in rules if rule != 'DummyRule'
+    )
+    assert all(call[0][1] is json_output for call in mock__print_streamed_message.call_args_list)
+
+
+@pytest.mark.parametrize('stream', [True, False])
+def test_execute_fail_fast(cli_args, mock_RuleRegistry, stream, tmpdir, minimal_spec_dict, capsys):
+    spec_path = str(os.path.join(tmpdir.strpath, 'swagger.json'))
+    with open(spec_path, 'w') as f:
+        json.dump(minimal_spec_dict, f)
+    cli_args = cli_args._replace(
+        rules=('DummyErrorRule', 'DummyErrorRule', 'DummyWarningRule'),
+        old_spec=uri(spec_path),
+        new_spec=uri(spec_path),
+        stream=stream,
+        fail_fast=True,
+        jobs=1,
+    )
+    assert execute(cli_args) == 1
+    out, _ = capsys.readouterr()
+    assert out.count('[TEST_ERROR_MSG]') == 1
+
+
+def test__print_streamed_message(capsys, warning_message, error_message_library_rule):
+    _print_streamed_message(warning_message, json_output=False)
+    _print_streamed_message(error_message_library_rule, json_output=True)
+    out, _ = capsys.readouterr()
+    raw_line, json_line = out.splitlines()
+    assert raw_line == 'WARNING: [TEST_WARNING_MSG] DummyWarningRule: reference'
+    assert json.loads(json_line) == {
+        'documentation': 'https://swagger-spec-compatibility.readthedocs.io/en/latest/rules/MIS-E002.html',
+        'error_code': 'MIS-E002',
+        'level': 'ERROR',
+        'reference': 'reference',
+        'short_name': 'Changed type',
+    }
+
+
 def test__print_raw_messages(capsys, warning_message, error_message_library_rule):
     _print_raw_messages(
         messages_by_level={
@@ -141,3 +239,143 @@ def test__print_json_messages(capsys, warning_message, error_message_library_rul
             },
         ],
     }
+
+
+def test_execute_with_cache_dir(cli_args, mock_RuleRegistry, tmpdir, minimal_spec_dict, capsys):
+    spec_path = str(os.path.join(tmpdir.strpath, 'swagger.json'))
+    with open(spec_path, 'w') as f:
+        json.dump(minimal_spec_dict, f)
+    cache_dir = tmpdir.join('cache')
+    cli_args = cli_args._replace(
+        rules=('DummyWarningRule',),
+        old_spec=uri(spec_path),
+        new_spec=uri(spec_path),
+        jobs=1,
+        cache_dir=cache_dir.strpath,
+    )
+    with mock.patch(
+        'swagger_spec_compatibility.http_cache.HTTP_CACHE', HTTPCache(),
+    ) as mock_http_cache, mock.patch(
+        'swagger_spec_compatibility.validation.VALIDATION_CACHE', ValidationCache(),
+    ) as mock_validation_cache, mock.patch(
+        'swagger_spec_compatibility.cli.run._execute', autospec=True,
+        side_effect=lambda *args: directories.append((mock_validation_cache.directory, mock_http_cache.directory)) or 0,
+    ):
+        directories = []  # type: typing.List[typing.Tuple[typing.Optional[typing.Text], typing.Optional[typing.Text]]]
+        assert execute(cli_args) == 0
+    assert directories == [(cache_dir.strpath, cache_dir.strpath)]
+    # The global caches are restored, so they do not persist the entries of the following in-process callers
+    assert (mock_validation_cache.directory, mock_http_cache.directory) == (None, None)
+    assert len(cache_dir.listdir(lambda path: path.basename.endswith('.spec.pickle'))) == 1
+    assert len(cache_dir.listdir(lambda path: path.basename.endswith('.valid'))) == 1
+    with mock.patch('swagger_spec_compatibility.disk_cache.load_spec_from_content', autospec=True) as mock_load_spec_from_content:
+        assert execute(cli_args) == 0
+    assert not mock_load_spec_from_content.called
+    capsys.readouterr()
+
+
+@pytest.mark.parametrize('trusted_specs', [True, False])
+def test_execute_with_trusted_specs(cli_args, mock_RuleRegistry, tmpdir, minimal_spec_dict, capsys, trusted_specs):
+    spec_path = str(os.path.join(tmpdir.strpath, 'swagger.json'))
+    with open(spec_path, 'w') as f:
+        json.dump(minimal_spec_dict, f)
+    cli_args = cli_args._replace(
+        old_spec=uri(spec_path),
+        new_spec=uri(spec_path),
+        jobs=1,
+        trusted_specs=trusted_specs,
+    )
+    with mock.patch('swagger_spec_compatibility.lightweight_spec.validation.VALIDATION_CACHE', ValidationCache()), mock.patch(
+        'bravado_core.spec.validator20.validate_spec', autospec=True, side_effect=validator20.validate_spec,
+    ) as mock_validate_spec:
+        assert execute(cli_args) == 0
+    assert mock_validate_spec.called is not trusted_specs
+    capsys.readouterr()
+
+
+def test_execute_with_profile(cli_args, mock_RuleRegistry, tmpdir, minimal_spec_dict, capsys):
+    spec_path = str(os.path.join(tmpdir.strpath, 'swagger.json'))
+    with open(spec_path, 'w') as f:
+        json.dump(minimal_spec_dict, f)
+    cli_args = cli_args._replace(
+        old_spec=uri(spec_path),
+        new_spec=uri(spec_path),
+        jobs=1,
+        profile=True,
+    )
+    with mock.patch('swagger_spec_compatibility.lightweight_spec.validation.VALIDATION_CACHE', ValidationCache()):
+        assert execute(cli_args) == 0
+    _, err = capsys.readouterr()
+    assert err.startswith('Time spent (seconds):\n')
+    assert {line.split(':')[0].strip() for line in err.splitlines()[1:]} == {'parsing', 'validation', 'specs loading', 'rules'}
+
+
+@pytest.mark.parametrize('load_executor', ['serial', 'thread', 'process'])
+def test_execute_with_load_executor(cli_args, mock_RuleRegistry, tmpdir, minimal_spec_dict, capsys, load_executor):
+    old_spec_path = str(os.path.join(tmpdir.strpath, 'old-swagger.json'))
+    new_spec_path = str(os.path.join(tmpdir.strpath, 'new-swagger.json'))
+    for spec_path in (old_spec_path, new_spec_path):
+        with open(spec_path, 'w') as f:
+            json.dump(minimal_spec_dict, f)
+    cli_args = cli_args._replace(
+        rules=('DummyWarningRule',),
+        old_spec=uri(old_spec_path),
+        new_spec=uri(new_spec_path),
+        jobs=1,
+        load_executor=load_executor,
+    )
+    assert execute(cli_args) == 0
+    capsys.readouterr()
+
+
+@mock.patch('swagger_spec_compatibility.cli.run.compatibility_status', autospec=True, return_value={})
+def test_execute_with_lazy_dereferencing(mock_compatibility_status, cli_args, mock_RuleRegistry, tmpdir, minimal_spec_dict, capsys):
+    spec_path = str(os.path.join(tmpdir.strpath, 'swagger.json'))
+    with open(spec_path, 'w') as f:
+        json.dump(minimal_spec_dict, f)
+    cli_args = cli_args._replace(old_spec=uri(spec_path), new_spec=uri(spec_path), lazy_dereferencing=True)
+    assert execute(cli_args) == 0
+    assert mock_compatibility_status.call_args[1]['lazy_dereferencing'] is True
+    # The operations of the specs are built from the lazily dereferenced specs as well
+    assert mock_compatibility_status.call_args[1]['old_spec'].config['lazy_dereferencing'] is True
+    capsys.readouterr()
+
+
+@pytest.mark.parametrize('intern_specs', [True, False])
+@mock.patch('swagger_spec_compatibility.cli.run.compatibility_status', autospec=True, return_value={})
+def test_execute_with_intern_specs(
+    mock_compatibility_status, cli_args, mock_RuleRegistry, tmpdir, minimal_spec_dict, capsys, intern_specs,
+):
+    old_spec_path = str(os.path.join(tmpdir.strpath, 'old-swagger.json'))
+    new_spec_path = str(os.path.join(tmpdir.strpath, 'new-swagger.json'))
+    with open(old_spec_path, 'w') as f:
+        json.dump(minimal_spec_dict, f)
+    with open(new_spec_path, 'w') as f:
+        json.dump(dict(minimal_spec_dict, paths={'/endpoint': {}}), f)
+    cli_args = cli_args._replace(old_spec=uri(old_spec_path), new_spec=uri(new_spec_path), intern_specs=intern_specs)
+    assert execute(cli_args) == 0
+    old_spec, new_spec = mock_compatibility_status.call_args[1]['old_spec'], mock_compatibility_status.call_args[1]['new_spec']
+    assert (old_spec.spec_dict['info'] is new_spec.spec_dict['info']) is intern_specs
+    capsys.readouterr()
+
+
+def test_execute_fails_if_rules_are_incomplete(cli_args, tmpdir, minimal_spec_dict, capsys):
+    spec_path = str(os.path.join(tmpdir.strpath, 'swagger.json'))
+    with open(spec_path, 'w') as f:
+        json.dump(dict(
+            minimal_spec_dict,
+            paths={
+                '/endpoint': {
+                    'get': {
+                        'parameters': [{'in': 'query', 'name': 'param', 'type': 'string'}],
+                        'responses': {'200': {'description': '', 'schema': {'type': 'object'}}},
+                    },
+                },
+            },
+        ), f)
+    cli_args = cli_args._replace(
+        rules=(ChangedType.error_code,), old_spec=uri(spec_path), new_spec=uri(spec_path), jobs=1, max_visited_nodes=3,
+    )
+    # The specs are identical, but the rule could not check all of them
+    assert execute(cli_args) == 1
+    assert 'INCOMPLETE' in capsys.readouterr().out
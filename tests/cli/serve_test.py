@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import os
+import socket
+import threading
+from collections import namedtuple
+
+import mock
+import pytest
+from six.moves.http_client import HTTPConnection
+
+from swagger_spec_compatibility.cli.common import uri
+from swagger_spec_compatibility.cli.serve import _build_server
+from swagger_spec_compatibility.cli.serve import _is_loopback_host
+from swagger_spec_compatibility.cli.serve import _Namespace
+from swagger_spec_compatibility.cli.serve import _SpecsCache
+from swagger_spec_compatibility.cli.serve import execute
+from swagger_spec_compatibility.executors import SerialExecutor
+from tests.conftest import DummyRuleFailIfDifferent
+from tests.conftest import DummyWarningRule
+
+
+MockCLIArgs = namedtuple(
+    'MockCLIArgs', [
+        'spec_set',
+        'command',
+        'func',
+        'rules',
+        'blacklist_rules',
+        'host',
+        'allow_remote_clients',
+        'port',
+        'unix_socket',
+        'max_cached_specs',
+        'jobs',
+        'timeout',
+        'max_visited_nodes',
+    ],
+)
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path):
+        HTTPConnection.__init__(self, 'localhost')
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+@pytest.fixture
+def cli_args():
+    return MockCLIArgs(
+        spec_set=_Namespace,
+        command='execute',
+        func=execute,
+        rules=('DummyRule', 'DummyWarningRule', 'DummyRuleFailIfDifferent'),
+        blacklist_rules=(),
+        host='127.0.0.1',
+        allow_remote_clients=False,
+        port=0,
+        unix_socket=None,
+        max_cached_specs=2,
+        jobs=1,
+        timeout=None,
+        max_visited_nodes=None,
+    )
+
+
+@pytest.fixture
+def spec_uri(tmpdir, minimal_spec_dict):
+    spec_path = str(os.path.join(tmpdir.strpath, 'swagger.json'))
+    with open(spec_path, 'w') as f:
+        json.dump(minimal_spec_dict, f)
+    return uri(spec_path)
+
+
+def _serve(server):
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def server(mock_RuleRegistry, cli_args):
+    server = _serve(_build_server(cli_args, SerialExecutor()))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _request(connection, method, path, body=None):
+    connection.request(method, path, body=None if body is None else json.dumps(body))
+    response = connection.getresponse()
+    return response.status, json.loads(response.read().decode('utf-8'))
+
+
+@pytest.fixture
+def connection(server):
+    connection = HTTPConnection(*server.server_address[:2])
+    yield connection
+    connection.close()
+
+
+def test_compatibility_of_spec_uris(connection, spec_uri):
+    assert _request(
+        connection, 'POST', '/compatibility', {'old_spec_uri': spec_uri, 'new_spec_uri': spec_uri},
+    ) == (200, {'WARNING': [DummyWarningRule.validation_message('test').json_representation()]})
+
+
+def test_compatibility_of_spec_bodies(connection, minimal_spec_dict):
+    status, response = _request(
+        connection, 'POST', '/compatibility', {
+            'old_spec': minimal_spec_dict,
+            'new_spec': dict(minimal_spec_dict, info={'title': 'Other', 'version': '2.0'}),
+            'rules': ['DummyRuleFailIfDifferent'],
+        },
+    )
+    assert status == 200
+    assert response == {'ERROR': [DummyRuleFailIfDifferent.validation_message('test').json_representation()]}
+
+
+def test_specs_are_cached_by_content(connection, server, spec_uri, tmpdir, minimal_spec_dict):
+    _request(connection, 'POST', '/compatibility', {'old_spec_uri': spec_uri, 'new_spec_uri': spec_uri})
+    assert server.specs_cache.stats() == {'hits': 1, 'misses': 1, 'size': 1, 'content_size': mock.ANY}
+
+    with open(str(tmpdir.join('swagger.json')), 'w') as f:
+        json.dump(dict(minimal_spec_dict, info={'title': 'Other', 'version': '2.0'}), f)
+    _request(connection, 'POST', '/compatibility', {'old_spec_uri': spec_uri, 'new_spec_uri': spec_uri})
+    assert server.specs_cache.stats() == {'hits': 2, 'misses': 2, 'size': 2, 'content_size': mock.ANY}
+
+    assert _request(connection, 'GET', '/health') == (
+        200, {'status': 'ok', 'specs_cache': {'hits': 2, 'misses': 2, 'size': 2, 'content_size': mock.ANY}},
+    )
+
+
+@pytest.mark.parametrize(
+    'method, path, body, expected_status',
+    [
+        ('GET', '/not-existing', None, 404),
+        ('POST', '/not-existing', {}, 404),
+        ('POST', '/compatibility', [], 400),
+        ('POST', '/compatibility', {'new_spec_uri': 'file:///not-existing.json'}, 400),
+        ('POST', '/compatibility', {'old_spec_uri': 'file:///not-existing.json', 'new_spec_uri': 'file:///not-existing.json'}, 400),
+        ('POST', '/compatibility', {'rules': ['DummyErrorRule']}, 400),
+    ],
+)
+def test_invalid_requests(connection, method, path, body, expected_status):
+    status, response = _request(connection, method, path, body)
+    assert status == expected_status
+    assert 'error' in response
+
+
+def test_errors_evaluating_the_rules(connection, spec_uri):
+    with mock.patch(
+        'swagger_spec_compatibility.cli.serve.compatibility_status', autospec=True, side_effect=ValueError('error'),
+    ):
+        assert _request(
+            connection, 'POST', '/compatibility', {'old_spec_uri': spec_uri, 'new_spec_uri': spec_uri},
+        ) == (500, {'error': 'ValueError: error'})
+    # The server is still serving
+    assert _request(connection, 'GET', '/health')[0] == 200
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix sockets are not supported')
+def test_unix_socket(mock_RuleRegistry, cli_args, spec_uri, tmpdir):
+    socket_path = str(tmpdir.join('server.sock'))
+    server = _serve(_build_server(cli_args._replace(unix_socket=socket_path), SerialExecutor()))
+    try:
+        connection = _UnixHTTPConnection(socket_path)
+        assert _request(connection, 'POST', '/compatibility', {'old_spec_uri': spec_uri, 'new_spec_uri': spec_uri})[0] == 200
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_SpecsCache_evicts_least_recently_used_specs():
+    specs_cache = _SpecsCache(max_size=2)
+    with mock.patch(
+        'swagger_spec_compatibility.cli.serve.load_spec_from_spec_dict', autospec=True,
+        side_effect=lambda spec_dict: mock.sentinel,
+    ) as mock_load_spec_from_spec_dict, mock.patch(
+        'swagger_spec_compatibility.spec_utils.referenced_uris', autospec=True, return_value=[],
+    ):
+        for spec_dict in ({'a': 1}, {'b': 1}, {'a': 1}, {'c': 1}, {'b': 1}):
+            specs_cache.spec_from_spec_dict(spec_dict)
+    assert [call[0][0] for call in mock_load_spec_from_spec_dict.call_args_list] == [{'a': 1}, {'b': 1}, {'c': 1}, {'b': 1}]
+    assert specs_cache.stats() == {'hits': 1, 'misses': 4, 'size': 2, 'content_size': 16}
+
+
+def test_execute_stops_on_keyboard_interrupt(mock_RuleRegistry, cli_args, capsys):
+    with mock.patch(
+        'swagger_spec_compatibility.cli.serve._CompatibilityHTTPServer.serve_forever', autospec=True,
+        side_effect=KeyboardInterrupt,
+    ):
+        assert execute(cli_args) == 0
+    out, _ = capsys.readouterr()
+    assert out.startswith('Serving on http://127.0.0.1:')
+
+
+@pytest.mark.parametrize(
+    'host, expected_result',
+    [
+        ('127.0.0.1', True),
+        ('localhost', True),
+        ('::1', True),
+        ('0.0.0.0', False),
+        ('', False),
+    ],
+)
+def test__is_loopback_host(host, expected_result):
+    assert _is_loopback_host(host) is expected_result
+
+
+def test_execute_refuses_to_listen_on_non_loopback_addresses(mock_RuleRegistry, cli_args, capsys):
+    with mock.patch(
+        'swagger_spec_compatibility.cli.serve._CompatibilityHTTPServer.serve_forever', autospec=True,
+        side_effect=KeyboardInterrupt,
+    ) as mock_serve_forever:
+        assert execute(cli_args._replace(host='0.0.0.0')) == 2
+        assert not mock_serve_forever.called
+        _, err = capsys.readouterr()
+        assert '--allow-remote-clients' in err
+
+        assert execute(cli_args._replace(host='0.0.0.0', allow_remote_clients=True)) == 0
+        assert mock_serve_forever.called
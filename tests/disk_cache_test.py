@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import mock
+import pytest
+
+from swagger_spec_compatibility.cli.common import uri
+from swagger_spec_compatibility.disk_cache import SpecsDiskCache
+from swagger_spec_compatibility.validation import referenced_uris
+from swagger_spec_compatibility.validation import ValidationCache
+
+
+_SPEC = """
+swagger: '2.0'
+info:
+  title: Test
+  version: '1.0'
+paths:
+  /endpoint:
+    get:
+      responses:
+        '200':
+          description: ok
+          schema:
+            $ref: 'definitions.yaml#/Model'
+"""
+
+_DEFINITIONS_TEMPLATE = """
+Model:
+  type: object
+  properties:
+    property:
+      type: {}
+"""
+
+
+@pytest.fixture
+def spec_uri(tmpdir):
+    tmpdir.join('swagger.yaml').write(_SPEC)
+    tmpdir.join('definitions.yaml').write(_DEFINITIONS_TEMPLATE.format('string'))
+    return uri(tmpdir.join('swagger.yaml').strpath)
+
+
+@pytest.fixture
+def specs_disk_cache(tmpdir):
+    return SpecsDiskCache(tmpdir.join('cache').strpath)
+
+
+def _response_schema(spec):
+    return spec.deref_flattened_spec['paths']['/endpoint']['get']['responses']['200']['schema']
+
+
+def test_referenced_uris(spec_uri, tmpdir):
+    spec = SpecsDiskCache(tmpdir.join('cache').strpath).load_spec(spec_uri)
+    assert referenced_uris(spec) == [uri(tmpdir.join('definitions.yaml').strpath)]
+
+
+def test_load_spec_restores_cached_specs(specs_disk_cache, spec_uri):
+    spec = specs_disk_cache.load_spec(spec_uri)
+    with mock.patch('swagger_spec_compatibility.disk_cache.load_spec_from_content', autospec=True) as mock_load_spec_from_content:
+        cached_spec = SpecsDiskCache(specs_disk_cache.directory).load_spec(spec_uri)
+    assert not mock_load_spec_from_content.called
+
+    assert cached_spec is not spec
+    assert cached_spec.spec_dict == spec.spec_dict
+    assert set(cached_spec.definitions) == set(spec.definitions)
+    # The dereferenced spec is restored as well
+    assert _response_schema(cached_spec) == _response_schema(spec)
+
+
+def test_load_spec_reloads_modified_specs(specs_disk_cache, spec_uri, tmpdir):
+    specs_disk_cache.load_spec(spec_uri)
+    tmpdir.join('swagger.yaml').write(_SPEC.replace("title: Test", "title: Modified"))
+    assert specs_disk_cache.load_spec(spec_uri).spec_dict['info']['title'] == 'Modified'
+    assert (specs_disk_cache.hits, specs_disk_cache.misses) == (0, 2)
+
+
+def test_load_spec_reloads_specs_with_modified_references(specs_disk_cache, spec_uri, tmpdir):
+    specs_disk_cache.load_spec(spec_uri)
+    tmpdir.join('definitions.yaml').write(_DEFINITIONS_TEMPLATE.format('integer'))
+    spec = specs_disk_cache.load_spec(spec_uri)
+    assert _response_schema(spec)['properties']['property']['type'] == 'integer'
+    assert (specs_disk_cache.hits, specs_disk_cache.misses) == (0, 2)
+
+    # Both the versions are cached
+    tmpdir.join('definitions.yaml').write(_DEFINITIONS_TEMPLATE.format('string'))
+    spec = specs_disk_cache.load_spec(spec_uri)
+    assert _response_schema(spec)['properties']['property']['type'] == 'string'
+    assert (specs_disk_cache.hits, specs_disk_cache.misses) == (1, 2)
+
+
+def test_load_spec_ignores_corrupted_entries(specs_disk_cache, spec_uri, tmpdir):
+    specs_disk_cache.load_spec(spec_uri)
+    for path in tmpdir.join('cache').listdir(lambda path: path.basename.endswith('.spec.pickle')):
+        path.write(b'corrupted', mode='wb')
+    assert specs_disk_cache.load_spec(spec_uri).spec_dict['info']['title'] == 'Test'
+    assert (specs_disk_cache.hits, specs_disk_cache.misses) == (0, 2)
+    assert specs_disk_cache.load_spec(spec_uri).spec_dict['info']['title'] == 'Test'
+    assert (specs_disk_cache.hits, specs_disk_cache.misses) == (1, 2)
+
+
+def test_load_spec_does_not_fail_if_caching_fails(specs_disk_cache, spec_uri):
+    with mock.patch.object(specs_disk_cache, '_write', autospec=True, side_effect=OSError):
+        assert specs_disk_cache.load_spec(spec_uri).spec_dict['info']['title'] == 'Test'
+    assert specs_disk_cache.load_spec(spec_uri).spec_dict['info']['title'] == 'Test'
+    assert (specs_disk_cache.hits, specs_disk_cache.misses) == (0, 2)
+
+
+def test_load_spec_is_keyed_by_library_versions(specs_disk_cache, spec_uri):
+    specs_disk_cache.load_spec(spec_uri)
+    with mock.patch('swagger_spec_compatibility.disk_cache.bravado_core_version', 'other-version'):
+        specs_disk_cache.load_spec(spec_uri)
+    assert (specs_disk_cache.hits, specs_disk_cache.misses) == (0, 2)
+
+
+def test_clear(specs_disk_cache, spec_uri, tmpdir):
+    specs_disk_cache.clear()  # Not existing directory
+    specs_disk_cache.load_spec(spec_uri)
+    tmpdir.join('cache', 'unrelated.txt').write('')
+    specs_disk_cache.clear()
+    assert [path.basename for path in tmpdir.join('cache').listdir()] == ['unrelated.txt']
+
+
+def test_load_spec_stores_lazily_dereferenced_specs_without_dereferencing_them(specs_disk_cache, spec_uri, tmpdir):
+    with mock.patch(
+        'swagger_spec_compatibility.lightweight_spec.validation.VALIDATION_CACHE', ValidationCache(),
+    ) as validation_cache:
+        spec = specs_disk_cache.load_spec(spec_uri, lazy_dereferencing=True)
+        assert 'deref_flattened_spec' not in spec.__dict__
+        assert specs_disk_cache.load_spec(spec_uri, lazy_dereferencing=True) is not spec
+        assert (specs_disk_cache.hits, specs_disk_cache.misses) == (1, 1)
+
+        # The references of the specs not validated again are known from the validation cache
+        specs_disk_cache.clear()
+        specs_disk_cache.load_spec(spec_uri, lazy_dereferencing=True)
+        assert validation_cache.references(spec.validation_key) == [uri(tmpdir.join('definitions.yaml').strpath)]
+        tmpdir.join('definitions.yaml').write(_DEFINITIONS_TEMPLATE.format('integer'))
+        spec = specs_disk_cache.load_spec(spec_uri, lazy_dereferencing=True)
+        assert _response_schema(spec)['properties']['property']['type'] == 'integer'
+        assert (specs_disk_cache.hits, specs_disk_cache.misses) == (1, 3)
+
+    # Lazily dereferenced specs are cached separately
+    specs_disk_cache.load_spec(spec_uri)
+    assert (specs_disk_cache.hits, specs_disk_cache.misses) == (1, 4)
+
+
+def test_load_spec_does_not_store_lazily_dereferenced_trusted_specs(specs_disk_cache, spec_uri):
+    specs_disk_cache.load_spec(spec_uri, validate=False, lazy_dereferencing=True)
+    specs_disk_cache.load_spec(spec_uri, validate=False, lazy_dereferencing=True)
+    assert (specs_disk_cache.hits, specs_disk_cache.misses) == (0, 2)
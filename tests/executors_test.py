@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+
+import mock
+import pytest
+
+from swagger_spec_compatibility.executors import _cgroup_cpu_quota
+from swagger_spec_compatibility.executors import available_cpus
+from swagger_spec_compatibility.executors import ExecutorType
+from swagger_spec_compatibility.executors import get_executor
+from swagger_spec_compatibility.executors import is_in_process_executor
+from swagger_spec_compatibility.executors import SerialExecutor
+from swagger_spec_compatibility.executors import shutdown_now
+
+
+def _raise_value_error():
+    raise ValueError('error')
+
+
+def test_SerialExecutor_runs_in_the_calling_thread():
+    executor = SerialExecutor()
+    assert executor.submit(lambda x, y: x + y, 1, y=2).result() == 3
+    with pytest.raises(ValueError):
+        executor.submit(_raise_value_error).result()
+
+
+@pytest.fixture
+def mock_read_file():
+    with mock.patch('swagger_spec_compatibility.executors._read_file', autospec=True) as m:
+        yield m
+
+
+@pytest.mark.parametrize(
+    'files_content, expected_quota',
+    [
+        ({'/sys/fs/cgroup/cpu.max': 'max 100000'}, None),
+        ({'/sys/fs/cgroup/cpu.max': '150000 100000'}, 1.5),
+        ({'/sys/fs/cgroup/cpu/cpu.cfs_quota_us': '-1', '/sys/fs/cgroup/cpu/cpu.cfs_period_us': '100000'}, None),
+        ({'/sys/fs/cgroup/cpu/cpu.cfs_quota_us': '200000', '/sys/fs/cgroup/cpu/cpu.cfs_period_us': '100000'}, 2),
+        ({}, None),
+    ],
+)
+def test__cgroup_cpu_quota(mock_read_file, files_content, expected_quota):
+    mock_read_file.side_effect = files_content.get
+    assert _cgroup_cpu_quota() == expected_quota
+
+
+@pytest.mark.parametrize(
+    'affinity, quota, expected_cpus',
+    [
+        (8, None, 8),
+        (8, 1.5, 2),
+        (2, 4, 2),
+        (8, 0.2, 1),
+    ],
+)
+def test_available_cpus(affinity, quota, expected_cpus):
+    with mock.patch(
+        'swagger_spec_compatibility.executors.os.sched_getaffinity', create=True, return_value=set(range(affinity)),
+    ), mock.patch(
+        'swagger_spec_compatibility.executors._cgroup_cpu_quota', autospec=True, return_value=quota,
+    ):
+        assert available_cpus() == expected_cpus
+
+
+def test_available_cpus_without_sched_getaffinity():
+    with mock.patch('swagger_spec_compatibility.executors.os') as mock_os, mock.patch(
+        'swagger_spec_compatibility.executors.multiprocessing.cpu_count', autospec=True, return_value=3,
+    ), mock.patch(
+        'swagger_spec_compatibility.executors._cgroup_cpu_quota', autospec=True, return_value=None,
+    ):
+        del mock_os.sched_getaffinity
+        assert available_cpus() == 3
+
+
+@pytest.mark.parametrize(
+    'executor_type, expected_class',
+    [
+        (ExecutorType.SERIAL, SerialExecutor),
+        (ExecutorType.THREAD, ThreadPoolExecutor),
+        (ExecutorType.PROCESS, ProcessPoolExecutor),
+    ],
+)
+def test_get_executor_creates_and_shuts_down_executors(executor_type, expected_class):
+    with mock.patch.object(expected_class, 'shutdown', autospec=True) as mock_shutdown:
+        with get_executor(executor_type, jobs=1) as executor:
+            assert isinstance(executor, expected_class)
+            assert not mock_shutdown.called
+    mock_shutdown.assert_called_once_with(executor, wait=True)
+
+
+def test_get_executor_does_not_shut_down_caller_supplied_executors():
+    caller_executor = mock.Mock(spec=ThreadPoolExecutor)
+    caller_executor.__class__ = ThreadPoolExecutor  # type: ignore
+    with get_executor(caller_executor) as executor:
+        assert executor is caller_executor
+    assert not caller_executor.shutdown.called
+
+
+def test_get_executor_raises_on_unknown_executors():
+    with pytest.raises(ValueError):
+        with get_executor('not-an-executor'):  # type: ignore
+            pass  # pragma: no cover
+
+
+def test_get_executor_forwards_initializer_to_process_pools():
+    with mock.patch('swagger_spec_compatibility.executors.ProcessPoolExecutor', autospec=True) as mock_ProcessPoolExecutor:
+        with get_executor(ExecutorType.PROCESS, jobs=2, initializer=mock.sentinel.INITIALIZER, initargs=(1, 2)):
+            pass
+    mock_ProcessPoolExecutor.assert_called_once_with(max_workers=2, initializer=mock.sentinel.INITIALIZER, initargs=(1, 2))
+
+
+def test_shutdown_now_terminates_the_worker_processes():
+    start = time.time()
+    with get_executor(ExecutorType.PROCESS, jobs=1) as executor:
+        executor.submit(time.sleep, 60)
+        time.sleep(0.1)  # Let the worker start the callable
+        shutdown_now(executor)
+    assert time.time() - start < 30
+
+
+@pytest.mark.parametrize(
+    'executor, expected_result',
+    [
+        (SerialExecutor(), True),
+        (ThreadPoolExecutor(max_workers=1), True),
+        (ProcessPoolExecutor(max_workers=1), False),
+    ],
+)
+def test_is_in_process_executor(executor, expected_result):
+    assert is_in_process_executor(executor) is expected_result
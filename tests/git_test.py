@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import subprocess
+
+import mock
+import pytest
+from six.moves.urllib.parse import uses_relative
+
+from swagger_spec_compatibility.git import absolute_references
+from swagger_spec_compatibility.git import get_cat_file
+from swagger_spec_compatibility.git import GIT_SCHEME
+from swagger_spec_compatibility.git import GitCatFile
+from swagger_spec_compatibility.git import GitError
+from swagger_spec_compatibility.git import is_git_uri
+from swagger_spec_compatibility.git import join_git_uri
+from swagger_spec_compatibility.git import read_git_uri
+from swagger_spec_compatibility.git import resolve_git_uri
+from swagger_spec_compatibility.spec_utils import load_uncached_spec_from_uri
+from swagger_spec_compatibility.spec_utils import read_spec_content
+
+
+_SPEC = """
+swagger: '2.0'
+info:
+  title: Test
+  version: '1.0'
+paths:
+  /endpoint:
+    get:
+      responses:
+        '200':
+          description: ok
+          schema:
+            $ref: 'definitions.yaml#/Model'
+"""
+
+_DEFINITIONS_TEMPLATE = """
+Model:
+  type: object
+  properties:
+    property:
+      type: {}
+    error:
+      $ref: '#/Error'
+Error:
+  $ref: 'common/errors.yaml#/Error'
+"""
+
+_ERRORS = """
+Error:
+  type: object
+  properties:
+    message:
+      type: string
+"""
+
+
+def _git(repository_path, *args):
+    return subprocess.check_output(
+        ('git', '-c', 'user.name=test', '-c', 'user.email=test@example.com') + args,
+        cwd=repository_path,
+    ).decode('utf-8').strip()
+
+
+@pytest.fixture
+def repository(tmpdir, monkeypatch):
+    _git(tmpdir.strpath, 'init', '-q')
+    tmpdir.join('api').mkdir()
+    tmpdir.join('api', 'swagger.yaml').write(_SPEC)
+    tmpdir.join('api', 'common').mkdir()
+    tmpdir.join('api', 'common', 'errors.yaml').write(_ERRORS)
+    for property_type in ('string', 'integer'):
+        tmpdir.join('api', 'definitions.yaml').write(_DEFINITIONS_TEMPLATE.format(property_type))
+        _git(tmpdir.strpath, 'add', '.')
+        _git(tmpdir.strpath, 'commit', '-q', '-m', property_type)
+    # Uncommitted changes are ignored by git URIs
+    tmpdir.join('api', 'definitions.yaml').write('invalid: [')
+    monkeypatch.chdir(tmpdir.strpath)
+    return tmpdir
+
+
+@pytest.mark.parametrize(
+    'uri, expected_result',
+    [
+        ('git:HEAD:swagger.yaml', True),
+        ('git://0123abcd/swagger.yaml', True),
+        ('file:///swagger.yaml', False),
+        ('swagger.yaml', False),
+    ],
+)
+def test_is_git_uri(uri, expected_result):
+    assert is_git_uri(uri) is expected_result
+
+
+def test_resolve_git_uri(repository):
+    commit_hash = _git(repository.strpath, 'rev-parse', 'HEAD~1')
+    assert resolve_git_uri('git:HEAD~1:api/swagger.yaml') == 'git://{}/api/swagger.yaml'.format(commit_hash)
+    assert resolve_git_uri('git://{}/api/swagger.yaml'.format(commit_hash)) == 'git://{}/api/swagger.yaml'.format(commit_hash)
+
+
+@pytest.mark.parametrize('uri', ['git:HEAD', 'git::api/swagger.yaml', 'git:HEAD:'])
+def test_resolve_git_uri_raises_on_invalid_uri(repository, uri):
+    with pytest.raises(GitError):
+        resolve_git_uri(uri)
+
+
+def test_resolve_git_uri_raises_on_not_existing_revision(repository):
+    with pytest.raises(GitError):
+        resolve_git_uri('git:not-existing-branch:api/swagger.yaml')
+
+
+def test_read_git_uri(repository):
+    assert read_git_uri('git:HEAD~1:api/definitions.yaml#/Model') == _DEFINITIONS_TEMPLATE.format('string').encode('utf-8')
+    assert read_spec_content('git:HEAD:api/definitions.yaml') == _DEFINITIONS_TEMPLATE.format('integer').encode('utf-8')
+
+
+def test_read_git_uri_raises_on_not_existing_file(repository):
+    with pytest.raises(GitError):
+        read_git_uri('git:HEAD:api/not-existing.yaml')
+    # The reader is still usable after an error
+    assert read_git_uri('git:HEAD:api/swagger.yaml') == _SPEC.encode('utf-8')
+
+
+def test_get_cat_file_raises_outside_of_a_repository(tmpdir):
+    with pytest.raises(GitError):
+        get_cat_file(tmpdir.strpath)
+
+
+def test_cat_file_process_is_reused(repository):
+    cat_file = GitCatFile(repository.strpath)
+    try:
+        with mock.patch('subprocess.Popen', wraps=subprocess.Popen) as mock_popen:
+            for _ in range(3):
+                cat_file.read('HEAD:api/swagger.yaml')
+        assert mock_popen.call_count == 1
+    finally:
+        cat_file.close()
+
+
+def test_cat_file_process_is_restarted_if_terminated(repository):
+    cat_file = GitCatFile(repository.strpath)
+    try:
+        cat_file.read('HEAD:api/swagger.yaml')
+        cat_file._process.kill()  # type: ignore
+        cat_file._process.wait()  # type: ignore
+        assert cat_file.read('HEAD:api/swagger.yaml')[1] == _SPEC.encode('utf-8')
+    finally:
+        cat_file.close()
+
+
+def test_load_spec_resolves_references_within_the_revision(repository):
+    old_spec = load_uncached_spec_from_uri('git:HEAD~1:api/swagger.yaml')
+    new_spec = load_uncached_spec_from_uri('git:HEAD:api/swagger.yaml')
+
+    def property_type(spec):
+        schema = spec.deref_flattened_spec['paths']['/endpoint']['get']['responses']['200']['schema']
+        return schema['properties']['property']['type']
+
+    assert property_type(old_spec) == 'string'
+    assert property_type(new_spec) == 'integer'
+    # Models are named independently from the revision
+    assert set(old_spec.definitions) == set(new_spec.definitions)
+    # References relative to the referenced git documents are resolved within the revision as well
+    schema = new_spec.deref_flattened_spec['paths']['/endpoint']['get']['responses']['200']['schema']
+    assert schema['properties']['error']['properties']['message']['type'] == 'string'
+    assert sorted(new_spec.flattened_spec['definitions']) == [
+        'lgit:common..errors.yaml|..Error',
+        'lgit:definitions.yaml|..Model',
+    ]
+    # The git URIs are resolved without registering the git scheme in urllib
+    assert GIT_SCHEME not in uses_relative
+
+
+@pytest.mark.parametrize(
+    'reference, expected_result',
+    [
+        ('#/Model', 'git://0123abcd/api/swagger.yaml#/Model'),
+        ('definitions.yaml#/Model', 'git://0123abcd/api/definitions.yaml#/Model'),
+        ('../common/errors.yaml', 'git://0123abcd/common/errors.yaml'),
+        ('/models.yaml#/Model', 'git://0123abcd/models.yaml#/Model'),
+        ('http://host/models.yaml#/Model', 'http://host/models.yaml#/Model'),
+    ],
+)
+def test_join_git_uri(reference, expected_result):
+    assert join_git_uri('git://0123abcd/api/swagger.yaml#/paths', reference) == expected_result
+
+
+def test_absolute_references():
+    node = {'a': {'$ref': 'definitions.yaml#/Model'}, 'b': [{'$ref': '#/Model'}], 'c': {'type': 'string'}}
+    result = absolute_references(node, 'git://0123abcd/api/swagger.yaml', local_references=False)
+    assert result == dict(node, a={'$ref': 'git://0123abcd/api/definitions.yaml#/Model'})
+    # The subtrees without references to update are not copied
+    assert result['b'] is node['b'] and result['c'] is node['c']
+    assert node['a'] == {'$ref': 'definitions.yaml#/Model'}
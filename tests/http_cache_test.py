@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import threading
+
+import mock
+import pytest
+import requests
+import yaml
+from bravado_core.spec import Spec
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler
+from six.moves.BaseHTTPServer import HTTPServer
+from six.moves.socketserver import ThreadingMixIn
+from swagger_spec_validator import validator20
+
+from swagger_spec_compatibility.cache import ContentHashCache
+from swagger_spec_compatibility.http_cache import HTTPCache
+from swagger_spec_compatibility.http_cache import is_http_uri
+from swagger_spec_compatibility.http_cache import load_http_document
+from swagger_spec_compatibility.http_cache import prefetch_http_references
+from swagger_spec_compatibility.spec_utils import load_spec_from_uri
+from swagger_spec_compatibility.spec_utils import load_uncached_spec_from_uri
+from swagger_spec_compatibility.validation import ValidationCache
+
+
+class _DocumentsRequestHandler(BaseHTTPRequestHandler):
+    # Persistent connections
+    protocol_version = str('HTTP/1.1')
+
+    def do_GET(self):
+        server = self.server  # type: _DocumentsServer
+        with server.lock:
+            server.requests.append((self.path, self.headers.get('If-None-Match'), self.client_address))
+        content = server.documents.get(self.path)
+        if content is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        etag = '"{}"'.format(hashlib.sha1(content).hexdigest())
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/x-yaml' if self.path.endswith('.yaml') else 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _DocumentsServer(ThreadingMixIn, HTTPServer):
+    """
+    Local stand-in for the HTTP servers hosting the specs, documents are served with their ETag.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), _DocumentsRequestHandler)
+        self.documents = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def uri(self, path):
+        return 'http://127.0.0.1:{}{}'.format(self.server_address[1], path)
+
+    def requested_paths(self):
+        with self.lock:
+            return [path for path, _, _ in self.requests]
+
+
+@pytest.fixture
+def server():
+    server = _DocumentsServer()
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05})
+    thread.daemon = True
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def http_cache(tmpdir):
+    http_cache = HTTPCache(directory=tmpdir.join('cache').strpath)
+    with mock.patch('swagger_spec_compatibility.http_cache.HTTP_CACHE', http_cache):
+        yield http_cache
+
+
+@pytest.fixture
+def spec_with_http_references(server, minimal_spec_dict):
+    server.documents['/specs/swagger.json'] = json.dumps(dict(
+        minimal_spec_dict,
+        paths={
+            '/endpoint': {
+                'get': {
+                    'responses': {
+                        '200': {'description': '', 'schema': {'$ref': 'models.yaml#/Model'}},
+                        'default': {'description': '', 'schema': {'$ref': '/common/errors.json#/Error'}},
+                    },
+                },
+            },
+        },
+    )).encode('utf-8')
+    server.documents['/specs/models.yaml'] = yaml.safe_dump({
+        'Model': {'type': 'object', 'properties': {'error': {'$ref': '/common/errors.json#/Error'}}},
+    }).encode('utf-8')
+    server.documents['/common/errors.json'] = json.dumps({
+        'Error': {'type': 'object', 'properties': {'message': {'type': 'string'}}},
+    }).encode('utf-8')
+    return server.uri('/specs/swagger.json')
+
+
+def test_is_http_uri():
+    assert is_http_uri('http://host/swagger.json')
+    assert is_http_uri('https://host/swagger.json')
+    assert not is_http_uri('file:///swagger.json')
+
+
+def test_HTTPCache_revalidates_the_cached_documents(server, tmpdir):
+    server.documents['/swagger.json'] = b'{"swagger": "2.0"}'
+    http_cache = HTTPCache(directory=tmpdir.strpath)
+    assert http_cache.get(server.uri('/swagger.json#/swagger')).content == b'{"swagger": "2.0"}'
+    assert tmpdir.listdir(lambda path: path.basename.endswith('.http'))
+
+    # Other processes (ie. the next runs) revalidate the document, downloading it only if modified
+    other_http_cache = HTTPCache(directory=tmpdir.strpath)
+    document = other_http_cache.get(server.uri('/swagger.json'))
+    assert document == (b'{"swagger": "2.0"}', 'application/json')
+    server.documents['/swagger.json'] = b'{"swagger": "2.0", "info": {}}'
+    assert other_http_cache.get(server.uri('/swagger.json')).content == b'{"swagger": "2.0", "info": {}}'
+    assert (other_http_cache.hits, other_http_cache.misses) == (1, 1)
+
+    _, first_condition, _ = server.requests[0]
+    _, second_condition, _ = server.requests[1]
+    assert first_condition is None
+    assert second_condition == '"{}"'.format(hashlib.sha1(b'{"swagger": "2.0"}').hexdigest())
+
+    http_cache.clear()
+    assert not tmpdir.listdir(lambda path: path.basename.endswith('.http'))
+
+
+def test_HTTPCache_without_directory_does_not_send_conditional_requests(server):
+    server.documents['/swagger.json'] = b'{}'
+    http_cache = HTTPCache()
+    http_cache.get(server.uri('/swagger.json'))
+    http_cache.get(server.uri('/swagger.json'))
+    assert [condition for _, condition, _ in server.requests] == [None, None]
+    assert (http_cache.hits, http_cache.misses) == (0, 2)
+
+
+def test_HTTPCache_reuses_the_connections(server):
+    server.documents['/swagger.json'] = b'{}'
+    http_cache = HTTPCache()
+    for _ in range(3):
+        http_cache.get(server.uri('/swagger.json'))
+    assert len({client_address for _, _, client_address in server.requests}) == 1
+
+
+def test_HTTPCache_raises_on_errors(server, tmpdir):
+    with pytest.raises(requests.HTTPError):
+        HTTPCache(directory=tmpdir.strpath).get(server.uri('/missing.json'))
+
+
+def test_load_http_document(server, http_cache):
+    server.documents['/document.yaml'] = b'key: value'
+    server.documents['/document.json'] = b'{"key": "value"}'
+    assert load_http_document(server.uri('/document.yaml')) == load_http_document(server.uri('/document.json')) == {'key': 'value'}
+
+
+def test_prefetch_http_references(server, http_cache, spec_with_http_references):
+    spec_dict = json.loads(server.documents['/specs/swagger.json'].decode('utf-8'))
+    documents = prefetch_http_references(spec_dict, spec_with_http_references)
+    assert set(documents) == {server.uri('/specs/models.yaml'), server.uri('/common/errors.json')}
+    assert documents[server.uri('/common/errors.json')]['Error']['type'] == 'object'
+    # Each document is fetched once, even if referenced multiple times
+    assert sorted(server.requested_paths()) == ['/common/errors.json', '/specs/models.yaml']
+
+
+def test_prefetch_http_references_skips_the_documents_not_available(server, http_cache):
+    spec_dict = {'definitions': {'model': {'$ref': server.uri('/missing.json#/Model')}, 'local': {'$ref': 'file:///models.json'}}}
+    assert prefetch_http_references(spec_dict, 'file:///swagger.json') == {}
+
+
+def test_load_spec_from_uri_fetches_each_document_once(server, http_cache, spec_with_http_references):
+    spec = load_spec_from_uri(spec_with_http_references)
+    assert spec.resolver.resolve(server.uri('/common/errors.json#/Error'))[1]['type'] == 'object'
+    assert sorted(server.requested_paths()) == ['/common/errors.json', '/specs/models.yaml', '/specs/swagger.json']
+
+
+def test_specs_are_validated_again_if_the_referenced_documents_change(server, http_cache, spec_with_http_references):
+    with mock.patch(
+        'swagger_spec_compatibility.lightweight_spec.validation.VALIDATION_CACHE', ValidationCache(),
+    ), mock.patch(
+        'bravado_core.spec.validator20.validate_spec', autospec=True, side_effect=validator20.validate_spec,
+    ) as mock_validate_spec:
+        load_uncached_spec_from_uri(spec_with_http_references)
+        load_uncached_spec_from_uri(spec_with_http_references)
+        assert mock_validate_spec.call_count == 1
+        # The referenced documents are not fetched again to check if the spec is valid
+        assert len(server.requested_paths()) == 6
+
+        server.documents['/common/errors.json'] = json.dumps({'Error': {'type': 'string'}}).encode('utf-8')
+        load_uncached_spec_from_uri(spec_with_http_references)
+        assert mock_validate_spec.call_count == 2
+
+
+def test_cached_specs_are_loaded_again_if_the_referenced_documents_change(server, http_cache, spec_with_http_references):
+    specs_cache = ContentHashCache()  # type: ContentHashCache[Spec]
+    spec = load_spec_from_uri(spec_with_http_references, specs_cache=specs_cache)
+    assert load_spec_from_uri(spec_with_http_references, specs_cache=specs_cache) is spec
+
+    server.documents['/common/errors.json'] = json.dumps({'Error': {'type': 'string'}}).encode('utf-8')
+    reloaded_spec = load_spec_from_uri(spec_with_http_references, specs_cache=specs_cache)
+    assert reloaded_spec is not spec
+    assert reloaded_spec.resolver.resolve(server.uri('/common/errors.json#/Error'))[1]['type'] == 'string'
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import copy
+import pickle
+
+import pytest
+
+from swagger_spec_compatibility.interning import InternedDict
+from swagger_spec_compatibility.interning import InternedList
+from swagger_spec_compatibility.interning import is_interned
+from swagger_spec_compatibility.interning import SpecsInterner
+from swagger_spec_compatibility.spec_utils import load_spec_from_spec_dict
+
+
+@pytest.fixture
+def spec_dict(minimal_spec_dict):
+    return dict(
+        minimal_spec_dict,
+        paths={
+            '/endpoint': {
+                'get': {
+                    'parameters': [{'in': 'query', 'name': 'param', 'type': 'string'}],
+                    'responses': {'200': {'description': '', 'schema': {'$ref': '#/definitions/model'}}},
+                },
+            },
+        },
+        definitions={
+            'model': {'type': 'object', 'properties': {'property': {'type': 'string'}}},
+        },
+    )
+
+
+def _copy(string):
+    # Equal but not identical strings, as produced by a parser
+    return ''.join(list(string))
+
+
+def test_identical_subtrees_are_shared_across_specs(spec_dict):
+    interner = SpecsInterner()
+    old_spec_dict = interner.intern(spec_dict)
+    new_spec_dict = interner.intern(dict(copy.deepcopy(spec_dict), info={'title': 'Other', 'version': '1.0'}))
+
+    assert old_spec_dict == spec_dict
+    assert old_spec_dict['definitions'] is new_spec_dict['definitions']
+    assert old_spec_dict['paths']['/endpoint']['get']['parameters'] is new_spec_dict['paths']['/endpoint']['get']['parameters']
+    assert old_spec_dict['info'] is not new_spec_dict['info']
+    # Identical subtrees are shared, whatever spec they belong to
+    property_schema = old_spec_dict['definitions']['model']['properties']['property']
+    assert interner.intern({'schema': {_copy('type'): _copy('string')}})['schema'] is property_schema
+    # Strings are shared even if their subtrees are not
+    assert interner.intern({'type': _copy('string'), '$ref': '#/definitions/model'})['type'] is property_schema['type']
+
+
+def test_subtrees_with_references_are_not_shared(spec_dict):
+    interner = SpecsInterner()
+    old_spec_dict, new_spec_dict = interner.intern(spec_dict), interner.intern(spec_dict)
+
+    old_responses = old_spec_dict['paths']['/endpoint']['get']['responses']
+    new_responses = new_spec_dict['paths']['/endpoint']['get']['responses']
+    assert type(old_responses) is dict and old_responses is not new_responses
+    assert not is_interned(old_spec_dict) and not is_interned(old_responses['200']['schema'])
+    assert old_responses['200']['description'] is new_responses['200']['description']
+    # The interned spec is a copy
+    assert spec_dict['paths']['/endpoint']['get']['responses'] is not old_responses
+
+
+@pytest.mark.parametrize(
+    'left, right',
+    [
+        ({'key': 1}, {'key': True}),
+        ({'key': 1}, {'key': 1.0}),
+        ({'a': 1, 'b': 2}, {'b': 2, 'a': 1}),
+        ([{}], [[]]),
+    ],
+)
+def test_not_identical_subtrees_are_not_shared(left, right):
+    interner = SpecsInterner()
+    assert interner.intern({'node': left})['node'] is not interner.intern({'node': right})['node']
+
+
+def test_interned_subtrees_are_immutable(spec_dict):
+    interned_spec_dict = SpecsInterner().intern(spec_dict)
+    model = interned_spec_dict['definitions']['model']
+    parameters = interned_spec_dict['paths']['/endpoint']['get']['parameters']
+    assert isinstance(model, InternedDict) and isinstance(parameters, InternedList)
+    with pytest.raises(TypeError):
+        model['type'] = 'string'
+    with pytest.raises(TypeError):
+        model.update(type='string')
+    with pytest.raises(TypeError):
+        parameters.append({})
+    with pytest.raises(TypeError):
+        del parameters[0]
+    assert copy.copy(model) is model
+    assert copy.deepcopy(interned_spec_dict)['definitions'] is interned_spec_dict['definitions']
+
+
+def test_interned_specs_are_pickleable(spec_dict):
+    interner = SpecsInterner()
+    old_spec_dict, new_spec_dict = interner.intern(spec_dict), interner.intern(spec_dict)
+    unpickled_old_spec_dict, unpickled_new_spec_dict = pickle.loads(
+        pickle.dumps((old_spec_dict, new_spec_dict), pickle.HIGHEST_PROTOCOL),
+    )
+    assert unpickled_old_spec_dict == spec_dict
+    assert isinstance(unpickled_old_spec_dict['definitions'], InternedDict)
+    # Sharing is preserved within the same pickle
+    assert unpickled_old_spec_dict['definitions'] is unpickled_new_spec_dict['definitions']
+
+    # Interners are not shared across processes
+    unpickled_interner = pickle.loads(pickle.dumps(interner))
+    assert len(interner) > 0 and len(unpickled_interner) == 0
+
+
+def test_interned_specs_could_be_loaded(spec_dict):
+    interner = SpecsInterner()
+    old_spec = load_spec_from_spec_dict(spec_dict, origin_url='memory://old', interner=interner, lazy_dereferencing=True)
+    new_spec = load_spec_from_spec_dict(
+        copy.deepcopy(spec_dict), origin_url='memory://new', interner=interner, lazy_dereferencing=True,
+    )
+
+    assert old_spec.spec_dict['definitions'] is new_spec.spec_dict['definitions']
+    # The $refs are annotated, with the scope of their spec, while the specs are validated
+    schemas = [spec.spec_dict['paths']['/endpoint']['get']['responses']['200']['schema'] for spec in (old_spec, new_spec)]
+    assert [schema['x-scope'] for schema in schemas] == [['memory://old'], ['memory://new']]
+    assert set(old_spec.resources['endpoint'].operations['get_endpoint'].params) == {'param'}
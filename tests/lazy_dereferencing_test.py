@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import copy
+import json
+import pickle
+
+import mock
+import pytest
+from bravado_core.spec import Spec
+
+from swagger_spec_compatibility.cli.common import uri
+from swagger_spec_compatibility.lazy_dereferencing import lazily_dereferenced_spec
+from swagger_spec_compatibility.lazy_dereferencing import LazyDerefDict
+from swagger_spec_compatibility.lazy_dereferencing import LazyDerefList
+from swagger_spec_compatibility.spec_utils import load_spec_from_spec_dict
+from swagger_spec_compatibility.spec_utils import load_spec_from_uri
+
+
+@pytest.fixture
+def spec_dict(minimal_spec_dict):
+    return dict(
+        minimal_spec_dict,
+        paths={
+            '/endpoint': {
+                'get': {
+                    'parameters': [{'$ref': '#/parameters/param'}],
+                    'responses': {
+                        '200': {'description': '', 'schema': {'$ref': '#/definitions/alias'}},
+                    },
+                },
+            },
+        },
+        parameters={
+            'param': {'in': 'query', 'name': 'param', 'type': 'string'},
+        },
+        definitions={
+            'alias': {'$ref': '#/definitions/model'},
+            'model': {
+                'type': 'object',
+                'properties': {
+                    'property': {'type': 'string'},
+                    'recursive': {'$ref': '#/definitions/model'},
+                },
+            },
+            'unused': {'type': 'object', 'properties': {'other': {'$ref': '#/definitions/model'}}},
+        },
+    )
+
+
+@pytest.fixture
+def spec(spec_dict):
+    return Spec.from_dict(spec_dict, origin_url='memory://', config={'validate_swagger_spec': False})
+
+
+def _response_schema(dereferenced_spec):
+    return dereferenced_spec['paths']['/endpoint']['get']['responses']['200']['schema']
+
+
+def test_refs_are_resolved_once_accessed(spec, spec_dict):
+    dereferenced_spec = lazily_dereferenced_spec(spec)
+    assert isinstance(dereferenced_spec, LazyDerefDict)
+    schema = _response_schema(dereferenced_spec)
+    assert schema['properties']['property'] == {'type': 'string'}
+    assert dereferenced_spec['paths']['/endpoint']['get']['parameters'][0]['name'] == 'param'
+    # The original spec is not modified
+    assert spec_dict['paths']['/endpoint']['get']['responses']['200']['schema']['$ref'] == '#/definitions/alias'
+
+
+def test_dereferenced_nodes_have_a_stable_identity(spec):
+    dereferenced_spec = lazily_dereferenced_spec(spec)
+    schema = _response_schema(dereferenced_spec)
+    assert schema['properties']['recursive'] is schema
+    assert dereferenced_spec['definitions']['model'] is schema
+    assert lazily_dereferenced_spec(spec) is dereferenced_spec
+
+
+def test_not_accessed_refs_are_not_resolved(spec):
+    dereferenced_spec = lazily_dereferenced_spec(spec)
+    with mock.patch.object(
+        spec.resolver, 'resolve_from_url', autospec=True, side_effect=spec.resolver.resolve_from_url,
+    ) as mock_resolve_from_url:
+        _response_schema(dereferenced_spec)['properties']['property']
+    assert [call[0][0] for call in mock_resolve_from_url.call_args_list] == [
+        'memory://#/definitions/alias', 'memory://#/definitions/model',
+    ]
+    assert list(dereferenced_spec['definitions']) == ['alias', 'model', 'unused']
+    # Resolutions are memoized
+    with mock.patch.object(spec.resolver, 'resolve_from_url', autospec=True) as mock_resolve_from_url:
+        assert _response_schema(dereferenced_spec)['properties']['recursive']['type'] == 'object'
+    assert not mock_resolve_from_url.called
+
+
+def test_containers_behave_as_the_dereferenced_ones(spec):
+    dereferenced_spec = lazily_dereferenced_spec(spec)
+    parameters = dereferenced_spec['paths']['/endpoint']['get']['parameters']
+    assert isinstance(parameters, LazyDerefList)
+    expected_parameters = [{'in': 'query', 'name': 'param', 'type': 'string'}]
+    assert list(parameters) == parameters[:] == parameters == expected_parameters
+    assert parameters[-1] == expected_parameters[0]
+    assert parameters + [] == [] + parameters == list(reversed(parameters)) == expected_parameters
+    assert expected_parameters[0] in parameters
+    assert parameters.index(expected_parameters[0]) == 0
+    assert parameters.count(expected_parameters[0]) == 1
+    assert dict(dereferenced_spec['parameters'].items()) == {'param': expected_parameters[0]}
+    assert dereferenced_spec['paths'].get('/endpoint').get('get').get('missing', 'default') == 'default'
+
+
+def test_copies_contain_the_dereferenced_values(spec):
+    dereferenced_spec = lazily_dereferenced_spec(spec)
+    get_spec = dereferenced_spec['paths']['/endpoint']['get']
+    expected_parameters = [{'in': 'query', 'name': 'param', 'type': 'string'}]
+    # CPython copies the values of dict subclasses directly, unless they override __iter__
+    assert dict(get_spec)['parameters'] == dict(**get_spec)['parameters'] == expected_parameters
+    assert {key: value for key, value in get_spec.items()}['parameters'] == expected_parameters
+    assert [get_spec[key] for key in get_spec] == [get_spec['parameters'], get_spec['responses']]
+    assert dict(_response_schema(dereferenced_spec))['type'] == 'object'
+    assert list(get_spec.keys()) == ['parameters', 'responses']
+    assert get_spec['parameters'].copy() == expected_parameters
+    assert get_spec['parameters'].copy()[0] is get_spec['parameters'][0]
+
+    responses = copy.copy(get_spec['responses'])
+    assert responses.pop('200')['schema']['type'] == 'object'
+    assert responses.pop('missing', None) is None and responses == {}
+    definitions = copy.copy(dereferenced_spec['definitions'])
+    assert definitions.popitem() == ('unused', dereferenced_spec['definitions']['unused'])
+    assert definitions.setdefault('alias')['type'] == 'object'
+
+
+def test_operations_are_built_from_the_dereferenced_parameters(spec_dict):
+    path_spec = spec_dict['paths']['/endpoint']
+    path_spec['parameters'] = [{'$ref': '#/parameters/path_param'}]
+    spec_dict['parameters']['path_param'] = {'in': 'query', 'name': 'path_param', 'type': 'integer'}
+    spec = load_spec_from_spec_dict(spec_dict, origin_url='memory://', lazy_dereferencing=True)
+    assert set(spec.resources['endpoint'].operations['get_endpoint'].params) == {'param', 'path_param'}
+
+
+def test_refs_of_external_documents_are_resolved_relatively_to_them(tmpdir, minimal_spec_dict):
+    tmpdir.mkdir('models').join('models.json').write(json.dumps({
+        'Model': {'type': 'object', 'properties': {'inner': {'$ref': '#/Inner'}}},
+        'Inner': {'type': 'integer'},
+    }))
+    tmpdir.join('swagger.json').write(json.dumps(dict(
+        minimal_spec_dict,
+        paths={
+            '/endpoint': {
+                'get': {
+                    'responses': {'200': {'description': '', 'schema': {'$ref': 'models/models.json#/Model'}}},
+                },
+            },
+        },
+    )))
+    spec = load_spec_from_uri(uri(tmpdir.join('swagger.json').strpath))
+    schema = _response_schema(lazily_dereferenced_spec(spec))
+    assert schema['properties']['inner'] == {'type': 'integer'}
+
+
+def test_pickling_does_not_resolve_the_pending_refs(spec):
+    dereferenced_spec = lazily_dereferenced_spec(spec)
+    _response_schema(dereferenced_spec)
+    with mock.patch.object(spec.resolver, 'resolve_from_url', autospec=True) as mock_resolve_from_url:
+        unpickled_spec = pickle.loads(pickle.dumps(spec, pickle.HIGHEST_PROTOCOL))
+    assert not mock_resolve_from_url.called
+
+    unpickled_dereferenced_spec = lazily_dereferenced_spec(unpickled_spec)
+    assert unpickled_dereferenced_spec['parameters'] == dereferenced_spec['parameters']
+    schema = _response_schema(unpickled_dereferenced_spec)
+    assert schema['properties']['recursive'] is schema
+    assert schema['properties']['property'] == {'type': 'string'}
+
+    copied_schema = copy.deepcopy(_response_schema(dereferenced_spec))
+    assert copied_schema['properties']['recursive'] is copied_schema
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import copy
+import json
+import pickle
+
+import mock
+import pytest
+from swagger_spec_validator import validator20
+from swagger_spec_validator.common import SwaggerValidationError
+
+from swagger_spec_compatibility.cli.common import uri
+from swagger_spec_compatibility.lightweight_spec import LightweightSpec
+from swagger_spec_compatibility.spec_utils import get_endpoints
+from swagger_spec_compatibility.spec_utils import HTTPVerb
+from swagger_spec_compatibility.validation import ValidationCache
+
+
+@pytest.fixture
+def spec_dict(minimal_spec_dict):
+    return dict(
+        minimal_spec_dict,
+        paths={
+            '/endpoint': {
+                'get': {
+                    'operationId': 'get_endpoint',
+                    'responses': {
+                        '200': {'description': '', 'schema': {'$ref': '#/definitions/model'}},
+                    },
+                },
+            },
+        },
+        definitions={
+            'model': {'type': 'object', 'properties': {'property': {'type': 'string'}}},
+        },
+    )
+
+
+def test_models_are_not_discovered(spec_dict):
+    with mock.patch('bravado_core.spec.model_discovery', autospec=True) as mock_model_discovery:
+        spec = LightweightSpec.from_dict(spec_dict)
+    assert not mock_model_discovery.called
+    assert spec.definitions == {}
+
+
+def test_spec_is_dereferenced(spec_dict):
+    spec = LightweightSpec.from_dict(spec_dict)
+    assert spec.config['internally_dereference_refs'] is True
+    schema = spec.deref_flattened_spec['paths']['/endpoint']['get']['responses']['200']['schema']
+    assert schema['properties'] == spec_dict['definitions']['model']['properties']
+    assert spec.deref(schema) is schema
+
+
+def test_operations_are_built(spec_dict):
+    spec = LightweightSpec.from_dict(spec_dict)
+    assert [(endpoint.http_verb, endpoint.path) for endpoint in get_endpoints(spec)] == [(HTTPVerb.GET, '/endpoint')]
+
+
+def test_operations_are_built_from_the_dereferenced_spec(spec_dict):
+    spec = LightweightSpec.from_dict(spec_dict)
+    assert spec.config['lazy_dereferencing'] is False
+    assert spec._internal_spec_dict is spec.deref_flattened_spec
+
+
+def test_spec_is_not_flattened_while_building_the_operations_with_lazy_dereferencing(spec_dict):
+    spec = LightweightSpec.from_dict(spec_dict, config={'lazy_dereferencing': True})
+    assert get_endpoints(spec)
+    assert '_deref_flattened_spec' not in spec.__dict__
+
+
+def test_config_could_be_overridden(spec_dict):
+    spec = LightweightSpec.from_dict(spec_dict, config={'default_type_to_object': True})
+    assert spec.config['default_type_to_object'] is True
+    assert spec.config['internally_dereference_refs'] is True
+
+
+def test_spec_is_pickleable(spec_dict):
+    spec = LightweightSpec.from_dict(spec_dict)
+    unpickled_spec = pickle.loads(pickle.dumps(spec))
+    assert isinstance(unpickled_spec, LightweightSpec)
+    assert unpickled_spec.deref_flattened_spec == spec.deref_flattened_spec
+
+
+def test_references_are_prefetched_only_for_specs_loaded_over_http(spec_dict):
+    with mock.patch(
+        'swagger_spec_compatibility.lightweight_spec.prefetch_http_references', autospec=True, return_value={},
+    ) as mock_prefetch_http_references:
+        LightweightSpec.from_dict(copy.deepcopy(spec_dict), origin_url='file:///swagger.json')
+        assert not mock_prefetch_http_references.called
+        LightweightSpec.from_dict(copy.deepcopy(spec_dict), origin_url='https://host/swagger.json')
+        mock_prefetch_http_references.assert_called_once_with(mock.ANY, 'https://host/swagger.json')
+
+
+@pytest.fixture
+def mock_validate_spec():
+    with mock.patch(
+        'swagger_spec_compatibility.lightweight_spec.validation.VALIDATION_CACHE', ValidationCache(),
+    ), mock.patch(
+        'bravado_core.spec.validator20.validate_spec', autospec=True, side_effect=validator20.validate_spec,
+    ) as mock_validate_spec:
+        yield mock_validate_spec
+
+
+def test_valid_specs_are_not_validated_again(spec_dict, mock_validate_spec):
+    # Copies are used as loading the spec annotates spec_dict with the references scope
+    LightweightSpec.from_dict(copy.deepcopy(spec_dict))
+    LightweightSpec.from_dict(copy.deepcopy(spec_dict))
+    assert mock_validate_spec.call_count == 1
+    LightweightSpec.from_dict(dict(spec_dict, info={'title': 'Other', 'version': '2.0'}))
+    assert mock_validate_spec.call_count == 2
+
+
+def test_specs_are_validated_again_if_the_referenced_documents_change(spec_dict, mock_validate_spec, tmpdir):
+    models_path = tmpdir.join('models.json')
+    models_path.write(json.dumps({'model': spec_dict.pop('definitions')['model']}))
+    spec_dict['paths']['/endpoint']['get']['responses']['200']['schema'] = {'$ref': 'models.json#/model'}
+    origin_url = uri(models_path.strpath).replace('models.json', 'swagger.json')
+
+    LightweightSpec.from_dict(copy.deepcopy(spec_dict), origin_url=origin_url)
+    LightweightSpec.from_dict(copy.deepcopy(spec_dict), origin_url=origin_url)
+    assert mock_validate_spec.call_count == 1
+    models_path.write(json.dumps({'model': {'type': 'object'}}))
+    LightweightSpec.from_dict(copy.deepcopy(spec_dict), origin_url=origin_url)
+    assert mock_validate_spec.call_count == 2
+
+
+def test_invalid_specs_are_validated_again(spec_dict, mock_validate_spec):
+    del spec_dict['info']
+    for _ in range(2):
+        with pytest.raises(SwaggerValidationError):
+            LightweightSpec.from_dict(spec_dict)
+    assert mock_validate_spec.call_count == 2
+
+
+def test_trusted_specs_are_not_validated(spec_dict, mock_validate_spec):
+    spec = LightweightSpec.from_dict(spec_dict, config={'validate_swagger_spec': False})
+    assert not mock_validate_spec.called
+    assert get_endpoints(spec)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import mock
+import pytest
+
+from swagger_spec_compatibility.profiling import Timings
+
+
+def test_timings():
+    timings = Timings()
+    with mock.patch('swagger_spec_compatibility.profiling.time.time', autospec=True, side_effect=[0, 1.5, 2, 2.25]):
+        with timings.measure('loading'):
+            pass
+        with pytest.raises(ValueError):
+            with timings.measure('loading'):
+                raise ValueError()
+    timings.add('rules', 3)
+    assert timings.timings() == {'loading': 1.75, 'rules': 3}
+    assert timings.report() == 'Time spent (seconds):\n\tloading: 1.750\n\trules: 3.000'
+    timings.reset()
+    assert timings.timings() == {}
+
+
+def test_concurrent_measures_are_accounted_once():
+    timings = Timings()
+    with mock.patch('swagger_spec_compatibility.profiling.time.time', autospec=True, side_effect=[0, 3]):
+        with timings.measure('validation'):
+            # ie. other threads validating specs concurrently
+            with timings.measure('validation'):
+                pass
+            with timings.measure('validation'):
+                pass
+    assert timings.timings() == {'validation': 3}
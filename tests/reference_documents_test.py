@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+
+import mock
+import pytest
+import yaml
+
+from swagger_spec_compatibility.cache import ContentHashCache
+from swagger_spec_compatibility.cli.common import uri
+from swagger_spec_compatibility.reference_documents import load_file_document
+from swagger_spec_compatibility.reference_documents import load_reference_document
+from swagger_spec_compatibility.reference_documents import parse_reference_document
+from swagger_spec_compatibility.spec_utils import load_uncached_spec_from_uri
+
+
+@pytest.fixture
+def reference_documents_cache():
+    reference_documents_cache = ContentHashCache()
+    with mock.patch(
+        'swagger_spec_compatibility.reference_documents.REFERENCE_DOCUMENTS_CACHE', reference_documents_cache,
+    ):
+        yield reference_documents_cache
+
+
+@pytest.fixture
+def models_path(tmpdir):
+    models_path = tmpdir.join('models.yaml')
+    models_path.write(yaml.safe_dump({'Model': {'type': 'object', 'properties': {'property': {'type': 'string'}}}}))
+    return models_path
+
+
+@pytest.fixture
+def spec_paths(tmpdir, minimal_spec_dict, models_path):
+    spec_paths = []
+    for version in ('old', 'new'):
+        spec_path = tmpdir.join('{}.json'.format(version))
+        spec_path.write(json.dumps(dict(
+            minimal_spec_dict,
+            info={'title': version, 'version': '1.0'},
+            paths={
+                '/endpoint': {
+                    'get': {'responses': {'200': {'description': '', 'schema': {'$ref': 'models.yaml#/Model'}}}},
+                },
+            },
+        )))
+        spec_paths.append(spec_path)
+    return spec_paths
+
+
+@pytest.mark.parametrize(
+    'document_uri, content, content_type',
+    [
+        ('file:///document.yaml', b'key: value', ''),
+        ('file:///document.json', b'{"key": "value"}', ''),
+        ('http://host/document', b'key: value', 'application/x-YAML'),
+        ('http://host/document', b'{"key": "value"}', 'application/json'),
+    ],
+)
+def test_parse_reference_document(document_uri, content, content_type):
+    assert parse_reference_document(document_uri, content, content_type) == {'key': 'value'}
+
+
+def test_load_reference_document_parses_each_content_once(reference_documents_cache):
+    document = load_reference_document('file:///document.json#/key', b'{"key": "value"}')
+    assert load_reference_document('file:///document.json', b'{"key": "value"}') is document
+    # Modified documents, or the same content under other URIs, are parsed again
+    assert load_reference_document('file:///document.json', b'{"key": "other"}') == {'key': 'other'}
+    assert load_reference_document('file:///other.json', b'{"key": "value"}') is not document
+    assert reference_documents_cache.stats() == {'hits': 1, 'misses': 3, 'size': 3, 'content_size': 48}
+
+
+def test_load_file_document(reference_documents_cache, models_path):
+    document = load_file_document(uri(models_path.strpath))
+    assert document['Model']['type'] == 'object'
+    assert load_file_document('{}#/Model'.format(uri(models_path.strpath))) is document
+
+
+def test_specs_share_the_referenced_documents(reference_documents_cache, spec_paths, models_path):
+    old_spec, new_spec = [load_uncached_spec_from_uri(uri(spec_path.strpath)) for spec_path in spec_paths]
+    models_uri = '{}#/Model'.format(uri(models_path.strpath))
+    assert old_spec.resolver.resolve(models_uri)[1] is new_spec.resolver.resolve(models_uri)[1]
+    assert reference_documents_cache.stats()['misses'] == 1
+
+    # Specs loaded after the referenced document is modified get the new document
+    models_path.write(yaml.safe_dump({'Model': {'type': 'object'}}))
+    spec = load_uncached_spec_from_uri(uri(spec_paths[0].strpath))
+    assert spec.resolver.resolve(models_uri)[1] == {'type': 'object'}
+    assert old_spec.resolver.resolve(models_uri)[1]['properties'] == {'property': {'type': 'string'}}
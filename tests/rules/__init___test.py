@@ -3,16 +3,63 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import json
+import os
+import pickle
+import threading
+import time
 import typing
+from collections import OrderedDict
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 
+import mock
 import pytest
+from bravado_core.spec import Spec
 
+from swagger_spec_compatibility.cache import ContentHashCache
+from swagger_spec_compatibility.executors import ExecutorType
+from swagger_spec_compatibility.executors import SerialExecutor
+from swagger_spec_compatibility.rules import _as_completed
+from swagger_spec_compatibility.rules import _compute_walkers
+from swagger_spec_compatibility.rules import _group_rules
+from swagger_spec_compatibility.rules import _iter_validate_rules
+from swagger_spec_compatibility.rules import _RulesSubmitter
+from swagger_spec_compatibility.rules import _specs_key
+from swagger_spec_compatibility.rules import _SpecsFiles
+from swagger_spec_compatibility.rules import _validate_rules_in_worker
+from swagger_spec_compatibility.rules import _WalkersPlan
+from swagger_spec_compatibility.rules import _WORKER_SPECS
 from swagger_spec_compatibility.rules import compatibility_status
+from swagger_spec_compatibility.rules import compatibility_status_chain
+from swagger_spec_compatibility.rules import compatibility_status_many
+from swagger_spec_compatibility.rules import compatibility_status_matrix
+from swagger_spec_compatibility.rules import iter_compatibility_status
+from swagger_spec_compatibility.rules import multi_run_wrapper
 from swagger_spec_compatibility.rules import RuleProtocol
+from swagger_spec_compatibility.rules import SpecsPairStatus
+from swagger_spec_compatibility.rules import validate_rules
+from swagger_spec_compatibility.rules import validate_rules_group
 from swagger_spec_compatibility.rules import ValidationMessage
+from swagger_spec_compatibility.rules.added_enum_value_in_response import AddedEnumValueInRequest
+from swagger_spec_compatibility.rules.changed_type import ChangedType
+from swagger_spec_compatibility.rules.common import Level
 from swagger_spec_compatibility.rules.common import RuleRegistry
+from swagger_spec_compatibility.rules.deleted_endpoint import DeletedEndpoint
+from swagger_spec_compatibility.rules.removed_enum_value_from_request import RemovedEnumValueFromRequest
+from swagger_spec_compatibility.spec_utils import load_spec_from_uri
+from swagger_spec_compatibility.spec_utils import load_uncached_spec_from_uri
+from swagger_spec_compatibility.walkers import BudgetExceeded
+from swagger_spec_compatibility.walkers.changed_types import ChangedTypesDifferWalker
+from swagger_spec_compatibility.walkers.enum_values import EnumValuesDifferWalker
+from swagger_spec_compatibility.walkers.request_parameters import RequestParametersWalker
+from swagger_spec_compatibility.walkers.response_paths import ResponsePathsWalker
+from tests.conftest import DummyErrorRule
 from tests.conftest import DummyRule
 from tests.conftest import DummyRuleFailIfDifferent
+from tests.conftest import DummyWarningRule
 
 
 def test_compatibility_status_returns_no_issues_if_same_specs_default_parameters(
@@ -48,3 +95,627 @@ def test_compatibility_status_returns_no_issues_if_same_specs_defined_rules(
         rules=rules,
     )
     assert result == expected_result
+
+
+def test_group_rules_groups_together_rules_consuming_walkers():
+    assert _group_rules([DummyRule, ChangedType, DummyErrorRule, AddedEnumValueInRequest]) == [
+        [ChangedType, AddedEnumValueInRequest],
+        [DummyRule],
+        [DummyErrorRule],
+    ]
+    assert _group_rules([DummyRule]) == [[DummyRule]]
+
+
+def test_group_rules_schedules_cheap_rules_first():
+    assert _group_rules([DummyRule, ChangedType, DummyErrorRule, AddedEnumValueInRequest], cheap_first=True) == [
+        [DummyRule],
+        [DummyErrorRule],
+        [ChangedType, AddedEnumValueInRequest],
+    ]
+
+
+def test_validate_rules(minimal_spec):
+    assert validate_rules(minimal_spec, minimal_spec, DummyErrorRule) == [DummyErrorRule.validation_message('test')]
+    assert multi_run_wrapper((minimal_spec, minimal_spec, DummyRule)) == []
+
+
+def test_validate_rules_group_walks_the_specs_once(minimal_spec):
+    with mock.patch('swagger_spec_compatibility.rules.walkers_cache', autospec=True) as mock_walkers_cache:
+        assert validate_rules_group(minimal_spec, minimal_spec, [ChangedType, DummyErrorRule, AddedEnumValueInRequest]) == [
+            [],
+            [DummyErrorRule.validation_message('test')],
+            [],
+        ]
+    mock_walkers_cache.return_value.__enter__.return_value.prefetch.assert_called_once_with(
+        walker_classes={ChangedTypesDifferWalker, EnumValuesDifferWalker, RequestParametersWalker, ResponsePathsWalker},
+        left_spec=minimal_spec,
+        right_spec=minimal_spec,
+    )
+
+
+@pytest.mark.parametrize('lazy_dereferencing', [False, True])
+@pytest.mark.parametrize(
+    'executor', [ExecutorType.SERIAL, ExecutorType.THREAD, ExecutorType.PROCESS],
+)
+def test_compatibility_status_with_executors(mock_RuleRegistry, minimal_spec, executor, lazy_dereferencing):
+    assert compatibility_status(
+        old_spec=minimal_spec,
+        new_spec=minimal_spec,
+        rules=(DummyRule, DummyErrorRule, ChangedType),
+        executor=executor,
+        jobs=2,
+        lazy_dereferencing=lazy_dereferencing,
+    ) == {
+        DummyRule: [],
+        DummyErrorRule: [DummyErrorRule.validation_message('test')],
+        ChangedType: [],
+    }
+
+
+def test_compatibility_status_does_not_shut_down_caller_supplied_executor(minimal_spec):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        for _ in range(2):
+            assert compatibility_status(
+                old_spec=minimal_spec,
+                new_spec=minimal_spec,
+                rules=(DummyErrorRule,),
+                executor=executor,
+            ) == {DummyErrorRule: [DummyErrorRule.validation_message('test')]}
+
+
+def test_compatibility_status_with_caller_supplied_process_pool(minimal_spec):
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        for _ in range(2):
+            assert compatibility_status(
+                old_spec=minimal_spec,
+                new_spec=minimal_spec,
+                rules=(DummyErrorRule, DummyRule),
+                executor=executor,
+            ) == {DummyErrorRule: [DummyErrorRule.validation_message('test')], DummyRule: []}
+
+
+@pytest.fixture
+def clean_worker_specs():
+    _WORKER_SPECS.clear()
+    yield _WORKER_SPECS
+    _WORKER_SPECS.clear()
+
+
+@pytest.fixture
+def specs_path(tmpdir, minimal_spec):
+    specs_path = tmpdir.join('specs.pickle')
+    specs_path.write_binary(pickle.dumps((minimal_spec, minimal_spec)))
+    return specs_path.strpath
+
+
+def test__validate_rules_in_worker_deserializes_specs_once(clean_worker_specs, specs_path):
+    with mock.patch('swagger_spec_compatibility.rules.pickle.load', autospec=True, side_effect=pickle.load) as mock_load:
+        assert _validate_rules_in_worker('key', specs_path, [DummyErrorRule]) == [[DummyErrorRule.validation_message('test')]]
+        assert _validate_rules_in_worker('key', specs_path, [DummyRule]) == [[]]
+        assert _validate_rules_in_worker('key', None, [DummyRule]) == [[]]
+    assert mock_load.call_count == 1
+
+
+def test__validate_rules_in_worker_keeps_a_bounded_number_of_specs(clean_worker_specs, specs_path):
+    for specs_key in ('key1', 'key2', 'key3'):
+        _validate_rules_in_worker(specs_key, specs_path, [DummyRule])
+    assert list(clean_worker_specs) == ['key2', 'key3']
+
+
+def test__RulesSubmitter_ships_specs_once(clean_worker_specs, minimal_spec):
+    executor = mock.Mock(spec=ProcessPoolExecutor)
+    submitter = _RulesSubmitter(executor, minimal_spec, minimal_spec, specs_key='key', specs_shipped=False)
+    submitter.submit([DummyRule])
+    submitter.submit([DummyErrorRule], fail_fast=True)
+
+    # The tasks carry only the path of the serialized specs
+    specs_path = submitter.specs_path
+    assert executor.submit.call_args_list == [
+        mock.call(_validate_rules_in_worker, 'key', specs_path, [DummyRule], False, None, None, False),
+        mock.call(_validate_rules_in_worker, 'key', specs_path, [DummyErrorRule], True, None, None, False),
+    ]
+    assert _validate_rules_in_worker('key', specs_path, [DummyErrorRule]) == [[DummyErrorRule.validation_message('test')]]
+    submitter.close()
+    assert not os.path.exists(specs_path)
+
+
+def test__SpecsFiles_keeps_the_files_of_specs_identified_by_content(minimal_spec):
+    specs_files = _SpecsFiles(max_unused=1)
+    path = specs_files.acquire('key1', (minimal_spec, minimal_spec))
+    assert specs_files.acquire('key1', (minimal_spec, minimal_spec)) == path
+    specs_files.release('key1')
+    assert os.path.exists(path)  # Still in use
+    specs_files.release('key1', keep=True)
+    assert os.path.exists(path)
+    assert specs_files.acquire('key1', (minimal_spec, minimal_spec)) == path
+    specs_files.release('key1', keep=True)
+
+    other_path = specs_files.acquire('key2', (minimal_spec, minimal_spec))
+    specs_files.release('key2', keep=True)
+    assert not os.path.exists(path) and os.path.exists(other_path)  # Least recently used file removed
+    not_kept_path = specs_files.acquire('key3', (minimal_spec, minimal_spec))
+    specs_files.release('key3')
+    assert not os.path.exists(not_kept_path) and os.path.exists(other_path)  # Files of specs not identified by content
+    specs_files.clear()
+    assert not os.path.exists(other_path)
+
+
+def test_iter_compatibility_status_ships_cached_specs_once_across_calls(clean_worker_specs, tmpdir, minimal_spec_dict):
+    spec_path = tmpdir.join('swagger.json')
+    spec_path.write(json.dumps(minimal_spec_dict))
+    specs_cache = ContentHashCache()  # type: ContentHashCache[Spec]
+    executor = mock.Mock(spec=ProcessPoolExecutor)
+    executor.submit.side_effect = lambda fn, *args: SerialExecutor().submit(fn, *args)
+    with mock.patch(
+        'swagger_spec_compatibility.rules._SPECS_FILES', _SpecsFiles(max_unused=1),
+    ) as specs_files, mock.patch(
+        'swagger_spec_compatibility.rules.pickle.dump', autospec=True, side_effect=pickle.dump,
+    ) as mock_dump:
+        for _ in range(2):
+            spec = load_spec_from_uri('file://{}'.format(spec_path.strpath), specs_cache=specs_cache)
+            assert compatibility_status(spec, spec, rules=(DummyErrorRule,), executor=executor) == {
+                DummyErrorRule: [DummyErrorRule.validation_message('test')],
+            }
+        specs_files.clear()
+
+    assert mock_dump.call_count == 1
+    assert len({call[0][1] for call in executor.submit.call_args_list}) == 1
+    assert list(clean_worker_specs) == [_specs_key(spec, spec)]
+
+
+def test__RulesSubmitter_does_not_serialize_specs_shipped_via_the_pool_initializer(minimal_spec):
+    with mock.patch('swagger_spec_compatibility.rules.pickle.dump', autospec=True) as mock_dump:
+        submitter = _RulesSubmitter(mock.Mock(spec=ProcessPoolExecutor), minimal_spec, minimal_spec, specs_key='key', specs_shipped=True)
+        submitter.submit([DummyRule])
+    assert not mock_dump.called
+    assert submitter.executor.submit.call_args_list == [
+        mock.call(_validate_rules_in_worker, 'key', None, [DummyRule], False, None, None, False),
+    ]
+
+
+def test__RulesSubmitter_does_not_serialize_specs_for_in_process_executors(minimal_spec):
+    with ThreadPoolExecutor(max_workers=1) as executor, mock.patch(
+        'swagger_spec_compatibility.rules.pickle.dump', autospec=True,
+    ) as mock_dump:
+        submitter = _RulesSubmitter(executor, minimal_spec, minimal_spec, specs_key='key', specs_shipped=False)
+        assert submitter.submit([DummyErrorRule]).result() == [[DummyErrorRule.validation_message('test')]]
+    assert not mock_dump.called
+
+
+@pytest.mark.parametrize(
+    'executor', [ExecutorType.SERIAL, ExecutorType.THREAD, ExecutorType.PROCESS],
+)
+def test_iter_compatibility_status(mock_RuleRegistry, minimal_spec, executor):
+    assert sorted(
+        iter_compatibility_status(
+            old_spec=minimal_spec,
+            new_spec=minimal_spec,
+            rules=(DummyRule, DummyErrorRule, DummyWarningRule),
+            executor=executor,
+        ),
+        key=lambda rule_message: rule_message[0].error_code,
+    ) == [
+        (DummyErrorRule, DummyErrorRule.validation_message('test')),
+        (DummyWarningRule, DummyWarningRule.validation_message('test')),
+    ]
+
+
+def test_iter_compatibility_status_yields_messages_while_rules_are_running(minimal_spec):
+    messages = iter_compatibility_status(
+        old_spec=minimal_spec,
+        new_spec=minimal_spec,
+        rules=(DummyErrorRule, DummyWarningRule),
+        executor=ExecutorType.SERIAL,
+    )
+    with mock.patch.object(DummyWarningRule, 'validate', autospec=True) as mock_validate:
+        assert next(messages) == (DummyErrorRule, DummyErrorRule.validation_message('test'))
+        # The next rule is evaluated only once the following message is requested
+        assert not mock_validate.called
+    messages.close()
+
+
+def test_iter_compatibility_status_cancels_pending_tasks_on_close(minimal_spec):
+    executor = mock.Mock(spec=ThreadPoolExecutor)
+    executor.__class__ = ThreadPoolExecutor  # type: ignore
+    completed_future = Future()  # type: Future[typing.List[typing.List[ValidationMessage]]]
+    completed_future.set_result([[DummyErrorRule.validation_message('test')]])
+    pending_future = mock.Mock(spec=Future)
+    executor.submit.side_effect = [completed_future, pending_future]
+
+    with mock.patch(
+        'swagger_spec_compatibility.rules.as_completed', autospec=True, return_value=iter([completed_future]),
+    ):
+        messages = iter_compatibility_status(
+            old_spec=minimal_spec,
+            new_spec=minimal_spec,
+            rules=(DummyErrorRule, DummyWarningRule),
+            executor=executor,
+        )
+        assert next(messages) == (DummyErrorRule, DummyErrorRule.validation_message('test'))
+        messages.close()
+
+    pending_future.cancel.assert_called_once_with()
+
+
+@pytest.mark.parametrize(
+    'executor', [ExecutorType.SERIAL, ExecutorType.THREAD, ExecutorType.PROCESS],
+)
+def test_iter_compatibility_status_fail_fast_stops_at_first_error(minimal_spec, executor):
+    assert list(
+        iter_compatibility_status(
+            old_spec=minimal_spec,
+            new_spec=minimal_spec,
+            rules=(DummyErrorRule, DummyErrorRule),
+            executor=executor,
+            jobs=1,
+            fail_fast=True,
+        ),
+    ) == [(DummyErrorRule, DummyErrorRule.validation_message('test'))]
+
+
+def test_iter_compatibility_status_fail_fast_reports_non_error_messages(minimal_spec):
+    assert list(
+        iter_compatibility_status(
+            old_spec=minimal_spec,
+            new_spec=minimal_spec,
+            rules=(DummyWarningRule, DummyErrorRule, DummyRuleFailIfDifferent),
+            executor=ExecutorType.SERIAL,
+            fail_fast=True,
+        ),
+    ) == [
+        (DummyWarningRule, DummyWarningRule.validation_message('test')),
+        (DummyErrorRule, DummyErrorRule.validation_message('test')),
+    ]
+
+
+def test_validate_rules_group_fail_fast_does_not_prefetch_walkers(minimal_spec):
+    with mock.patch('swagger_spec_compatibility.rules.walkers_cache', autospec=True) as mock_walkers_cache:
+        assert validate_rules_group(minimal_spec, minimal_spec, [ChangedType, DummyErrorRule], fail_fast=True) == [
+            [],
+            [DummyErrorRule.validation_message('test')],
+        ]
+    mock_walkers_cache.assert_called_once_with(None, lazy=True, budget=mock.ANY, lazy_dereferencing=False)
+    assert not mock_walkers_cache.return_value.__enter__.return_value.prefetch.called
+
+
+@pytest.mark.parametrize(
+    'executor', [ExecutorType.SERIAL, ExecutorType.THREAD, ExecutorType.PROCESS],
+)
+def test_compatibility_status_reports_rules_exceeding_max_visited_nodes_as_incomplete(minimal_spec, executor):
+    assert compatibility_status(
+        old_spec=minimal_spec,
+        new_spec=minimal_spec,
+        rules=(ChangedType, DummyErrorRule),
+        executor=executor,
+        max_visited_nodes=1,
+    ) == {
+        ChangedType: [
+            ValidationMessage(
+                level=Level.INCOMPLETE,
+                rule=ChangedType,
+                reference='RequestParametersWalker exceeded the budget of 1 visited nodes',
+            ),
+        ],
+        DummyErrorRule: [DummyErrorRule.validation_message('test')],
+    }
+
+
+class _SlowRule(object):
+    error_code = 'TEST_SLOW'
+    short_name = 'Slow rule'
+    error_level = Level.WARNING
+
+    @classmethod
+    def validate(cls, left_spec, right_spec):
+        # type: (typing.Any, typing.Any) -> typing.Iterable[ValidationMessage]
+        for reference in ('first', 'second'):
+            yield ValidationMessage(level=cls.error_level, rule=cls, reference=reference)  # type: ignore
+
+
+def test_validate_rules_group_reports_rules_exceeding_timeout_as_incomplete(minimal_spec):
+    with mock.patch('swagger_spec_compatibility.walkers.time.time', autospec=True, side_effect=[0, 0, 0, 0, 3]):
+        assert validate_rules_group(minimal_spec, minimal_spec, [_SlowRule], timeout=2) == [  # type: ignore
+            [
+                ValidationMessage(level=Level.WARNING, rule=_SlowRule, reference='first'),  # type: ignore
+                ValidationMessage(level=Level.INCOMPLETE, rule=_SlowRule, reference='Time budget of 2 seconds exceeded'),  # type: ignore
+            ],
+        ]
+
+
+def test_validate_rules_reports_cancelled_rules_as_incomplete(minimal_spec):
+    cancel_event = threading.Event()
+    rules_messages = _iter_validate_rules(
+        minimal_spec, minimal_spec, [_SlowRule, DummyErrorRule], cancel_event=cancel_event,  # type: ignore
+    )
+    assert next(rules_messages) == (_SlowRule, ValidationMessage(level=Level.WARNING, rule=_SlowRule, reference='first'))  # type: ignore
+    cancel_event.set()
+    # The running rule is interrupted and the following rules are not evaluated
+    assert list(rules_messages) == [
+        (_SlowRule, ValidationMessage(level=Level.INCOMPLETE, rule=_SlowRule, reference='Evaluation cancelled')),  # type: ignore
+    ]
+
+
+class _SleepingRule(object):
+    error_code = 'TEST_SLEEPING'
+    short_name = 'Sleeping rule'
+    error_level = Level.WARNING
+    walkers = ()  # type: typing.Tuple[typing.Any, ...]
+
+    @classmethod
+    def validate(cls, left_spec, right_spec):
+        # type: (typing.Any, typing.Any) -> typing.Iterable[ValidationMessage]
+        time.sleep(60)
+        return ()
+
+
+def test_iter_compatibility_status_fail_fast_does_not_wait_for_the_running_rules(minimal_spec):
+    start = time.time()
+    assert list(
+        iter_compatibility_status(
+            old_spec=minimal_spec,
+            new_spec=minimal_spec,
+            rules=(DummyErrorRule, _SleepingRule),  # type: ignore
+            executor=ExecutorType.PROCESS,
+            jobs=2,
+            fail_fast=True,
+        ),
+    ) == [(DummyErrorRule, DummyErrorRule.validation_message('test'))]
+    # The worker evaluating _SleepingRule is terminated
+    assert time.time() - start < 30
+
+
+@pytest.mark.parametrize(
+    'executor', [ExecutorType.SERIAL, ExecutorType.THREAD, ExecutorType.PROCESS],
+)
+def test_iter_compatibility_status_stops_once_cancelled(minimal_spec, executor):
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert list(
+        iter_compatibility_status(
+            old_spec=minimal_spec,
+            new_spec=minimal_spec,
+            rules=(DummyErrorRule, ChangedType),
+            executor=executor,
+            cancel_event=cancel_event,
+        ),
+    ) == []
+
+
+def test__as_completed_stops_once_cancelled():
+    cancel_event = threading.Event()
+    completed_future = Future()  # type: Future[None]
+    completed_future.set_result(None)
+    completed_futures = _as_completed([completed_future, Future()], cancel_event)
+
+    assert next(completed_futures) is completed_future
+    cancel_event.set()
+    assert list(completed_futures) == []
+
+
+def test__WalkersPlan():
+    plan = _WalkersPlan([DummyRule, ChangedType, AddedEnumValueInRequest, RemovedEnumValueFromRequest], partitions=2)
+
+    assert plan.rules == [ChangedType, AddedEnumValueInRequest, RemovedEnumValueFromRequest]
+    assert plan.walkers_partitions == [
+        [ChangedTypesDifferWalker, RequestParametersWalker],
+        [EnumValuesDifferWalker, ResponsePathsWalker],
+    ]
+    assert plan.computed([ChangedTypesDifferWalker, RequestParametersWalker]) == []
+    assert plan.computed([EnumValuesDifferWalker, ResponsePathsWalker]) == [
+        ChangedType, AddedEnumValueInRequest, RemovedEnumValueFromRequest,
+    ]
+    assert plan.computed([]) == []
+
+    assert _WalkersPlan([ChangedType], partitions=8).walkers_partitions == [
+        [ChangedTypesDifferWalker], [RequestParametersWalker], [ResponsePathsWalker],
+    ]
+
+
+@pytest.mark.parametrize('executor', [ExecutorType.THREAD, ExecutorType.PROCESS])
+def test_compatibility_status_computes_declared_walkers_in_parallel(minimal_spec, executor):
+    rules = (ChangedType, AddedEnumValueInRequest, RemovedEnumValueFromRequest, DeletedEndpoint)
+    with mock.patch(
+        'swagger_spec_compatibility.rules._RulesSubmitter.submit_walkers', autospec=True,
+        side_effect=_RulesSubmitter.submit_walkers,
+    ) as mock_submit_walkers, mock.patch(
+        'swagger_spec_compatibility.rules._RulesSubmitter.submit', autospec=True, side_effect=_RulesSubmitter.submit,
+    ) as mock_submit:
+        assert compatibility_status(minimal_spec, minimal_spec, rules, executor=executor, jobs=2) == {
+            rule: [] for rule in rules
+        }
+
+    assert sorted(
+        walker.__name__
+        for call in mock_submit_walkers.call_args_list
+        for walker in call[0][1]
+    ) == ['ChangedTypesDifferWalker', 'EnumValuesDifferWalker', 'RequestParametersWalker', 'ResponsePathsWalker']
+    assert mock_submit_walkers.call_count == 2
+    # Only the rules not declaring walkers are evaluated by the workers
+    assert [call[0][1] for call in mock_submit.call_args_list] == [[DeletedEndpoint]]
+
+
+def test__compute_walkers(minimal_spec):
+    results = _compute_walkers(
+        minimal_spec, minimal_spec, [RequestParametersWalker, ChangedTypesDifferWalker], max_visited_nodes=1,
+    )
+    assert set(results) == {RequestParametersWalker, ChangedTypesDifferWalker}
+    assert all(isinstance(result, BudgetExceeded) for result in results.values())
+
+    assert _compute_walkers(minimal_spec, minimal_spec, [ChangedTypesDifferWalker]) == {ChangedTypesDifferWalker: []}
+
+
+@pytest.mark.parametrize(
+    'executor', [ExecutorType.SERIAL, ExecutorType.THREAD, ExecutorType.PROCESS],
+)
+def test_compatibility_status_many(minimal_spec_dict, tmpdir, executor):
+    spec_path = tmpdir.join('swagger.json')
+    spec_path.write(json.dumps(minimal_spec_dict))
+    spec_uri = 'file://{}'.format(spec_path.strpath)
+    invalid_spec_uri = 'file://{}'.format(tmpdir.join('not-existing.json').strpath)
+
+    statuses = list(
+        compatibility_status_many(
+            [(spec_uri, spec_uri), (invalid_spec_uri, spec_uri)],
+            rules=(DummyRule, DummyErrorRule),
+            executor=executor,
+        ),
+    )
+
+    assert len(statuses) == 2
+    assert SpecsPairStatus(
+        old_spec_uri=spec_uri,
+        new_spec_uri=spec_uri,
+        status={DummyRule: [], DummyErrorRule: [DummyErrorRule.validation_message('test')]},
+        error=None,
+    ) in statuses
+    invalid_status, = [status for status in statuses if status.old_spec_uri == invalid_spec_uri]
+    assert invalid_status.status is None
+    assert invalid_status.error is not None
+
+
+def test_compatibility_status_many_with_serial_executor_evaluates_pairs_lazily():
+    with mock.patch(
+        'swagger_spec_compatibility.rules._compatibility_status_of_uris', autospec=True,
+    ) as mock_compatibility_status_of_uris:
+        statuses = compatibility_status_many([('old1', 'new1'), ('old2', 'new2')], rules=(), executor=ExecutorType.SERIAL)
+        assert next(statuses) == mock_compatibility_status_of_uris.return_value
+        mock_compatibility_status_of_uris.assert_called_once_with('old1', 'new1', [], None, None)
+        statuses.close()
+
+
+@pytest.mark.parametrize('executor', [ExecutorType.SERIAL, ExecutorType.PROCESS])
+def test_compatibility_status_chain(minimal_spec_dict, tmpdir, executor):
+    spec_uris = []
+    for version in range(3):
+        spec_path = tmpdir.join('v{}.json'.format(version))
+        spec_path.write(json.dumps(minimal_spec_dict))
+        spec_uris.append('file://{}'.format(spec_path.strpath))
+    invalid_spec_uri = 'file://{}'.format(tmpdir.join('not-existing.json').strpath)
+
+    with mock.patch(
+        'swagger_spec_compatibility.rules.load_uncached_spec_from_uri', autospec=True,
+        side_effect=load_uncached_spec_from_uri,
+    ) as mock_load_uncached_spec_from_uri:
+        statuses = list(
+            compatibility_status_chain(
+                spec_uris[:2] + [invalid_spec_uri] + spec_uris[2:],
+                rules=(DummyRule, DummyErrorRule),
+                executor=executor,
+            ),
+        )
+
+    # Each spec is loaded once
+    assert [call[0][0] for call in mock_load_uncached_spec_from_uri.call_args_list] == spec_uris[:2] + [invalid_spec_uri] + spec_uris[2:]
+    assert [(status.old_spec_uri, status.new_spec_uri) for status in statuses] == [
+        (spec_uris[0], spec_uris[1]),
+        (spec_uris[1], invalid_spec_uri),
+        (invalid_spec_uri, spec_uris[2]),
+    ]
+    assert statuses[0].status == {DummyRule: [], DummyErrorRule: [DummyErrorRule.validation_message('test')]}
+    assert statuses[1].status is None and statuses[1].error is not None
+    assert statuses[2].status is None and statuses[2].error == statuses[1].error
+
+
+@pytest.mark.parametrize(
+    'executor',
+    [ExecutorType.SERIAL, ExecutorType.THREAD, ExecutorType.PROCESS, ProcessPoolExecutor(max_workers=1)],
+)
+def test_compatibility_status_matrix(minimal_spec_dict, tmpdir, executor):
+    spec_uris = []
+    for version in range(3):
+        spec_path = tmpdir.join('v{}.json'.format(version))
+        spec_path.write(json.dumps(minimal_spec_dict))
+        spec_uris.append('file://{}'.format(spec_path.strpath))
+    invalid_spec_uri = 'file://{}'.format(tmpdir.join('not-existing.json').strpath)
+
+    try:
+        statuses = {
+            status.old_spec_uri: status
+            for status in compatibility_status_matrix(
+                new_spec_uri=spec_uris[0],
+                old_specs_uris=spec_uris[1:] + [invalid_spec_uri],
+                rules=(DummyRule, DummyErrorRule),
+                executor=executor,
+            )
+        }
+    finally:
+        if isinstance(executor, Executor):
+            executor.shutdown()
+
+    assert set(statuses) == set(spec_uris[1:] + [invalid_spec_uri])
+    for old_spec_uri in spec_uris[1:]:
+        assert statuses[old_spec_uri] == SpecsPairStatus(
+            old_spec_uri=old_spec_uri,
+            new_spec_uri=spec_uris[0],
+            status={DummyRule: [], DummyErrorRule: [DummyErrorRule.validation_message('test')]},
+            error=None,
+        )
+    assert statuses[invalid_spec_uri].status is None and statuses[invalid_spec_uri].error is not None
+
+
+def test_compatibility_status_matrix_loads_new_spec_once(minimal_spec_dict, tmpdir):
+    new_spec_path = tmpdir.join('new.json')
+    new_spec_path.write(json.dumps(minimal_spec_dict))
+    new_spec_uri = 'file://{}'.format(new_spec_path.strpath)
+    old_specs_uris = []
+    for version in range(3):
+        spec_path = tmpdir.join('v{}.json'.format(version))
+        spec_path.write(json.dumps(minimal_spec_dict))
+        old_specs_uris.append('file://{}'.format(spec_path.strpath))
+
+    with mock.patch(
+        'swagger_spec_compatibility.rules.load_uncached_spec_from_uri', autospec=True,
+        side_effect=load_uncached_spec_from_uri,
+    ) as mock_load_uncached_spec_from_uri, mock.patch(
+        'swagger_spec_compatibility.rules.load_spec_from_uri', autospec=True,
+        side_effect=load_uncached_spec_from_uri,
+    ) as mock_load_spec_from_uri:
+        statuses = list(
+            compatibility_status_matrix(
+                new_spec_uri=new_spec_uri,
+                old_specs_uris=old_specs_uris,
+                rules=(DummyRule,),
+                executor=ExecutorType.THREAD,
+            ),
+        )
+
+    assert len(statuses) == 3
+    mock_load_uncached_spec_from_uri.assert_called_once_with(new_spec_uri)
+    assert sorted(call[0][0] for call in mock_load_spec_from_uri.call_args_list) == sorted(old_specs_uris)
+
+
+def test_compatibility_status_matrix_ships_new_spec_by_path(minimal_spec_dict, tmpdir):
+    spec_uris = []
+    for version in range(3):
+        spec_path = tmpdir.join('v{}.json'.format(version))
+        spec_path.write(json.dumps(minimal_spec_dict))
+        spec_uris.append('file://{}'.format(spec_path.strpath))
+
+    executor = mock.Mock(spec=ProcessPoolExecutor)
+    executor.submit.side_effect = lambda fn, *args: SerialExecutor().submit(fn, *args)
+    with mock.patch('swagger_spec_compatibility.rules._WORKER_NEW_SPECS', OrderedDict()) as worker_new_specs:
+        statuses = list(
+            compatibility_status_matrix(
+                new_spec_uri=spec_uris[0], old_specs_uris=spec_uris[1:], rules=(DummyRule,), executor=executor,
+            ),
+        )
+
+    assert [status.error for status in statuses] == [None, None]
+    # The tasks carry only the path of the serialized new spec, removed once the tasks completed
+    new_spec_paths = {call[0][2] for call in executor.submit.call_args_list}
+    assert len(new_spec_paths) == 1 and not os.path.exists(new_spec_paths.pop())
+    assert len(worker_new_specs) == 1
+
+
+def test_compatibility_status_matrix_new_spec_loading_failure(tmpdir):
+    new_spec_uri = 'file://{}'.format(tmpdir.join('not-existing.json').strpath)
+    statuses = list(
+        compatibility_status_matrix(
+            new_spec_uri=new_spec_uri,
+            old_specs_uris=['old1', 'old2'],
+            rules=(DummyRule,),
+            executor=ExecutorType.SERIAL,
+        ),
+    )
+    assert [(status.old_spec_uri, status.status) for status in statuses] == [('old1', None), ('old2', None)]
+    assert statuses[0].error is not None and statuses[0].error == statuses[1].error
@@ -7,10 +7,15 @@ import mock
 import pytest
 
 from swagger_spec_compatibility.rules.changed_type import ChangedType
+from swagger_spec_compatibility.rules.common import BaseRule
 from swagger_spec_compatibility.rules.common import get_rule_documentation_link
 from swagger_spec_compatibility.rules.common import Level
 from swagger_spec_compatibility.rules.common import RuleRegistry
+from swagger_spec_compatibility.rules.common import RuleType
+from swagger_spec_compatibility.rules.common import uses_walkers
 from swagger_spec_compatibility.rules.common import ValidationMessage
+from swagger_spec_compatibility.walkers.enum_values import EnumValuesDifferWalker
+from swagger_spec_compatibility.walkers.response_paths import ResponsePathsWalker
 from tests.conftest import DummyRule
 from tests.conftest import DummyRuleWithDocumentationLink
 
@@ -65,3 +70,40 @@ def test_initializing_BaseRule_throws_an_exception():
         DummyRule()
 
     assert excinfo.value.args == ('This class should not be initialized. The assumed usage is via class methods.',)
+
+
+def test_uses_walkers(mock_RuleRegistry_empty):
+    @uses_walkers(ResponsePathsWalker, EnumValuesDifferWalker)
+    class CustomRule(BaseRule):
+        error_code = 'TEST_CUSTOM'
+        error_level = Level.ERROR
+        description = 'Rule description'
+        rule_type = RuleType.MISCELLANEOUS
+        short_name = 'CustomRule'
+        walkers = (ResponsePathsWalker,)
+
+        @classmethod
+        def validate(cls, left_spec, right_spec):  # pragma: no cover
+            return ()
+
+    assert CustomRule.walkers == (ResponsePathsWalker, EnumValuesDifferWalker)
+    assert BaseRule.walkers == ()
+    assert RuleRegistry.rule('TEST_CUSTOM') is CustomRule
+
+
+def test_uses_walkers_accepts_only_walkers():
+    with pytest.raises(AssertionError):
+        uses_walkers(DummyRule)  # type: ignore
+
+
+def test_RuleRegistry_validates_declared_walkers(mock_RuleRegistry_empty):
+    with pytest.raises(AssertionError) as excinfo:
+        class CustomRule(BaseRule):
+            error_code = 'TEST_CUSTOM'
+            error_level = Level.ERROR
+            description = 'Rule description'
+            rule_type = RuleType.MISCELLANEOUS
+            short_name = 'CustomRule'
+            walkers = (DummyRule,)
+
+    assert 'walkers should contain only SchemaWalker subclasses' in str(excinfo.value)
@@ -3,15 +3,27 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import bz2
+import gzip
+import io
 import json
 import os
+import threading
 
 import mock
 import pytest
 import six
+import yaml
 from bravado_core.operation import Operation
+from bravado_core.spec import Spec
 
+from swagger_spec_compatibility.cache import ContentHashCache
 from swagger_spec_compatibility.cli.common import uri
+from swagger_spec_compatibility.executors import ExecutorType
+from swagger_spec_compatibility.interning import SpecsInterner
+from swagger_spec_compatibility.profiling import Timings
+from swagger_spec_compatibility.spec_utils import decompress_spec_content
+from swagger_spec_compatibility.spec_utils import detect_spec_format
 from swagger_spec_compatibility.spec_utils import Endpoint
 from swagger_spec_compatibility.spec_utils import get_endpoints
 from swagger_spec_compatibility.spec_utils import get_operation_mappings
@@ -20,11 +32,30 @@ from swagger_spec_compatibility.spec_utils import get_properties
 from swagger_spec_compatibility.spec_utils import get_required_properties
 from swagger_spec_compatibility.spec_utils import HTTPVerb
 from swagger_spec_compatibility.spec_utils import iterate_on_responses_status_codes
+from swagger_spec_compatibility.spec_utils import load_spec_from_content
 from swagger_spec_compatibility.spec_utils import load_spec_from_spec_dict
 from swagger_spec_compatibility.spec_utils import load_spec_from_uri
+from swagger_spec_compatibility.spec_utils import load_specs_concurrently
+from swagger_spec_compatibility.spec_utils import parse_spec_content
+from swagger_spec_compatibility.spec_utils import precompute_spec_data
+from swagger_spec_compatibility.spec_utils import read_spec_content
+from swagger_spec_compatibility.spec_utils import SpecFormat
 from swagger_spec_compatibility.spec_utils import StatusCodeSchema
+from swagger_spec_compatibility.spec_utils import streamable_file_path
 from swagger_spec_compatibility.util import EntityMapping
 
+try:
+    import lzma
+except ImportError:  # pragma: no cover  # py<3.3
+    lzma = None
+
+
+def gzip_compress(content):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as f:
+        f.write(content)
+    return buffer.getvalue()
+
 
 @pytest.fixture
 def mock_operation(simple_operation_dict):
@@ -82,6 +113,229 @@ def test_load_spec_from_uri(tmpdir, minimal_spec_dict):
     assert load_spec_from_uri(uri(spec_path)).spec_dict == minimal_spec_dict
 
 
+def test_load_spec_from_uri_is_cached_by_content(tmpdir, minimal_spec_dict):
+    spec_path = str(os.path.join(tmpdir.strpath, 'swagger.json'))
+    with open(spec_path, 'w') as f:
+        json.dump(minimal_spec_dict, f)
+    specs_cache = ContentHashCache()  # type: ContentHashCache[Spec]
+    spec = load_spec_from_uri(uri(spec_path), specs_cache=specs_cache)
+    assert load_spec_from_uri(uri(spec_path), specs_cache=specs_cache) is spec
+
+    # Modified specs are loaded again
+    with open(spec_path, 'w') as f:
+        json.dump(dict(minimal_spec_dict, info={'title': 'Other', 'version': '2.0'}), f)
+    assert load_spec_from_uri(uri(spec_path), specs_cache=specs_cache).spec_dict['info']['title'] == 'Other'
+    assert specs_cache.stats() == {'hits': 1, 'misses': 2, 'size': 2, 'content_size': mock.ANY}
+
+
+def test_load_spec_from_uri_reloads_specs_with_modified_references(tmpdir, minimal_spec_dict):
+    tmpdir.join('definitions.json').write(json.dumps({'model': {'type': 'object'}}))
+    spec_path = tmpdir.join('swagger.json').strpath
+    with open(spec_path, 'w') as f:
+        json.dump(dict(minimal_spec_dict, definitions={'model': {'$ref': 'definitions.json#/model'}}), f)
+    specs_cache = ContentHashCache()  # type: ContentHashCache[Spec]
+    spec = load_spec_from_uri(uri(spec_path), specs_cache=specs_cache)
+    assert load_spec_from_uri(uri(spec_path), specs_cache=specs_cache) is spec
+
+    tmpdir.join('definitions.json').write(json.dumps({'model': {'type': 'string'}}))
+    reloaded_spec = load_spec_from_uri(uri(spec_path), specs_cache=specs_cache)
+    assert reloaded_spec is not spec
+    assert reloaded_spec.deref_flattened_spec['definitions']['lfile:definitions.json|..model'] == {'type': 'string'}
+    assert load_spec_from_uri(uri(spec_path), specs_cache=specs_cache) is reloaded_spec
+
+
+def test_load_spec_from_uri_is_cached_by_loading_mode(tmpdir, minimal_spec_dict):
+    spec_path = tmpdir.join('swagger.json').strpath
+    with open(spec_path, 'w') as f:
+        json.dump(minimal_spec_dict, f)
+    specs_cache = ContentHashCache()  # type: ContentHashCache[Spec]
+    interner = SpecsInterner()
+    spec = load_spec_from_uri(uri(spec_path), specs_cache=specs_cache)
+    lazy_spec = load_spec_from_uri(uri(spec_path), specs_cache=specs_cache, lazy_dereferencing=True)
+    interned_spec = load_spec_from_uri(uri(spec_path), specs_cache=specs_cache, interner=interner)
+    assert len({id(spec), id(lazy_spec), id(interned_spec)}) == 3
+    assert load_spec_from_uri(uri(spec_path), specs_cache=specs_cache, lazy_dereferencing=True) is lazy_spec
+    assert load_spec_from_uri(uri(spec_path), specs_cache=specs_cache, interner=interner) is interned_spec
+    assert load_spec_from_uri(uri(spec_path), specs_cache=specs_cache, interner=SpecsInterner()) is not interned_spec
+
+
+def test_load_spec_from_uri_uses_the_global_cache(tmpdir, minimal_spec_dict):
+    spec_path = str(os.path.join(tmpdir.strpath, 'swagger.json'))
+    with open(spec_path, 'w') as f:
+        json.dump(minimal_spec_dict, f)
+    with mock.patch('swagger_spec_compatibility.spec_utils.SPECS_CACHE', ContentHashCache()) as mock_specs_cache:
+        spec = load_spec_from_uri(uri(spec_path))
+        assert load_spec_from_uri(uri(spec_path)) is spec
+        mock_specs_cache.invalidate()
+        assert load_spec_from_uri(uri(spec_path)) is not spec
+
+
+@pytest.fixture
+def mock_streaming():
+    def parse_json_file(path):
+        with open(path, 'rb') as f:
+            return json.loads(f.read().decode('utf-8'))
+
+    with mock.patch(
+        'swagger_spec_compatibility.spec_utils.is_streaming_available', autospec=True, return_value=True,
+    ), mock.patch(
+        'swagger_spec_compatibility.spec_utils.STREAMING_MIN_SIZE', 0,
+    ), mock.patch(
+        'swagger_spec_compatibility.spec_utils.parse_json_file', autospec=True, side_effect=parse_json_file,
+    ) as mock_parse_json_file:
+        yield mock_parse_json_file
+
+
+@pytest.mark.parametrize(
+    'file_name, content, streamable',
+    [
+        ('swagger.json', json.dumps({'swagger': '2.0'}).encode('utf-8'), True),
+        ('swagger', json.dumps({'swagger': '2.0'}).encode('utf-8'), True),
+        ('swagger.yaml', yaml.safe_dump({'swagger': '2.0'}).encode('utf-8'), False),
+        ('swagger.json.gz', gzip_compress(json.dumps({'swagger': '2.0'}).encode('utf-8')), False),
+    ],
+)
+def test_streamable_file_path(tmpdir, mock_streaming, file_name, content, streamable):
+    tmpdir.join(file_name).write_binary(content)
+    spec_path = tmpdir.join(file_name).strpath
+    assert streamable_file_path(uri(spec_path)) == (spec_path if streamable else None)
+
+
+def test_streamable_file_path_requires_large_local_files_and_ijson(tmpdir):
+    tmpdir.join('swagger.json').write(json.dumps({'swagger': '2.0'}))
+    spec_uri = uri(tmpdir.join('swagger.json').strpath)
+    with mock.patch('swagger_spec_compatibility.spec_utils.is_streaming_available', autospec=True, return_value=True):
+        assert streamable_file_path(spec_uri) is None
+        with mock.patch('swagger_spec_compatibility.spec_utils.STREAMING_MIN_SIZE', 0):
+            assert streamable_file_path(spec_uri) is not None
+            assert streamable_file_path(spec_uri.replace('swagger.json', 'missing.json')) is None
+            assert streamable_file_path('http://host/swagger.json') is None
+    with mock.patch('swagger_spec_compatibility.spec_utils.STREAMING_MIN_SIZE', 0), mock.patch(
+        'swagger_spec_compatibility.spec_utils.is_streaming_available', autospec=True, return_value=False,
+    ):
+        assert streamable_file_path(spec_uri) is None
+
+
+def test_load_spec_from_uri_streams_large_json_specs(tmpdir, minimal_spec_dict, mock_streaming):
+    spec_path = tmpdir.join('swagger.json').strpath
+    with open(spec_path, 'w') as f:
+        json.dump(minimal_spec_dict, f)
+    specs_cache = ContentHashCache()  # type: ContentHashCache[Spec]
+    spec = load_spec_from_uri(uri(spec_path), specs_cache=specs_cache)
+    assert spec.spec_dict == minimal_spec_dict
+    mock_streaming.assert_called_once_with(spec_path)
+    assert specs_cache.stats() == {'hits': 0, 'misses': 1, 'size': 1, 'content_size': os.path.getsize(spec_path)}
+
+    # Memory mapped specs share the cache key of the specs read into memory
+    with mock.patch('swagger_spec_compatibility.spec_utils.STREAMING_MIN_SIZE', float('inf')):
+        assert load_spec_from_uri(uri(spec_path), specs_cache=specs_cache) is spec
+    assert load_spec_from_uri(uri(spec_path), specs_cache=specs_cache, validate=False) is not spec
+    assert mock_streaming.call_count == 2
+
+
+def _load_spec_in_thread(uri, **kwargs):
+    return threading.current_thread().name, uri, kwargs
+
+
+@pytest.mark.parametrize('executor', [ExecutorType.SERIAL, ExecutorType.THREAD, ExecutorType.PROCESS])
+def test_load_specs_concurrently(tmpdir, minimal_spec_dict, executor):
+    spec_uris = []
+    for version in range(2):
+        spec_path = str(os.path.join(tmpdir.strpath, 'swagger-{}.json'.format(version)))
+        with open(spec_path, 'w') as f:
+            json.dump(dict(minimal_spec_dict, info={'title': 'Version {}'.format(version), 'version': '1.0'}), f)
+        spec_uris.append(uri(spec_path))
+    specs = load_specs_concurrently(spec_uris, executor=executor, validate=False)
+    assert [spec.spec_dict['info']['title'] for spec in specs] == ['Version 0', 'Version 1']
+    assert [spec.origin_url for spec in specs] == spec_uris
+
+
+def test_load_specs_concurrently_loads_repeated_uris_once():
+    loaded = load_specs_concurrently(['a', 'b', 'a'], load_spec=_load_spec_in_thread, validate=False)
+    assert [uri for _, uri, _ in loaded] == ['a', 'b', 'a']
+    assert loaded[0] is loaded[2]
+    assert all(kwargs == {'validate': False} for _, _, kwargs in loaded)
+    # The specs are loaded by the executor threads
+    assert threading.current_thread().name not in {thread_name for thread_name, _, _ in loaded}
+
+
+@pytest.mark.parametrize(
+    'file_name, dump',
+    [
+        ('swagger.json', json.dumps),
+        ('swagger.yaml', lambda spec_dict: yaml.safe_dump(spec_dict)),
+    ],
+)
+def test_load_spec_from_content(tmpdir, minimal_spec_dict, file_name, dump):
+    spec_path = str(os.path.join(tmpdir.strpath, file_name))
+    with open(spec_path, 'w') as f:
+        f.write(dump(minimal_spec_dict))
+    spec_uri = uri(spec_path)
+    spec = load_spec_from_content(read_spec_content(spec_uri), origin_url=spec_uri)
+    assert spec.spec_dict == minimal_spec_dict
+    assert spec.origin_url == spec_uri
+
+
+@pytest.mark.parametrize(
+    'extension, compress',
+    [
+        ('', lambda content: content),
+        ('.gz', gzip_compress),
+        ('.bz2', bz2.compress),
+        pytest.param(
+            '.xz', lambda content: lzma.compress(content),
+            marks=pytest.mark.skipif(lzma is None, reason='lzma is not available'),
+        ),
+    ],
+)
+@pytest.mark.parametrize('file_name', ['swagger.json', 'swagger.yaml', 'swagger'])
+def test_parse_spec_content(minimal_spec_dict, file_name, extension, compress):
+    dump = yaml.safe_dump if file_name.endswith('.yaml') else json.dumps
+    content = compress(dump(minimal_spec_dict).encode('utf-8'))
+    assert parse_spec_content(content, 'file:///{}{}'.format(file_name, extension)) == minimal_spec_dict
+
+
+def test_parse_spec_content_converts_yaml_status_codes_to_strings(minimal_spec_dict):
+    content = b"""
+paths:
+  /endpoint:
+    parameters: []
+    get:
+      responses:
+        200:
+          description: ok
+"""
+    assert parse_spec_content(content, 'file:///swagger.yaml')['paths']['/endpoint']['get']['responses'] == {
+        '200': {'description': 'ok'},
+    }
+
+
+def test_parse_spec_content_accounts_parsing_time(minimal_spec_dict):
+    with mock.patch('swagger_spec_compatibility.spec_utils.TIMINGS', Timings()) as mock_timings:
+        parse_spec_content(json.dumps(minimal_spec_dict).encode('utf-8'), 'file:///swagger.json')
+    assert list(mock_timings.timings()) == ['parsing']
+
+
+@pytest.mark.parametrize(
+    'content, origin_url, expected_format',
+    [
+        (b'{}', 'file:///swagger.yaml', SpecFormat.YAML),
+        (b'{}', 'file:///swagger.YML', SpecFormat.YAML),
+        (b'{}', 'git://0123/swagger.yaml.gz', SpecFormat.YAML),
+        (b'a: 1', 'file:///swagger.json', SpecFormat.JSON),
+        (b'a: 1', 'http://host/swagger.json.bz2?query=1', SpecFormat.JSON),
+        (b'  \n{"a": 1}', 'http://host/swagger', SpecFormat.JSON),
+        (b'a: 1', 'http://host/swagger', SpecFormat.YAML),
+    ],
+)
+def test_detect_spec_format(content, origin_url, expected_format):
+    assert detect_spec_format(content, origin_url) is expected_format
+
+
+def test_decompress_spec_content_does_not_alter_not_compressed_content():
+    assert decompress_spec_content(b'{"a": 1}') == b'{"a": 1}'
+
+
 def test_load_spec_from_spec(minimal_spec_dict):
     assert load_spec_from_spec_dict(minimal_spec_dict).spec_dict == minimal_spec_dict
 
@@ -115,6 +369,14 @@ def test_get_endpoints(minimal_spec, spec_and_operation):
     assert get_endpoints(spec) == {Endpoint.from_swagger_operation(operation)}
 
 
+def test_precompute_spec_data(spec_and_operation):
+    spec, operation = spec_and_operation
+    precompute_spec_data(spec)
+    with mock.patch.object(spec, 'resources', new={}):
+        # The endpoints are not computed again
+        assert get_endpoints(spec) == {Endpoint.from_swagger_operation(operation)}
+
+
 def test_get_operation_mappings(minimal_spec, spec_and_operation):
     assert get_operation_mappings(minimal_spec, minimal_spec) == set()
 
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+
+import mock
+import pytest
+from six import iteritems
+
+from swagger_spec_compatibility.cli.common import uri
+from swagger_spec_compatibility.streaming import build_from_events
+from swagger_spec_compatibility.streaming import local_file_path
+from swagger_spec_compatibility.streaming import mapped_file
+from swagger_spec_compatibility.streaming import parse_json_file
+
+
+def _copy(string):
+    # Equal but not identical strings, as produced by a parser
+    return ''.join(list(string))
+
+
+def basic_parse_events(document):
+    """
+    Events produced by ijson.basic_parse while parsing document.
+    """
+    if isinstance(document, dict):
+        yield 'start_map', None
+        for key, value in iteritems(document):
+            yield 'map_key', _copy(key)
+            for event in basic_parse_events(value):
+                yield event
+        yield 'end_map', None
+    elif isinstance(document, list):
+        yield 'start_array', None
+        for item in document:
+            for event in basic_parse_events(item):
+                yield event
+        yield 'end_array', None
+    elif document is None:
+        yield 'null', None
+    elif isinstance(document, bool):
+        yield 'boolean', document
+    elif isinstance(document, int):
+        yield 'integer', document
+    elif isinstance(document, float):
+        yield 'double', document
+    else:
+        yield 'string', _copy(document)
+
+
+@pytest.fixture
+def mock_ijson():
+    def basic_parse(content, use_float):
+        return basic_parse_events(json.loads(content[:].decode('utf-8')))
+
+    with mock.patch('swagger_spec_compatibility.streaming.ijson', autospec=False) as mock_ijson:
+        mock_ijson.basic_parse.side_effect = basic_parse
+        yield mock_ijson
+
+
+@pytest.mark.parametrize(
+    'document',
+    [
+        {},
+        [],
+        'string',
+        1,
+        {'key': [1, 2.5, None, True, {'inner': 'value'}, []], 'other': {}},
+    ],
+)
+def test_build_from_events(document):
+    assert build_from_events(basic_parse_events(document)) == document
+
+
+def test_build_from_events_interns_keys_and_short_strings():
+    document = build_from_events(basic_parse_events([
+        {'type': 'string', 'description': 'long' * 100},
+        {'type': 'string', 'description': 'long' * 100},
+    ]))
+    first_keys, second_keys = (sorted(item) for item in document)
+    assert all(first_key is second_key for first_key, second_key in zip(first_keys, second_keys))
+    assert document[0]['type'] is document[1]['type']
+    assert document[0]['description'] is not document[1]['description']
+
+
+def test_local_file_path(tmpdir):
+    assert local_file_path(uri(tmpdir.strpath)) == tmpdir.strpath
+    assert local_file_path('file://localhost/tmp/swagger.json') == '/tmp/swagger.json'
+    assert local_file_path('file://other-host/tmp/swagger.json') is None
+    assert local_file_path('http://host/swagger.json') is None
+
+
+def test_mapped_file(tmpdir):
+    tmpdir.join('spec.json').write_binary(b'{"swagger": "2.0"}')
+    with mapped_file(tmpdir.join('spec.json').strpath) as content:
+        assert content[:] == b'{"swagger": "2.0"}'
+    tmpdir.join('empty.json').write_binary(b'')
+    with mapped_file(tmpdir.join('empty.json').strpath) as content:
+        assert content == b''
+
+
+def test_parse_json_file(tmpdir, mock_ijson):
+    tmpdir.join('spec.json').write(json.dumps({'swagger': '2.0', 'paths': {}}))
+    assert parse_json_file(tmpdir.join('spec.json').strpath) == {'swagger': '2.0', 'paths': {}}
+    assert mock_ijson.basic_parse.call_args[1] == {'use_float': True}
+
+
+def test_parse_json_file_with_ijson(tmpdir):
+    pytest.importorskip('ijson')
+    document = {'swagger': '2.0', 'info': {'version': 1.5}, 'list': [None, True, 1]}
+    tmpdir.join('spec.json').write(json.dumps(document))
+    assert parse_json_file(tmpdir.join('spec.json').strpath) == document
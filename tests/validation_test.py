@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import datetime
+
+import mock
+import pytest
+
+from swagger_spec_compatibility.validation import ValidationCache
+
+
+def test_key_depends_on_content_and_origin():
+    key = ValidationCache.key({'a': 1, 'b': 2}, 'file:///swagger.json')
+    assert key == ValidationCache.key({'b': 2, 'a': 1}, 'file:///swagger.json')
+    assert key != ValidationCache.key({'a': 1, 'b': 3}, 'file:///swagger.json')
+    assert key != ValidationCache.key({'a': 1, 'b': 2}, 'file:///other.json')
+    # YAML specs could contain types not supported by JSON
+    assert ValidationCache.key({'date': datetime.date(2020, 1, 1)}, None)
+
+
+def test_in_memory_cache():
+    validation_cache = ValidationCache()
+    assert not validation_cache.is_valid('key')
+    validation_cache.mark_valid('key')
+    assert validation_cache.is_valid('key')
+    validation_cache.clear()
+    assert not validation_cache.is_valid('key')
+
+
+def test_persisted_cache(tmpdir):
+    directory = tmpdir.join('cache').strpath
+    ValidationCache(directory).mark_valid('key')
+    validation_cache = ValidationCache(directory)
+    assert validation_cache.is_valid('key')
+    assert not validation_cache.is_valid('other-key')
+    validation_cache.clear()
+    assert not ValidationCache(directory).is_valid('key')
+
+
+def test_persisting_is_best_effort(tmpdir):
+    validation_cache = ValidationCache(tmpdir.join('cache').strpath)
+    with mock.patch('swagger_spec_compatibility.validation.os.makedirs', autospec=True, side_effect=OSError):
+        validation_cache.mark_valid('key')
+    assert validation_cache.is_valid('key')
+    assert not ValidationCache(validation_cache.directory).is_valid('key')
+
+
+def test_key_depends_on_the_referenced_documents(tmpdir):
+    documents = {'file:///definitions.yaml': b'Model: {}'}
+    directory = tmpdir.join('cache').strpath
+    validation_cache = ValidationCache(directory)
+    validation_cache.mark_valid('key', ['file:///definitions.yaml'], documents.__getitem__)
+    assert validation_cache.is_valid('key', documents.__getitem__)
+    assert ValidationCache(directory).is_valid('key', documents.__getitem__)
+
+    documents['file:///definitions.yaml'] = b'Model: {type: object}'
+    assert not validation_cache.is_valid('key', documents.__getitem__)
+    assert not ValidationCache(directory).is_valid('key', documents.__getitem__)
+    # Referenced documents not available anymore
+    assert not ValidationCache(directory).is_valid('key', {}.__getitem__)
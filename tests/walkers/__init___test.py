@@ -3,14 +3,27 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import threading
 import typing
 from copy import deepcopy
+from itertools import chain
+from itertools import islice
 
 import mock
+import pytest
 from bravado_core.spec import Spec
 
+from swagger_spec_compatibility.interning import SpecsInterner
+from swagger_spec_compatibility.lazy_dereferencing import lazily_dereferenced_spec
+from swagger_spec_compatibility.walkers import BudgetExceeded
+from swagger_spec_compatibility.walkers import FusedWalker
+from swagger_spec_compatibility.walkers import iter_walker_results
 from swagger_spec_compatibility.walkers import PathType
 from swagger_spec_compatibility.walkers import SchemaWalker
+from swagger_spec_compatibility.walkers import walker_results
+from swagger_spec_compatibility.walkers import walkers_cache
+from swagger_spec_compatibility.walkers import WalkersBudget
+from swagger_spec_compatibility.walkers import WalkersCache
 
 
 class DummySchemaWalker(SchemaWalker[typing.Tuple[str, PathType]]):
@@ -280,3 +293,396 @@ def test_fix_parameter_path_with_wrong_signature(recwarn):
         'Unexpected ObjectWithWrongSignature.fix_parameter_path signature. ' \
         'fix_parameter_path() got an unexpected keyword argument \'path\''
     assert recwarn.list[0].category == RuntimeWarning
+
+
+def _spec_with_parameters():
+    # type: () -> typing.Tuple[Spec, Spec]
+    old_spec_dict = {
+        'swagger': '2.0',
+        'info': {
+            'title': 'Test',
+            'version': '1.0',
+        },
+        'paths': {
+            '/endpoint': {
+                'get': {
+                    'parameters': [
+                        {
+                            'in': 'query',
+                            'name': 'param1',
+                            'type': 'string',
+                        },
+                        {
+                            'in': 'query',
+                            'name': 'param2',
+                            'type': 'boolean',
+                        },
+                    ],
+                    'responses': {
+                        'default': {
+                            'description': '',
+                        },
+                    },
+                },
+            },
+        },
+    }  # type: typing.Mapping[typing.Text, typing.Any]
+    new_spec_dict = deepcopy(old_spec_dict)
+    new_spec_dict['paths']['/endpoint']['get']['parameters'] = [new_spec_dict['paths']['/endpoint']['get']['parameters'][1]]
+    return (
+        Spec.from_dict(spec_dict=old_spec_dict, origin_url='memory://'),
+        Spec.from_dict(spec_dict=new_spec_dict, origin_url='memory://'),
+    )
+
+
+class FixPathDummySchemaWalker(DummySchemaWalker):
+    def fix_parameter_path(self, path, original_path, value):
+        return (value[0], tuple(chain(original_path, value[1][len(original_path):])))
+
+
+def test_FusedWalker_is_equivalent_to_independent_walks():
+    old_spec, new_spec = _spec_with_parameters()
+    old_spec.deref_flattened_spec['recursive'] = old_spec.deref_flattened_spec
+    new_spec.deref_flattened_spec['recursive'] = new_spec.deref_flattened_spec
+    walker_classes = [DummySchemaWalker, SkipDummySchemaWalker, FixPathDummySchemaWalker]
+
+    fused_walkers = [walker_class(old_spec, new_spec) for walker_class in walker_classes]
+    results = FusedWalker(fused_walkers).walk()
+
+    assert results == [
+        walker_class(old_spec, new_spec).walk()
+        for walker_class in walker_classes
+    ]
+    # The results are stored into the walkers
+    assert [walker.walk() for walker in fused_walkers] == results
+
+
+def test_FusedWalker_traverses_only_once():
+    old_spec, new_spec = _spec_with_parameters()
+    walkers = [DummySchemaWalker(old_spec, new_spec), SkipDummySchemaWalker(old_spec, new_spec)]
+
+    with mock.patch.object(FusedWalker, '_inner_walk', autospec=True, side_effect=FusedWalker._inner_walk) as m:
+        FusedWalker(walkers).walk()
+        number_of_calls = m.call_count
+        FusedWalker(walkers).walk()
+        assert m.call_count == number_of_calls  # Already walked, no traversal needed
+
+    with mock.patch.object(FusedWalker, '_inner_walk', autospec=True, side_effect=FusedWalker._inner_walk) as m:
+        FusedWalker([DummySchemaWalker(old_spec, new_spec)]).walk()
+        assert m.call_count == number_of_calls
+
+
+def test_WalkersCache_computes_walkers_once_per_spec_pair():
+    old_spec, new_spec = _spec_with_parameters()
+    cache = WalkersCache()
+
+    results = cache.walk(DummySchemaWalker, old_spec, new_spec)
+    assert results == DummySchemaWalker(old_spec, new_spec).walk()
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    assert cache.walk(DummySchemaWalker, old_spec, new_spec) is results
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Results are shared only for the same walker and the same specs
+    assert cache.walk(SkipDummySchemaWalker, old_spec, new_spec) is not results
+    assert cache.walk(DummySchemaWalker, new_spec, old_spec) is not results
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    cache.clear()
+    assert cache.walk(DummySchemaWalker, old_spec, new_spec) is not results
+
+
+def test_WalkersCache_prefetch_uses_a_single_traversal():
+    old_spec, new_spec = _spec_with_parameters()
+    cache = WalkersCache()
+    cache.walk(SkipDummySchemaWalker, old_spec, new_spec)
+
+    with mock.patch.object(FusedWalker, '_inner_walk', autospec=True, side_effect=FusedWalker._inner_walk) as mock_inner_walk:
+        cache.prefetch([DummySchemaWalker, SkipDummySchemaWalker, FixPathDummySchemaWalker], old_spec, new_spec)
+    assert [call for call in mock_inner_walk.call_args_list if call[1]['path'] == ()] == [
+        mock.call(
+            mock.ANY,
+            path=(),
+            left=old_spec.deref_flattened_spec,
+            right=new_spec.deref_flattened_spec,
+            walkers=[mock.ANY, mock.ANY],  # SkipDummySchemaWalker was already cached
+            results=mock.ANY,
+        ),
+    ]
+
+    with mock.patch.object(FusedWalker, '_inner_walk', autospec=True) as mock_inner_walk:
+        assert cache.walk(DummySchemaWalker, old_spec, new_spec) == DummySchemaWalker(old_spec, new_spec).walk()
+        assert cache.walk(FixPathDummySchemaWalker, old_spec, new_spec) == FixPathDummySchemaWalker(old_spec, new_spec).walk()
+    assert not mock_inner_walk.called
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_walker_results_uses_the_active_walkers_cache():
+    old_spec, new_spec = _spec_with_parameters()
+
+    with walkers_cache() as cache:
+        results = walker_results(DummySchemaWalker, old_spec, new_spec)
+        assert walker_results(DummySchemaWalker, old_spec, new_spec) is results
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        external_cache = WalkersCache()
+        with walkers_cache(external_cache) as inner_cache:
+            assert inner_cache is external_cache
+            assert walker_results(DummySchemaWalker, old_spec, new_spec) is not results
+        # Externally provided caches are not cleared
+        assert external_cache.walk(DummySchemaWalker, old_spec, new_spec) is not results
+        assert external_cache.hits == 1
+
+    # Without active caches the results are computed from scratch
+    assert walker_results(DummySchemaWalker, old_spec, new_spec) is not results
+    assert walker_results(DummySchemaWalker, old_spec, new_spec) == results
+
+
+def test_walkers_cache_is_active_only_in_the_current_thread():
+    old_spec, new_spec = _spec_with_parameters()
+
+    with walkers_cache() as cache:
+        thread = threading.Thread(target=walker_results, args=(DummySchemaWalker, old_spec, new_spec))
+        thread.start()
+        thread.join()
+        assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_Walker_iter_walk_stops_the_traversal_early():
+    old_spec, new_spec = _spec_with_parameters()
+    walker = DummySchemaWalker(old_spec, new_spec)
+
+    with mock.patch.object(DummySchemaWalker, 'value_check', autospec=True, side_effect=DummySchemaWalker.value_check) as m:
+        assert len(list(islice(walker.iter_walk(), 1))) == 1
+        assert not m.called
+    # Interrupted traversals are not cached and do not affect the following ones
+    assert list(walker.iter_walk()) == list(DummySchemaWalker(old_spec, new_spec).walk())
+    assert list(walker.iter_walk()) == walker.walk()
+
+
+def test_iter_walker_results_with_lazy_walkers_cache():
+    old_spec, new_spec = _spec_with_parameters()
+    expected_results = list(DummySchemaWalker(old_spec, new_spec).walk())
+
+    with walkers_cache(lazy=True) as cache:
+        next(iter_walker_results(DummySchemaWalker, old_spec, new_spec))
+        assert list(iter_walker_results(DummySchemaWalker, old_spec, new_spec)) == expected_results
+        # The completed traversal is cached
+        assert walker_results(DummySchemaWalker, old_spec, new_spec) == expected_results
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    with walkers_cache() as cache:
+        assert list(iter_walker_results(DummySchemaWalker, old_spec, new_spec)) == expected_results
+        assert list(iter_walker_results(DummySchemaWalker, old_spec, new_spec)) == expected_results
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    assert list(iter_walker_results(DummySchemaWalker, old_spec, new_spec)) == expected_results
+
+
+def test_Walker_walk_exceeding_max_visited_nodes():
+    old_spec, new_spec = _spec_with_parameters()
+    walker = DummySchemaWalker(old_spec, new_spec, budget=WalkersBudget(max_visited_nodes=2))
+
+    for _ in range(2):
+        with pytest.raises(BudgetExceeded) as excinfo:
+            walker.walk()
+        assert str(excinfo.value) == 'DummySchemaWalker exceeded the budget of 2 visited nodes'
+    with pytest.raises(BudgetExceeded):
+        list(walker.iter_walk())
+
+
+def test_FusedWalker_excludes_only_the_walkers_exceeding_their_budget():
+    old_spec, new_spec = _spec_with_parameters()
+    walker_within_budget = DummySchemaWalker(old_spec, new_spec)
+    walker_out_of_budget = SkipDummySchemaWalker(old_spec, new_spec, budget=WalkersBudget(max_visited_nodes=2))
+
+    FusedWalker([walker_within_budget, walker_out_of_budget]).traverse()
+
+    assert walker_within_budget.walk() == DummySchemaWalker(old_spec, new_spec).walk()
+    with pytest.raises(BudgetExceeded):
+        walker_out_of_budget.walk()
+
+
+def test_WalkersBudget_deadline():
+    budget = WalkersBudget(timeout=2)
+    with mock.patch('swagger_spec_compatibility.walkers.time.time', autospec=True) as mock_time:
+        mock_time.return_value = 10
+        budget.check_deadline()  # Not started yet
+        budget.start()
+
+        with budget.paused():
+            mock_time.return_value = 20
+        # Time spent in paused context is not accounted
+        budget.check_deadline()
+
+        mock_time.return_value = 23
+        with pytest.raises(BudgetExceeded) as excinfo:
+            budget.check_deadline()
+        assert str(excinfo.value) == 'Time budget of 2 seconds exceeded'
+
+
+def test_WalkersBudget_cancel_event():
+    cancel_event = threading.Event()
+    budget = WalkersBudget(cancel_event=cancel_event)
+    budget.check_deadline()
+
+    cancel_event.set()
+    with pytest.raises(BudgetExceeded) as excinfo:
+        budget.check_deadline()
+    assert str(excinfo.value) == 'Evaluation cancelled'
+
+
+def test_Walker_checks_the_deadline_periodically():
+    old_spec, new_spec = _spec_with_parameters()
+    budget = WalkersBudget(timeout=1)
+    walker = DummySchemaWalker(old_spec, new_spec, budget=budget)
+
+    with mock.patch('swagger_spec_compatibility.walkers._DEADLINE_CHECK_INTERVAL', 1), mock.patch.object(
+        budget, 'check_deadline', autospec=True, side_effect=BudgetExceeded('timeout'),
+    ):
+        with pytest.raises(BudgetExceeded):
+            walker.walk()
+
+
+def test_WalkersCache_export_and_import_results():
+    old_spec, new_spec = _spec_with_parameters()
+    cache = WalkersCache(budget=WalkersBudget(max_visited_nodes=2))
+    cache.prefetch([DummySchemaWalker], old_spec, new_spec)
+    cache.budget = None
+    cache.prefetch([SkipDummySchemaWalker], old_spec, new_spec)
+    exported_results = cache.export_results([DummySchemaWalker, SkipDummySchemaWalker], old_spec, new_spec)
+
+    assert isinstance(exported_results[DummySchemaWalker], BudgetExceeded)
+    assert exported_results[SkipDummySchemaWalker] == SkipDummySchemaWalker(old_spec, new_spec).walk()
+
+    other_cache = WalkersCache()
+    other_cache.import_results(exported_results, old_spec, new_spec)
+    assert other_cache.walk(SkipDummySchemaWalker, old_spec, new_spec) == exported_results[SkipDummySchemaWalker]
+    with pytest.raises(BudgetExceeded):
+        other_cache.walk(DummySchemaWalker, old_spec, new_spec)
+    assert other_cache.misses == 0
+
+
+def _spec_with_references(origin_url='memory://', recursive=True, interner=None):
+    # type: (typing.Text, bool, typing.Optional[SpecsInterner]) -> typing.Tuple[Spec, Spec]
+    old_spec_dict = {
+        'swagger': '2.0',
+        'info': {
+            'title': 'Test',
+            'version': '1.0',
+        },
+        'paths': {
+            '/endpoint': {
+                'get': {
+                    'parameters': [{'$ref': '#/parameters/param'}],
+                    'responses': {
+                        'default': {
+                            'description': '',
+                            'schema': {'$ref': '#/definitions/model'},
+                        },
+                    },
+                },
+            },
+        },
+        'parameters': {
+            'param': {'in': 'query', 'name': 'param', 'type': 'string'},
+        },
+        'definitions': {
+            'model': {
+                'type': 'object',
+                'properties': {
+                    'property': {'type': 'string'},
+                    'recursive': {'$ref': '#/definitions/model'},
+                },
+            },
+            'unused': {
+                'type': 'object',
+                'properties': {'property': {'$ref': '#/definitions/model'}},
+            },
+        },
+    }  # type: typing.Mapping[typing.Text, typing.Any]
+    if not recursive:
+        del old_spec_dict['definitions']['model']['properties']['recursive']
+    new_spec_dict = deepcopy(old_spec_dict)
+    new_spec_dict['definitions']['model']['properties']['property']['type'] = 'integer'
+    if interner is not None:
+        old_spec_dict, new_spec_dict = interner.intern(old_spec_dict), interner.intern(new_spec_dict)
+    return (
+        Spec.from_dict(spec_dict=old_spec_dict, origin_url=origin_url),
+        Spec.from_dict(spec_dict=new_spec_dict, origin_url=origin_url),
+    )
+
+
+class PathsOnlyDummySchemaWalker(DummySchemaWalker):
+    def should_path_be_walked_through(self, path):
+        # type: (PathType) -> bool
+        return path[:1] in ((), ('paths',))
+
+
+def test_SchemaWalker_with_lazy_dereferencing_is_equivalent_to_the_dereferenced_specs():
+    # Flattening requires a well known scheme
+    old_spec, new_spec = _spec_with_references(origin_url='file:///swagger.json', recursive=False)
+    walker = DummySchemaWalker(old_spec, new_spec, lazy_dereferencing=True)
+    assert walker.left is lazily_dereferenced_spec(old_spec)
+    assert walker.right is lazily_dereferenced_spec(new_spec)
+
+    # Flattening annotates the schemas with x-model and moves the models, so only the paths are compared
+    def paths_results(results):
+        return {value for value in results if value[1][:1] == ('paths',) and 'x-model' not in value[1]}
+
+    assert paths_results(walker.walk()) == paths_results(DummySchemaWalker(old_spec, new_spec).walk())
+    assert ('value_check_paths', ('paths', '/endpoint', 'get', 'parameters', 'param', 'name')) in walker.walk()
+
+
+def test_SchemaWalker_with_lazy_dereferencing_does_not_dereference_the_skipped_paths():
+    old_spec, new_spec = _spec_with_references()
+    with mock.patch.object(
+        old_spec.resolver, 'resolve_from_url', autospec=True, side_effect=old_spec.resolver.resolve_from_url,
+    ) as mock_resolve_from_url:
+        results = PathsOnlyDummySchemaWalker(old_spec, new_spec, lazy_dereferencing=True).walk()
+
+    assert ('value_check_paths', ('paths', '/endpoint', 'get', 'parameters', 'param', 'type')) in results
+    schema_path = ('paths', '/endpoint', 'get', 'responses', 'default', 'schema')
+    assert ('value_check_paths', schema_path + ('properties', 'property', 'type')) in results
+    assert sorted(call[0][0] for call in mock_resolve_from_url.call_args_list) == [
+        'memory://#/definitions/model', 'memory://#/parameters/param',
+    ]
+    assert 'deref_flattened_spec' not in old_spec.__dict__
+
+
+def test_WalkersCache_with_lazy_dereferencing():
+    old_spec, new_spec = _spec_with_references()
+    cache = WalkersCache(lazy_dereferencing=True)
+    cache.prefetch([DummySchemaWalker, PathsOnlyDummySchemaWalker], old_spec, new_spec)
+    assert cache.walk(DummySchemaWalker, old_spec, new_spec) == DummySchemaWalker(old_spec, new_spec, lazy_dereferencing=True).walk()
+    assert cache._get_walker(PathsOnlyDummySchemaWalker, old_spec, new_spec).left is lazily_dereferenced_spec(old_spec)
+
+
+class IdenticalSubtreesSkippingDummySchemaWalker(DummySchemaWalker):
+    skip_identical_subtrees = True
+
+
+def test_SchemaWalker_skips_identical_subtrees_of_interned_specs():
+    old_spec, new_spec = _spec_with_references(interner=SpecsInterner())
+    all_results = DummySchemaWalker(old_spec, new_spec, lazy_dereferencing=True).walk()
+    results = IdenticalSubtreesSkippingDummySchemaWalker(old_spec, new_spec, lazy_dereferencing=True).walk()
+
+    assert set(results) < set(all_results)
+    # The shared subtrees are skipped, even if reached via $refs
+    assert ('value_check_paths', ('info', 'title')) not in results
+    assert ('value_check_paths', ('paths', '/endpoint', 'get', 'parameters', 'param', 'type')) not in results
+    # The subtrees referencing the modified model are walked
+    schema_path = ('paths', '/endpoint', 'get', 'responses', 'default', 'schema')
+    assert ('value_check_paths', schema_path + ('properties', 'property', 'type')) in results
+
+    fused_walkers = [
+        IdenticalSubtreesSkippingDummySchemaWalker(old_spec, new_spec, lazy_dereferencing=True),
+        DummySchemaWalker(old_spec, new_spec, lazy_dereferencing=True),
+    ]
+    assert FusedWalker(fused_walkers).walk() == [results, all_results]
+
+
+def test_SchemaWalker_does_not_skip_equal_subtrees_of_not_interned_specs():
+    old_spec, new_spec = _spec_with_references()
+    assert IdenticalSubtreesSkippingDummySchemaWalker(old_spec, new_spec, lazy_dereferencing=True).walk() == \
+        DummySchemaWalker(old_spec, new_spec, lazy_dereferencing=True).walk()